@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Backend.settings')
 
 application = get_asgi_application()
+
+# Solo los servidores (runserver, gunicorn, uvicorn...) importan este módulo: cargan
+# el modelo de texto al arrancar y no en la primera petición
+from texto.registro import precargar_servidor  # noqa: E402
+
+precargar_servidor()
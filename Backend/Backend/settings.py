@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'texto',
 ]
 
 MIDDLEWARE = [
@@ -120,3 +121,82 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Servicio de inferencia del módulo de texto (texto/inferencia.py)
+
+TEXTO_MODELO_DIR = BASE_DIR / 'texto' / 'modelo_binario'
+
+# Servir la exportación int8 de texto/cuantizacion.py en lugar del modelo fp32
+# (ver texto/evaluar_cuantizacion.py para comparar latencia y precisión)
+TEXTO_MODELO_CUANTIZADO = False
+
+TEXTO_MODELO_INT8_DIR = BASE_DIR / 'texto' / 'modelo_binario_int8'
+
+TEXTO_MAX_LENGTH = 256
+
+# Cargar el modelo al arrancar el servidor (Backend/wsgi.py y Backend/asgi.py) en
+# lugar de en la primera petición. migrate, check, los tests y demás comandos no
+# importan esos módulos y nunca lo cargan.
+TEXTO_PRECARGAR_MODELO = True
+
+# Hilos de torch por proceso (None deja el valor por defecto de torch)
+TEXTO_TORCH_THREADS = None
+
+TEXTO_TORCH_INTEROP_THREADS = 1
+
+# Micro-lotes: peticiones concurrentes se agrupan hasta este tamaño o hasta
+# que pasen TEXTO_MAX_WAIT_MS milisegundos desde la primera del lote
+TEXTO_MAX_BATCH_SIZE = 16
+
+TEXTO_MAX_WAIT_MS = 10
+
+# Caché de predicciones: LRU en memoria + tabla texto.PrediccionCache. Se invalida
+# sola al cambiar los archivos de TEXTO_MODELO_DIR
+TEXTO_CACHE_PREDICCIONES = True
+
+TEXTO_CACHE_MAX_ENTRADAS = 10000
+
+# False: solo la LRU en memoria, sin escribir en la base de datos
+TEXTO_CACHE_PERSISTENTE = True
+
+# Vistas asíncronas (Backend/asgi.py): hilos que ejecutan las llamadas al modelo y
+# máximo de peticiones en cola o en el modelo; las demás reciben un 429 con
+# Retry-After de TEXTO_RETRY_AFTER segundos. Con TEXTO_WORKERS_INFERENCIA igual a
+# TEXTO_MAX_BATCH_SIZE los micro-lotes se pueden llenar
+TEXTO_WORKERS_INFERENCIA = 16
+
+TEXTO_MAX_EN_CURSO = 64
+
+TEXTO_RETRY_AFTER = 1
+
+# Documentos largos (predict-document): ventanas de TEXTO_MAX_LENGTH tokens que
+# comparten TEXTO_VENTANA_SOLAPAMIENTO tokens con la anterior
+TEXTO_VENTANA_SOLAPAMIENTO = 64
+
+TEXTO_VENTANAS_POR_LOTE = 16
+
+# Límite de ventanas por documento (unas 50.000 palabras con los valores por defecto)
+TEXTO_MAX_VENTANAS = 256
+
+# Subida de documentos (analyze-document): tamaño máximo del archivo y de páginas
+# de un PDF. El total de ventanas del documento también está limitado por
+# TEXTO_MAX_VENTANAS
+TEXTO_MAX_SUBIDA_BYTES = 10 * 1024 * 1024
+
+TEXTO_MAX_PAGINAS = 100
+
+# Características estilométricas (text-features, texto/caracteristicas.py): carpeta de
+# un modelo causal pequeño para la perplejidad (None = sin perplejidad) y caché SQLite
+TEXTO_MODELO_PERPLEJIDAD = None
+
+TEXTO_CACHE_CARACTERISTICAS = BASE_DIR / 'texto' / 'caracteristicas.sqlite'
+
+# Cascada (texto/cascada.py): el filtro TF-IDF que entrena entrenamiento_modelo.py
+# contesta predict-text directamente salvo si su probabilidad de IA cae dentro de
+# TEXTO_CASCADA_BANDA (bajo, alto); solo esos textos llegan a BERT
+TEXTO_CASCADA = False
+
+TEXTO_FILTRO_TFIDF = BASE_DIR / 'texto' / 'filtro_tfidf.joblib'
+
+TEXTO_CASCADA_BANDA = (0.2, 0.9)
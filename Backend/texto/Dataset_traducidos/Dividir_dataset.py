@@ -1,8 +1,19 @@
 """
 Script para dividir el dataset entre traducciones completadas y pendientes
+
+El CSV se lee por bloques de --chunk-rows filas y cada bloque se añade a los dos
+archivos de salida, así que la memoria usada no depende del tamaño del dataset.
+Con --parquet la entrada y las salidas son Parquet particionado por label
+(almacen_datos.py).
 """
+import argparse
 import pandas as pd
 import os
+import sys
+
+# almacen_datos.py está en texto/, la carpeta superior (se ejecuta desde Dataset_traducidos)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from almacen_datos import EscritorDataset, es_csv, iterar_dataset, ruta_parquet
 
 # Rutas actualizadas
 input_path = r'D:\1.CARRERA UNIVERSITARIA\9. DECIMO SEMESTRE\1.INGIENERIA SOFTWARE 1\3.PROYECTOS\PROYECTO-GRUPAL-SW1\Backend\texto\Dataset_traducidos\dataset_binario_español_completo.csv'
@@ -12,52 +23,84 @@ pendiente_path = os.path.join(output_folder, 'dataset_parte_pendiente.csv')
 
 # La carpeta ya existe, así que no es necesario crearla
 
-# Cargar dataset
-print("Cargando dataset...")
-df = pd.read_csv(input_path)
-total_rows = len(df)
-print(f"Total de filas: {total_rows}")
-
-# Identificar filas traducidas vs pendientes
-df['necesita_traduccion'] = df['text_es'].apply(lambda x: not isinstance(x, str) or not str(x).strip())
-traducidas = df[~df['necesita_traduccion']]
-pendientes = df[df['necesita_traduccion']]
-
 # Información sobre el punto de corte específico
 punto_corte = 70265
-print(f"Punto de corte solicitado: línea {punto_corte}")
-
-# Comprobar si el punto de corte está dentro del rango
-if punto_corte > 0 and punto_corte < total_rows:
-    # División por índice exacto
-    traducidas_por_indice = df.iloc[:punto_corte]
-    pendientes_por_indice = df.iloc[punto_corte:]
-    print(f"División por índice: {len(traducidas_por_indice)} traducidas, {len(pendientes_por_indice)} pendientes")
-
-# Estadísticas de la división por contenido
-print(f"División por contenido: {len(traducidas)} traducidas, {len(pendientes)} pendientes")
-
-# Preguntar qué método usar
-print("\n¿Qué método de división prefieres usar?")
-print(f"1. División exacta por línea (en el punto {punto_corte})")
-print("2. División por contenido (traducido vs vacío)")
-opcion = '2'  # Por defecto usamos la opción 2 (más precisa)
-
-# Ejecutar división según la opción
-if opcion == '1':
-    # Guardar archivos divididos por índice
-    traducidas_por_indice.to_csv(traducido_path, index=False)
-    pendientes_por_indice.to_csv(pendiente_path, index=False)
-    print(f"\nArchivos guardados por división de índice:")
-else:
-    # Eliminar columna auxiliar antes de guardar
-    traducidas = traducidas.drop(columns=['necesita_traduccion'])
-    pendientes = pendientes.drop(columns=['necesita_traduccion'])
-    
-    # Guardar archivos divididos por contenido
-    traducidas.to_csv(traducido_path, index=False)
-    pendientes.to_csv(pendiente_path, index=False)
-    print(f"\nArchivos guardados por división de contenido:")
-
-print(f"- Traducciones completadas: {traducido_path}")
-print(f"- Traducciones pendientes: {pendiente_path}")
\ No newline at end of file
+
+def necesita_traduccion(text_es):
+    """Máscara de las filas sin traducción (vacía o solo espacios)"""
+    return text_es.isna() | (text_es.str.strip() == '')
+
+def dividir_por_bloques(input_path, traducido_path, pendiente_path, opcion, punto_corte, chunk_rows):
+    """Divide el dataset bloque a bloque y devuelve los conteos de ambos métodos de división.
+
+    Las columnas de un CSV se leen como texto para escribirlas tal cual, sin que el tipo
+    inferido en cada bloque cambie su formato.
+    """
+    conteos = {'total': 0, 'traducidas': 0, 'pendientes': 0}
+    particiones = None if es_csv(traducido_path) else ['label']
+    with EscritorDataset(traducido_path, particiones) as traducido, \
+            EscritorDataset(pendiente_path, particiones) as pendiente:
+        for bloque in iterar_dataset(input_path, chunk_rows=chunk_rows, dtype=str):
+            # Identificar filas traducidas vs pendientes
+            pendientes = necesita_traduccion(bloque['text_es'])
+            conteos['pendientes'] += int(pendientes.sum())
+            conteos['traducidas'] += int((~pendientes).sum())
+
+            if opcion == '1':
+                # División por índice exacto
+                pendientes = pd.Series(conteos['total'] + pd.RangeIndex(len(bloque)) >= punto_corte, index=bloque.index)
+            conteos['total'] += len(bloque)
+
+            traducido.escribir(bloque[~pendientes])
+            pendiente.escribir(bloque[pendientes])
+            print(f"Procesadas {conteos['total']} filas...", end='\r')
+    print()
+    return conteos
+
+def main():
+    parser = argparse.ArgumentParser(description='Divide el dataset en traducciones completadas y pendientes')
+    parser.add_argument('--input', default=input_path, help='CSV con la columna text_es')
+    parser.add_argument('--chunk-rows', type=int, default=20000, help='filas leídas y escritas por bloque')
+    parser.add_argument('--opcion', choices=['1', '2'], default='2',
+                        help='1 = por línea (punto de corte), 2 = por contenido (traducido vs vacío)')
+    parser.add_argument('--punto-corte', type=int, default=punto_corte, help='línea de corte de la opción 1')
+    parser.add_argument('--parquet', action='store_true',
+                        help='leer y escribir las versiones .parquet (la opción 1 requiere una entrada sin particionar)')
+    args = parser.parse_args()
+    salida_traducida, salida_pendiente = traducido_path, pendiente_path
+    if args.parquet:
+        args.input = ruta_parquet(args.input)
+        salida_traducida, salida_pendiente = ruta_parquet(traducido_path), ruta_parquet(pendiente_path)
+
+    print(f"Punto de corte solicitado: línea {args.punto_corte}")
+
+    # Preguntar qué método usar
+    print("\n¿Qué método de división prefieres usar?")
+    print(f"1. División exacta por línea (en el punto {args.punto_corte})")
+    print("2. División por contenido (traducido vs vacío)")
+    opcion = args.opcion  # Por defecto usamos la opción 2 (más precisa)
+
+    # Dividir el dataset bloque a bloque
+    print("\nDividiendo dataset...")
+    conteos = dividir_por_bloques(args.input, salida_traducida, salida_pendiente, opcion,
+                                  args.punto_corte, args.chunk_rows)
+    total_rows = conteos['total']
+    print(f"Total de filas: {total_rows}")
+
+    # Comprobar si el punto de corte está dentro del rango
+    if args.punto_corte > 0 and args.punto_corte < total_rows:
+        print(f"División por índice: {args.punto_corte} traducidas, {total_rows - args.punto_corte} pendientes")
+
+    # Estadísticas de la división por contenido
+    print(f"División por contenido: {conteos['traducidas']} traducidas, {conteos['pendientes']} pendientes")
+
+    if opcion == '1':
+        print(f"\nArchivos guardados por división de índice:")
+    else:
+        print(f"\nArchivos guardados por división de contenido:")
+
+    print(f"- Traducciones completadas: {salida_traducida}")
+    print(f"- Traducciones pendientes: {salida_pendiente}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Benchmark sin red del cliente de traducción con el traductor falso
+
+Compara el antiguo esquema (un texto por petición y de uno en uno) con el cliente
+asíncrono empaquetando textos y con varias peticiones en vuelo.
+
+Uso:
+    python benchmark_traduccion.py --n 500 --latencia 0.05 --tasa-fallos 0.05
+"""
+import argparse
+import time
+
+from traductores import ClienteTraduccion, TraductorFalso
+
+
+def medir(traductor, textos, **kwargs):
+    cliente = ClienteTraduccion(traductor, espera_base=0.01, **kwargs)
+    inicio = time.perf_counter()
+    resultados = cliente.traducir_sync(textos)
+    transcurrido = time.perf_counter() - inicio
+    errores = sum(isinstance(r, Exception) for r in resultados)
+    print(f'  {len(textos) / transcurrido:8.1f} textos/s, {cliente.estadisticas["peticiones"]} peticiones, '
+          f'{cliente.estadisticas["reintentos"]} reintentos, {errores} errores')
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mide el cliente de traducción con el traductor falso')
+    parser.add_argument('--n', type=int, default=500, help='número de textos')
+    parser.add_argument('--latencia', type=float, default=0.05, help='segundos por petición simulada')
+    parser.add_argument('--tasa-fallos', type=float, default=0.05, help='fracción de textos cuyo primer intento falla')
+    parser.add_argument('--concurrencia', type=int, default=4, help='peticiones simultáneas')
+    parser.add_argument('--peticiones-por-segundo', type=float, default=None, help='límite de tasa (sin límite por defecto)')
+    args = parser.parse_args()
+
+    textos = [f'Essay number {i}. It has a few sentences.' for i in range(args.n)]
+
+    print('Un texto por petición, sin concurrencia:')
+    secuencial = medir(TraductorFalso(args.latencia, args.tasa_fallos, max_textos_por_peticion=1), textos,
+                       concurrencia=1, peticiones_por_segundo=args.peticiones_por_segundo)
+    print(f'Hasta 50 textos por petición, concurrencia {args.concurrencia}:')
+    empaquetado = medir(TraductorFalso(args.latencia, args.tasa_fallos), textos,
+                        concurrencia=args.concurrencia, peticiones_por_segundo=args.peticiones_por_segundo)
+
+    assert secuencial == empaquetado, 'las traducciones no coinciden'
+
+
+if __name__ == '__main__':
+    main()
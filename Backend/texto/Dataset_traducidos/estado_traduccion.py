@@ -0,0 +1,123 @@
+"""
+Estado de traducción compartido por los scripts de traducción del dataset
+
+Cada traducción se anota en una tabla SQLite (diario de solo añadir) con el número
+de fila y el hash del texto original. Guardar un bloque cuesta lo que el bloque, no
+lo que el dataset entero, y al reanudar solo se buscan las filas pendientes sin
+recorrer el DataFrame con df.loc. El dataset final (CSV o Parquet) se escribe una
+sola vez con exportar.
+
+Usa almacen_datos.py de texto/: los scripts que lo importan añaden esa carpeta a
+sys.path antes de importarlo.
+"""
+import hashlib
+import sqlite3
+import time
+
+import pandas as pd
+
+from almacen_datos import COLUMNA_ESTADO, es_csv, guardar_dataset
+
+
+def hash_texto(texto):
+    return hashlib.sha1(str(texto).strip().encode('utf-8')).hexdigest()
+
+
+class EstadoTraduccion:
+    """Diario de traducciones en SQLite: fila -> (hash del original, traducción, estado)"""
+
+    def __init__(self, ruta_db):
+        self.ruta_db = ruta_db
+        self.conexion = sqlite3.connect(ruta_db)
+        self.conexion.execute('PRAGMA journal_mode=WAL')
+        self.conexion.execute('PRAGMA synchronous=NORMAL')
+        self.conexion.execute(
+            'CREATE TABLE IF NOT EXISTS traducciones ('
+            ' fila INTEGER PRIMARY KEY,'
+            ' hash_origen TEXT NOT NULL,'
+            ' text_es TEXT,'
+            " estado TEXT NOT NULL CHECK (estado IN ('ok', 'error')),"
+            ' actualizado REAL NOT NULL)'
+        )
+        self.conexion.commit()
+
+    def registrar_lote(self, registros):
+        """Guarda [(fila, texto_original, traduccion, es_error), ...] en una transacción"""
+        ahora = time.time()
+        with self.conexion:
+            self.conexion.executemany(
+                'INSERT OR REPLACE INTO traducciones (fila, hash_origen, text_es, estado, actualizado) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [(int(fila), hash_texto(origen), traduccion, 'error' if es_error else 'ok', ahora)
+                 for fila, origen, traduccion, es_error in registros]
+            )
+
+    def registrar(self, fila, texto_origen, traduccion, es_error=False):
+        self.registrar_lote([(fila, texto_origen, traduccion, es_error)])
+
+    def importar(self, df, columna='text_es'):
+        """Anota como traducidas las filas de df con texto en columna (CSV de ejecuciones anteriores)"""
+        traducidas = df[df[columna].notna() & (df[columna].astype(str).str.strip() != '')]
+        self.registrar_lote(zip(traducidas.index, traducidas['text'], traducidas[columna],
+                                traducidas[columna].astype(str).str.startswith('ERROR')))
+        return len(traducidas)
+
+    def _tabla(self):
+        return pd.read_sql_query('SELECT fila, hash_origen, text_es, estado FROM traducciones',
+                                 self.conexion, index_col='fila')
+
+    def _hashes(self, filas, solo_ok=False):
+        """{fila: hash del original} de las filas dadas que tienen entrada en el diario"""
+        filas = [int(fila) for fila in filas]
+        filtro = " AND estado = 'ok'" if solo_ok else ''
+        hashes = {}
+        for inicio in range(0, len(filas), 500):
+            lote = filas[inicio:inicio + 500]
+            consulta = ('SELECT fila, hash_origen FROM traducciones WHERE fila IN (%s)%s'
+                        % (','.join('?' * len(lote)), filtro))
+            hashes.update(self.conexion.execute(consulta, lote))
+        return hashes
+
+    def pendientes(self, textos_origen, reintentar_errores=False):
+        """Filas de textos_origen (Series indexada por fila) sin traducción válida en el diario.
+
+        Una fila cuenta como traducida si tiene una entrada con el mismo hash del
+        original (solo las 'ok' con reintentar_errores); si el texto original cambió,
+        vuelve a estar pendiente. Solo se consultan las filas de textos_origen.
+        """
+        hechas = self._hashes(textos_origen.index, solo_ok=reintentar_errores)
+        pendientes = []
+        for fila, texto in textos_origen.items():
+            hecha = hechas.get(int(fila))
+            # El hash solo se calcula para las filas con entrada
+            if hecha is None or hecha != hash_texto(texto):
+                pendientes.append(fila)
+        return pendientes
+
+    def contar(self):
+        return dict(self.conexion.execute('SELECT estado, COUNT(*) FROM traducciones GROUP BY estado').fetchall())
+
+    def aplicar(self, df, columna='text_es', incluir_errores=True):
+        """Copia en df[columna] las traducciones del diario (el resto de filas no cambia)"""
+        tabla = self._tabla()
+        if not incluir_errores:
+            tabla = tabla[tabla['estado'] == 'ok']
+        traducciones = tabla['text_es']
+        traducciones = traducciones[traducciones.index.isin(df.index)]
+        if columna not in df.columns:
+            df[columna] = ''
+        df[columna] = df[columna].astype(object)
+        df.loc[traducciones.index, columna] = traducciones.values
+        return df
+
+    def exportar(self, df, output_path, columna='text_es', incluir_errores=True):
+        """Escribe una sola vez el dataset final con las traducciones del diario.
+
+        Si output_path no es .csv se guarda en Parquet particionado por label y
+        estado de traducción (almacen_datos.py).
+        """
+        particiones = None if es_csv(output_path) or columna != 'text_es' else ['label', COLUMNA_ESTADO]
+        guardar_dataset(self.aplicar(df, columna, incluir_errores), output_path, particiones)
+
+    def cerrar(self):
+        self.conexion.close()
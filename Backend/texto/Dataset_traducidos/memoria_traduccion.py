@@ -0,0 +1,92 @@
+"""
+Memoria de traducción persistente compartida por los scripts de traducción
+
+Guarda en SQLite la traducción de cada segmento (oración o párrafo) indexada por el
+hash del segmento normalizado. ClienteTraduccion la consulta antes de llamar al
+proveedor, así que las frases repetidas entre ensayos (saludos, fórmulas de cierre,
+enunciados copiados) se traducen una sola vez y sobreviven a caídas y reinicios.
+"""
+import hashlib
+import re
+import sqlite3
+import time
+
+# Fin de oración: . ! ? (y comillas o paréntesis de cierre) seguido de espacio
+_FIN_ORACION = re.compile(r'(?<=[.!?])["\')\]]*\s+')
+
+
+def normalizar_segmento(segmento):
+    return ' '.join(segmento.split())
+
+
+def hash_segmento(segmento):
+    return hashlib.sha1(normalizar_segmento(segmento).encode('utf-8')).hexdigest()
+
+
+def segmentar(texto, granularidad='oracion'):
+    """Divide un texto en párrafos (líneas no vacías) y, con granularidad 'oracion', en oraciones.
+
+    Devuelve una lista de párrafos, cada uno como lista de segmentos normalizados.
+    """
+    parrafos = []
+    for parrafo in texto.split('\n'):
+        parrafo = normalizar_segmento(parrafo)
+        if not parrafo:
+            continue
+        if granularidad == 'oracion':
+            parrafos.append([s for s in _FIN_ORACION.split(parrafo) if s])
+        else:
+            parrafos.append([parrafo])
+    return parrafos
+
+
+class MemoriaTraduccion:
+    """Memoria de traducción en SQLite: (par de idiomas, hash del segmento) -> traducción"""
+
+    def __init__(self, ruta_db, par='en-es'):
+        self.ruta_db = ruta_db
+        self.par = par
+        self.conexion = sqlite3.connect(ruta_db)
+        self.conexion.execute('PRAGMA journal_mode=WAL')
+        self.conexion.execute('PRAGMA synchronous=NORMAL')
+        # Varios scripts pueden compartir la memoria a la vez
+        self.conexion.execute('PRAGMA busy_timeout=30000')
+        self.conexion.execute(
+            'CREATE TABLE IF NOT EXISTS segmentos ('
+            ' par TEXT NOT NULL,'
+            ' hash_origen TEXT NOT NULL,'
+            ' origen TEXT NOT NULL,'
+            ' destino TEXT NOT NULL,'
+            ' creado REAL NOT NULL,'
+            ' PRIMARY KEY (par, hash_origen))'
+        )
+        self.conexion.commit()
+
+    def buscar(self, segmentos):
+        """Devuelve {hash: traducción} de los segmentos que ya están en la memoria"""
+        hashes = list({hash_segmento(s) for s in segmentos})
+        encontrados = {}
+        # SQLite limita el número de parámetros por consulta
+        for inicio in range(0, len(hashes), 500):
+            lote = hashes[inicio:inicio + 500]
+            consulta = ('SELECT hash_origen, destino FROM segmentos WHERE par = ? AND hash_origen IN (%s)'
+                        % ','.join('?' * len(lote)))
+            encontrados.update(self.conexion.execute(consulta, [self.par] + lote).fetchall())
+        return encontrados
+
+    def guardar(self, pares):
+        """Guarda [(segmento, traducción), ...] en una transacción"""
+        ahora = time.time()
+        with self.conexion:
+            self.conexion.executemany(
+                'INSERT OR REPLACE INTO segmentos (par, hash_origen, origen, destino, creado) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [(self.par, hash_segmento(origen), normalizar_segmento(origen), destino, ahora)
+                 for origen, destino in pares]
+            )
+
+    def __len__(self):
+        return self.conexion.execute('SELECT COUNT(*) FROM segmentos WHERE par = ?', (self.par,)).fetchone()[0]
+
+    def cerrar(self):
+        self.conexion.close()
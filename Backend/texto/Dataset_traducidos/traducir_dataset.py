@@ -1,22 +1,48 @@
 """
 Script para traducir dataset_binario.csv (inglés) a español usando DeepL
+
+El progreso se anota en un diario SQLite (estado_traduccion.py): si el script se
+interrumpe, al volver a ejecutarlo solo se traducen las filas pendientes. El CSV
+se escribe una sola vez al final.
+
+Las peticiones se hacen con traductores.ClienteTraduccion: varios textos por petición,
+límite de tasa, concurrencia y reintentos con backoff. Con backend = 'falso' se
+ejecuta sin red, para pruebas y benchmarks.
 """
 import pandas as pd
 from tqdm import tqdm
 import time
-import deepl
 import os
+import sys
+
+# almacen_datos.py está en texto/, la carpeta superior (se ejecuta desde Dataset_traducidos)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from estado_traduccion import EstadoTraduccion
+from almacen_datos import leer_dataset, ruta_parquet
+from traductores import ClienteTraduccion, crear_traductor
 
 # Tu clave de API de DeepL
 DEEPL_AUTH_KEY = "0b88b"  # Reemplaza con tu clave
 
-translator = deepl.Translator(DEEPL_AUTH_KEY)
+backend = 'deepl'  # 'deepl' o 'falso' (traductor local sin red)
+peticiones_por_segundo = 5
+concurrencia = 4
+
+if backend == 'deepl':
+    translator = crear_traductor('deepl', auth_key=DEEPL_AUTH_KEY, target_lang='ES')
+else:
+    translator = crear_traductor(backend)
+cliente = ClienteTraduccion(translator, peticiones_por_segundo=peticiones_por_segundo, concurrencia=concurrencia)
 
 input_path = r'D:\1.CARRERA UNIVERSITARIA\9. DECIMO SEMESTRE\1.INGIENERIA SOFTWARE 1\3.PROYECTOS\PROYECTO-GRUPAL-SW1\Backend\texto\Dataset\Training_Essay_Data.csv'
 output_path = 'dataset_binario_español.csv'
 error_log_path = 'errores_traduccion.log'
+estado_path = 'dataset_binario_español.estado.sqlite'
+usar_parquet = False  # True: guarda el resultado en Parquet comprimido (almacen_datos.py)
+if usar_parquet:
+    output_path = ruta_parquet(output_path)
 
-df = pd.read_csv(input_path)
+df = leer_dataset(input_path)
 
 # Asegura que la columna 'text' sea tipo string y no vacía
 df['text'] = df['text'].astype(str)
@@ -24,24 +50,34 @@ df['text_es'] = ""  # Nueva columna para el texto traducido
 
 block_size = 1000  # Ajusta según tu preferencia
 
+# Filas pendientes según el diario (las que fallaron se vuelven a intentar)
+estado = EstadoTraduccion(estado_path)
+con_texto = df['text'][df['text'].str.strip() != ""]
+pendientes = estado.pendientes(con_texto, reintentar_errores=True)
+print(f"Filas pendientes de traducir: {len(pendientes)} de {len(df)}")
+
 start_time = time.time()
 
 with open(error_log_path, "a", encoding="utf-8") as error_log:
-    for i in range(0, len(df), block_size):
-        block_indices = list(range(i, min(i+block_size, len(df))))
-        for idx in block_indices:
-            source_text = str(df.loc[idx, 'text'])
-            # Solo traduce si el texto original no está vacío y aún no ha sido traducido
-            if source_text.strip() != "" and (df.loc[idx, 'text_es'] == "" or pd.isna(df.loc[idx, 'text_es'])):
-                try:
-                    result = translator.translate_text(source_text, target_lang="ES")
-                    df.loc[idx, 'text_es'] = result.text
-                except Exception as e:
-                    df.loc[idx, 'text_es'] = "ERROR"
-                    error_log.write(f"Fila {idx}: {e}\nTexto: {source_text}\n\n")
-        df.to_csv(output_path, index=False)
+    for i in range(0, len(pendientes), block_size):
+        bloque = []
+        block_indices = pendientes[i:i+block_size]
+        source_texts = [str(df.at[idx, 'text']) for idx in block_indices]
+        resultados = cliente.traducir_sync(source_texts)
+        for idx, source_text, result in zip(block_indices, source_texts, resultados):
+            if isinstance(result, Exception):
+                bloque.append((idx, source_text, "ERROR", True))
+                error_log.write(f"Fila {idx}: {result}\nTexto: {source_text}\n\n")
+            else:
+                bloque.append((idx, source_text, result, False))
+        # Guardar solo las filas del bloque en el diario
+        estado.registrar_lote(bloque)
         print(f"Bloque {i//block_size+1} traducido y guardado.")
 
+# Exportar el CSV final una sola vez
+estado.exportar(df, output_path)
+estado.cerrar()
+
 end_time = time.time()
 elapsed = end_time - start_time
 print(f'Traducción completa. Dataset guardado como {output_path}')
@@ -0,0 +1,312 @@
+"""
+Traductores intercambiables para los scripts de traducción del dataset
+
+Todos los proveedores (DeepL, Google vía deep_translator, la biblioteca translate y
+un traductor falso local) implementan la misma interfaz Traductor. ClienteTraduccion
+se encarga del resto con asyncio:
+
+- divide los textos largos por párrafos y oraciones según el límite del proveedor,
+- empaqueta varios textos en una sola petición si el proveedor lo permite,
+- limita la tasa de peticiones con un token bucket (LimitadorTasa),
+- reintenta con backoff exponencial y jitter,
+- y ejecuta hasta `concurrencia` peticiones a la vez.
+
+Con una MemoriaTraduccion (memoria_traduccion.py) los textos se traducen por
+oraciones o párrafos y solo se piden al proveedor los segmentos que no estén ya en
+la memoria, una vez cada uno aunque se repitan.
+
+El traductor 'falso' es determinista y no usa red: sirve para medir el rendimiento
+y probar la reanudación de los scripts sin gastar cuota de las APIs.
+"""
+import asyncio
+import hashlib
+import random
+import time
+from typing import List
+
+from memoria_traduccion import hash_segmento, segmentar
+
+
+class Traductor:
+    """Interfaz de un proveedor: traduce una lista de textos en una sola petición"""
+
+    nombre = 'base'
+    # Cuántos textos admite una petición, cuántos caracteres por texto y por petición
+    max_textos_por_peticion = 1
+    max_caracteres = 5000
+    max_caracteres_por_peticion = 5000
+
+    async def traducir_lote(self, textos: List[str]) -> List[str]:
+        raise NotImplementedError
+
+
+class TraductorDeepL(Traductor):
+    nombre = 'deepl'
+    max_textos_por_peticion = 50
+    max_caracteres = 5000
+    # El cuerpo de una petición de DeepL no puede pasar de 128 KiB
+    max_caracteres_por_peticion = 100000
+
+    def __init__(self, auth_key, source_lang=None, target_lang='ES'):
+        import deepl
+
+        self.cliente = deepl.Translator(auth_key)
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+
+    async def traducir_lote(self, textos):
+        resultados = await asyncio.to_thread(self.cliente.translate_text, textos,
+                                             source_lang=self.source_lang, target_lang=self.target_lang)
+        return [r.text for r in resultados]
+
+
+class TraductorGoogle(Traductor):
+    nombre = 'google'
+    max_caracteres = 5000
+
+    def __init__(self, source='en', target='es'):
+        from deep_translator import GoogleTranslator
+
+        self.cliente = GoogleTranslator(source=source, target=target)
+
+    async def traducir_lote(self, textos):
+        return [await asyncio.to_thread(self.cliente.translate, textos[0])]
+
+
+class TraductorTranslate(Traductor):
+    nombre = 'translate'
+    max_caracteres = 1000
+    max_caracteres_por_peticion = 1000
+
+    def __init__(self, from_lang='en', to_lang='es'):
+        from translate import Translator
+
+        self.cliente = Translator(to_lang=to_lang, from_lang=from_lang)
+
+    async def traducir_lote(self, textos):
+        return [await asyncio.to_thread(self.cliente.translate, textos[0])]
+
+
+class TraductorFalso(Traductor):
+    """Traductor local y determinista para pruebas y benchmarks sin red.
+
+    Devuelve '[es] <texto>'. latencia simula el tiempo de respuesta de cada petición
+    y tasa_fallos hace fallar el primer intento de una fracción fija de textos
+    (elegidos por hash), para ejercitar los reintentos.
+    """
+
+    nombre = 'falso'
+
+    def __init__(self, latencia=0.0, tasa_fallos=0.0, max_textos_por_peticion=50, max_caracteres=5000):
+        self.latencia = latencia
+        self.tasa_fallos = tasa_fallos
+        self.max_textos_por_peticion = max_textos_por_peticion
+        self.max_caracteres = max_caracteres
+        self.max_caracteres_por_peticion = max_caracteres * max_textos_por_peticion
+        self.peticiones = 0
+        self._ya_fallados = set()
+
+    def _debe_fallar(self, texto):
+        if not self.tasa_fallos:
+            return False
+        h = hashlib.sha1(texto.encode('utf-8')).hexdigest()
+        if int(h[:8], 16) / 0xFFFFFFFF >= self.tasa_fallos or h in self._ya_fallados:
+            return False
+        self._ya_fallados.add(h)
+        return True
+
+    async def traducir_lote(self, textos):
+        self.peticiones += 1
+        if self.latencia:
+            await asyncio.sleep(self.latencia)
+        if any([self._debe_fallar(t) for t in textos]):
+            raise ConnectionError('fallo simulado del traductor falso')
+        return [f'[es] {t}' for t in textos]
+
+
+TRADUCTORES = {
+    'deepl': TraductorDeepL,
+    'google': TraductorGoogle,
+    'translate': TraductorTranslate,
+    'falso': TraductorFalso,
+}
+
+
+def crear_traductor(nombre, **kwargs) -> Traductor:
+    try:
+        return TRADUCTORES[nombre](**kwargs)
+    except KeyError:
+        raise ValueError(f"Traductor desconocido: {nombre!r} (opciones: {', '.join(TRADUCTORES)})") from None
+
+
+class LimitadorTasa:
+    """Token bucket: como mucho `tasa` peticiones por segundo con ráfagas de `capacidad`"""
+
+    def __init__(self, tasa, capacidad=None):
+        self.tasa = tasa
+        self.capacidad = capacidad or max(1.0, tasa or 0)
+        self.tokens = self.capacidad
+        self.ultimo = time.monotonic()
+        self._lock = None
+        self._loop = None
+
+    async def adquirir(self):
+        if not self.tasa:
+            return
+        # Cada asyncio.run crea un bucle nuevo; el lock debe pertenecer al bucle actual
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        async with self._lock:
+            while True:
+                ahora = time.monotonic()
+                self.tokens = min(self.capacidad, self.tokens + (ahora - self.ultimo) * self.tasa)
+                self.ultimo = ahora
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.tasa)
+
+
+def dividir_texto(texto, max_caracteres):
+    """Divide un texto en párrafos y, si hace falta, en oraciones y trozos de max_caracteres.
+
+    Devuelve una lista de párrafos, cada uno como lista de piezas a traducir.
+    """
+    if len(texto) <= max_caracteres:
+        return [[texto.strip()]]
+    parrafos = []
+    for parrafo in texto.split('\n'):
+        parrafo = parrafo.strip()
+        if not parrafo:
+            continue
+        if len(parrafo) <= max_caracteres:
+            parrafos.append([parrafo])
+            continue
+        piezas = []
+        for oracion in (s.strip() + '.' for s in parrafo.split('.') if s.strip()):
+            piezas.extend(oracion[i:i + max_caracteres] for i in range(0, len(oracion), max_caracteres))
+        parrafos.append(piezas)
+    return parrafos
+
+
+class ClienteTraduccion:
+    """Traduce listas de textos con concurrencia, límite de tasa, reintentos y empaquetado"""
+
+    def __init__(self, traductor: Traductor, peticiones_por_segundo=None, rafaga=None, concurrencia=4,
+                 max_reintentos=5, espera_base=1.0, espera_max=60.0, memoria=None, granularidad=None):
+        self.traductor = traductor
+        self.memoria = memoria
+        # Por oraciones solo compensa si el proveedor empaqueta varios textos por petición
+        if granularidad is None:
+            granularidad = 'oracion' if traductor.max_textos_por_peticion > 1 else 'parrafo'
+        self.granularidad = granularidad
+        self.limitador = LimitadorTasa(peticiones_por_segundo, rafaga)
+        self.concurrencia = concurrencia
+        self.max_reintentos = max_reintentos
+        self.espera_base = espera_base
+        self.espera_max = espera_max
+        self.estadisticas = {'textos': 0, 'peticiones': 0, 'reintentos': 0, 'fallos': 0,
+                             'segmentos': 0, 'segmentos_en_memoria': 0}
+
+    def _espera(self, intento):
+        # Backoff exponencial con jitter para no reintentar todos a la vez
+        return min(self.espera_max, self.espera_base * 2 ** intento) * random.uniform(0.5, 1.0)
+
+    async def _peticion(self, piezas):
+        for intento in range(self.max_reintentos + 1):
+            await self.limitador.adquirir()
+            self.estadisticas['peticiones'] += 1
+            try:
+                traducciones = await self.traductor.traducir_lote(piezas)
+                if len(traducciones) != len(piezas):
+                    raise ValueError('el traductor devolvió un número distinto de textos')
+                return traducciones
+            except Exception:
+                if intento == self.max_reintentos:
+                    self.estadisticas['fallos'] += 1
+                    raise
+                self.estadisticas['reintentos'] += 1
+                await asyncio.sleep(self._espera(intento))
+
+    def _dividir(self, texto):
+        """Párrafos de texto como listas de piezas que respetan el límite del proveedor"""
+        if self.memoria is None:
+            return dividir_texto(texto, self.traductor.max_caracteres)
+        return [[pieza for segmento in parrafo
+                 for trozo in dividir_texto(segmento, self.traductor.max_caracteres) for pieza in trozo]
+                for parrafo in segmentar(texto, self.granularidad)]
+
+    def _empaquetar(self, piezas):
+        """Agrupa índices de piezas en peticiones según los límites del proveedor"""
+        grupos, actual, caracteres = [], [], 0
+        for i, pieza in enumerate(piezas):
+            if actual and (len(actual) >= self.traductor.max_textos_por_peticion
+                           or caracteres + len(pieza) > self.traductor.max_caracteres_por_peticion):
+                grupos.append(actual)
+                actual, caracteres = [], 0
+            actual.append(i)
+            caracteres += len(pieza)
+        if actual:
+            grupos.append(actual)
+        return grupos
+
+    async def traducir(self, textos: List[str]) -> List:
+        """Traduce cada texto; en la posición de un texto que no se pudo traducir va la excepción"""
+        estructura = []  # por texto: lista de párrafos con los índices de sus piezas
+        piezas = []
+        for texto in textos:
+            parrafos = []
+            for parrafo in (self._dividir(texto) if texto.strip() else []):
+                parrafos.append(list(range(len(piezas), len(piezas) + len(parrafo))))
+                piezas.extend(parrafo)
+            estructura.append(parrafos)
+
+        resultados = [None] * len(piezas)
+        # Piezas repetidas o ya traducidas: solo se pide la primera aparición de cada una
+        por_traducir = {}
+        if self.memoria is not None:
+            conocidas = self.memoria.buscar(piezas)
+            for i, pieza in enumerate(piezas):
+                h = hash_segmento(pieza)
+                if h in conocidas:
+                    resultados[i] = conocidas[h]
+                else:
+                    por_traducir.setdefault(h, []).append(i)
+            self.estadisticas['segmentos'] += len(piezas)
+            self.estadisticas['segmentos_en_memoria'] += len(piezas) - sum(map(len, por_traducir.values()))
+        else:
+            por_traducir = {i: [i] for i in range(len(piezas))}
+        unicas = [indices[0] for indices in por_traducir.values()]
+        semaforo = asyncio.Semaphore(self.concurrencia)
+
+        async def ejecutar(grupo):
+            async with semaforo:
+                try:
+                    traducciones = await self._peticion([piezas[i] for i in grupo])
+                except Exception as e:
+                    traducciones = [e] * len(grupo)
+            for i, traduccion in zip(grupo, traducciones):
+                resultados[i] = traduccion
+            if self.memoria is not None and not isinstance(traducciones[0], Exception):
+                self.memoria.guardar([(piezas[i], t) for i, t in zip(grupo, traducciones)])
+
+        grupos = self._empaquetar([piezas[i] for i in unicas])
+        await asyncio.gather(*(ejecutar([unicas[j] for j in grupo]) for grupo in grupos))
+        for indices in por_traducir.values():
+            for i in indices[1:]:
+                resultados[i] = resultados[indices[0]]
+
+        salida = []
+        for parrafos in estructura:
+            errores = [resultados[i] for p in parrafos for i in p if isinstance(resultados[i], Exception)]
+            if errores:
+                salida.append(errores[0])
+            else:
+                salida.append('\n'.join(' '.join(resultados[i] for i in p) for p in parrafos))
+        self.estadisticas['textos'] += len(textos)
+        return salida
+
+    def traducir_sync(self, textos: List[str]) -> List:
+        return asyncio.run(self.traducir(textos))
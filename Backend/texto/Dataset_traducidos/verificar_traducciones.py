@@ -1,101 +1,152 @@
 """
 Script para verificar y corregir el estado de las traducciones
+
+Uso:
+    python verificar_traducciones.py                  # idioma de todas las filas, un proceso por núcleo
+    python verificar_traducciones.py --muestra 50     # como antes: idioma de 1 de cada 50 filas
+    python verificar_traducciones.py --detector interno   # idioma.py (n-gramas con numpy) en vez de langdetect
+    python verificar_traducciones.py --parquet        # lee y guarda Parquet (almacen_datos.py)
+
+Las comprobaciones de vacíos, errores y traducciones sospechosas son operaciones
+vectorizadas sobre columnas; la detección de idioma se reparte entre procesos.
 """
+import argparse
+import os
+import sys
+import time
+from multiprocessing import Pool
+import numpy as np
 import pandas as pd
-import re
 from tqdm import tqdm
 import langdetect
 from langdetect.lang_detect_exception import LangDetectException
 
+# almacen_datos.py e idioma.py están en texto/, la carpeta superior (se ejecuta desde Dataset_traducidos)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import idioma
+from almacen_datos import COLUMNA_ESTADO, guardar_dataset, leer_dataset, ruta_parquet
+
 # Rutas
 input_path = r'D:\1.CARRERA UNIVERSITARIA\9. DECIMO SEMESTRE\1.INGIENERIA SOFTWARE 1\3.PROYECTOS\PROYECTO-GRUPAL-SW1\Backend\texto\dataset_binario_español.csv'
 output_path = 'dataset_para_completar.csv'
 
-# Cargar dataset
-print(f"Cargando dataset desde {input_path}...")
-df = pd.read_csv(input_path)
-total_rows = len(df)
-print(f"Total de filas: {total_rows}")
+# Si una traducción contiene 2 o más de estas palabras se considera sospechosa
+english_indicators = ['the', 'and', 'this', 'with', 'that', 'for', 'you', 'have']
 
 # Función para detectar idioma (con manejo de errores)
 def detect_language(text, default='unknown'):
     if not isinstance(text, str) or not text.strip():
         return default
-    
+
     try:
         return langdetect.detect(text[:1000])  # Usar solo los primeros 1000 caracteres
     except LangDetectException:
         return default
 
-# Iniciar análisis detallado
-print("\nAnalizando estado de las traducciones...")
-
-# Crear nuevas columnas para análisis
-df['es_vacio'] = df['text_es'].apply(lambda x: not isinstance(x, str) or not str(x).strip())
-df['tiene_error'] = df['text_es'].apply(lambda x: isinstance(x, str) and 'ERROR' in str(x))
-
-# Detectar idioma para una muestra de textos (para evitar que sea muy lento)
-print("\nDetectando idioma en una muestra de textos...")
-sample_indices = list(range(0, total_rows, 50))  # Analizar 1 de cada 50 filas
-df['idioma_detectado'] = 'no_analizado'
-
-for idx in tqdm(sample_indices):
-    if idx < len(df):
-        texto_es = str(df.loc[idx, 'text_es']).strip()
-        if texto_es:
-            df.loc[idx, 'idioma_detectado'] = detect_language(texto_es, default='desconocido')
-
-# Encontrar casos donde la traducción es sospechosa (mismas palabras en inglés)
-print("\nIdentificando traducciones sospechosas...")
-df['es_sospechoso'] = False
-
-for idx in tqdm(range(len(df))):
-    texto_original = str(df.loc[idx, 'text']).strip().lower()
-    texto_es = str(df.loc[idx, 'text_es']).strip().lower()
-    
-    if texto_es and len(texto_es) > 10:  # Solo verificar si hay contenido
-        # Verificar si hay palabras en inglés que solo deberían estar en español
-        english_indicators = ['the', 'and', 'this', 'with', 'that', 'for', 'you', 'have']
-        english_count = sum(1 for word in english_indicators if f" {word} " in f" {texto_es} ")
-        
-        # Si tiene más de 2 indicadores de inglés, marcar como sospechoso
-        if english_count >= 2:
-            df.loc[idx, 'es_sospechoso'] = True
-            
-        # Si el texto original y la traducción son idénticos, marcar como sospechoso
-        if texto_original == texto_es:
-            df.loc[idx, 'es_sospechoso'] = True
-
-# Estadísticas
-vacios = df['es_vacio'].sum()
-con_error = df['tiene_error'].sum()
-sospechosos = df['es_sospechoso'].sum()
-en_ingles = sum(1 for lang in df['idioma_detectado'] if lang == 'en')
-
-print("\n=== RESULTADOS DEL ANÁLISIS ===")
-print(f"Total de filas: {total_rows}")
-print(f"Traducciones vacías: {vacios}")
-print(f"Traducciones con error: {con_error}")
-print(f"Traducciones sospechosas: {sospechosos}")
-print(f"Muestra detectada en inglés: {en_ingles} de {len(sample_indices)} analizadas")
-
-# Marcar filas que necesitan revisión
-df['necesita_traduccion'] = df['es_vacio'] | df['tiene_error'] | df['es_sospechoso'] | (df['idioma_detectado'] == 'en')
-
-pendientes = df['necesita_traduccion'].sum()
-print(f"\nTotal de traducciones que necesitan revisión: {pendientes}")
-
-# Guardar resultados para completar traducción
-if pendientes > 0:
-    print(f"\nGuardando dataset con marcadores para completar traducción en {output_path}")
-    # Eliminar columnas temporales de análisis
-    df_final = df.drop(columns=['es_vacio', 'tiene_error', 'es_sospechoso', 'idioma_detectado', 'necesita_traduccion'])
-    # Marcar para retraducción (opcional, comentar si no quieres modificar el dataset)
-    indices_a_retraducir = df[df['necesita_traduccion']].index
-    for idx in indices_a_retraducir:
-        df_final.loc[idx, 'text_es'] = ""  # Vaciar para que se retraduzca
-    
-    df_final.to_csv(output_path, index=False)
-    print(f"Archivo guardado. Ejecuta el script de traducción nuevamente con este archivo.")
-else:
-    print("\nNo se encontraron traducciones pendientes según el análisis.")
\ No newline at end of file
+def _iniciar_proceso():
+    # Semilla fija: langdetect es aleatorio y así el informe es reproducible
+    langdetect.DetectorFactory.seed = 0
+
+def _detectar_desconocido(text):
+    return detect_language(text, default='desconocido')
+
+def detectar_idiomas(textos, workers, detector='langdetect', chunksize=64):
+    """Idioma de cada texto, repartido entre workers procesos (0 = en este proceso)"""
+    if detector == 'interno':
+        # Solo interesa distinguir español de inglés; por lotes para aprovechar numpy
+        return [idioma_texto for inicio in tqdm(range(0, len(textos), 5000))
+                for idioma_texto in idioma.detectar_idiomas(textos[inicio:inicio + 5000], candidatos=('es', 'en'))]
+    if workers <= 1:
+        _iniciar_proceso()
+        return [_detectar_desconocido(t) for t in tqdm(textos)]
+    with Pool(workers, initializer=_iniciar_proceso) as pool:
+        return list(tqdm(pool.imap(_detectar_desconocido, textos, chunksize=chunksize), total=len(textos)))
+
+def analizar(df, workers, muestra=1, detector='langdetect'):
+    """Añade a df las columnas de análisis; devuelve el número de filas de la muestra de idioma"""
+    es_texto = df['text_es'].map(type) == str
+    texto_es = df['text_es'].where(es_texto, '').astype(object)
+    df['es_vacio'] = texto_es.str.strip() == ''
+    df['tiene_error'] = texto_es.str.contains('ERROR', regex=False)
+
+    # Detectar idioma (de todas las filas, o de 1 de cada `muestra`)
+    print("\nDetectando idioma de las traducciones...")
+    df['idioma_detectado'] = 'no_analizado'
+    en_muestra = np.arange(len(df)) % muestra == 0
+    analizar_idioma = en_muestra & ~df['es_vacio']
+    textos = texto_es[analizar_idioma].str.strip().tolist()
+    df.loc[analizar_idioma, 'idioma_detectado'] = detectar_idiomas(textos, workers, detector)
+
+    # Encontrar casos donde la traducción es sospechosa (mismas palabras en inglés)
+    print("\nIdentificando traducciones sospechosas...")
+    original = df['text'].astype(object).map(str).str.strip().str.lower()
+    traduccion = df['text_es'].astype(object).map(str).str.strip().str.lower()
+    con_contenido = traduccion.str.len() > 10
+    rodeada = ' ' + traduccion + ' '
+    english_count = sum(rodeada.str.contains(f' {word} ', regex=False).astype(int) for word in english_indicators)
+    df['es_sospechoso'] = con_contenido & ((english_count >= 2) | (original == traduccion))
+    return int(en_muestra.sum())
+
+def main():
+    parser = argparse.ArgumentParser(description='Verifica las traducciones y marca las que hay que repetir')
+    parser.add_argument('--input', default=input_path, help='CSV con columnas text y text_es')
+    parser.add_argument('--output', default=output_path, help='CSV con las traducciones a repetir vaciadas')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='procesos para la detección de idioma (1 = sin multiproceso)')
+    parser.add_argument('--muestra', type=int, default=1,
+                        help='detectar el idioma de 1 de cada N filas (1 = todas)')
+    parser.add_argument('--detector', choices=['langdetect', 'interno'], default='langdetect',
+                        help='detector de idioma: langdetect o idioma.py (mucho más rápido, sin multiproceso)')
+    parser.add_argument('--parquet', action='store_true',
+                        help='usar la versión .parquet de --input/--output (comprimida y particionada)')
+    args = parser.parse_args()
+    if args.parquet:
+        args.input, args.output = ruta_parquet(args.input), ruta_parquet(args.output)
+
+    # Cargar dataset
+    print(f"Cargando dataset desde {args.input}...")
+    df = leer_dataset(args.input)
+    total_rows = len(df)
+    print(f"Total de filas: {total_rows}")
+
+    # Iniciar análisis detallado
+    print("\nAnalizando estado de las traducciones...")
+    inicio = time.perf_counter()
+    analizadas = analizar(df, args.workers, args.muestra, args.detector)
+
+    # Estadísticas
+    vacios = df['es_vacio'].sum()
+    con_error = df['tiene_error'].sum()
+    sospechosos = df['es_sospechoso'].sum()
+    en_ingles = (df['idioma_detectado'] == 'en').sum()
+
+    print("\n=== RESULTADOS DEL ANÁLISIS ===")
+    print(f"Total de filas: {total_rows}")
+    print(f"Traducciones vacías: {vacios}")
+    print(f"Traducciones con error: {con_error}")
+    print(f"Traducciones sospechosas: {sospechosos}")
+    print(f"Muestra detectada en inglés: {en_ingles} de {analizadas} analizadas")
+
+    # Marcar filas que necesitan revisión
+    df['necesita_traduccion'] = df['es_vacio'] | df['tiene_error'] | df['es_sospechoso'] | (df['idioma_detectado'] == 'en')
+
+    pendientes = df['necesita_traduccion'].sum()
+    print(f"\nTotal de traducciones que necesitan revisión: {pendientes}")
+    print(f"Análisis completado en {time.perf_counter() - inicio:.2f} segundos")
+
+    # Guardar resultados para completar traducción
+    if pendientes > 0:
+        print(f"\nGuardando dataset con marcadores para completar traducción en {args.output}")
+        # Eliminar columnas temporales de análisis
+        df_final = df.drop(columns=['es_vacio', 'tiene_error', 'es_sospechoso', 'idioma_detectado', 'necesita_traduccion'])
+        # Marcar para retraducción (opcional, comentar si no quieres modificar el dataset)
+        df_final['text_es'] = df_final['text_es'].astype(object)
+        df_final.loc[df['necesita_traduccion'], 'text_es'] = ""  # Vaciar para que se retraduzca
+
+        guardar_dataset(df_final, args.output, None if args.output.endswith('.csv') else ['label', COLUMNA_ESTADO])
+        print(f"Archivo guardado. Ejecuta el script de traducción nuevamente con este archivo.")
+    else:
+        print("\nNo se encontraron traducciones pendientes según el análisis.")
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,12 @@
 from django.contrib import admin
 
+from .models import PrediccionCache
+
 # Register your models here.
+
+
+@admin.register(PrediccionCache)
+class PrediccionCacheAdmin(admin.ModelAdmin):
+    list_display = ('clave', 'version_modelo', 'resultado', 'creado')
+    list_filter = ('version_modelo',)
+    readonly_fields = ('clave', 'version_modelo', 'resultado', 'creado')
@@ -0,0 +1,66 @@
+"""
+Control de admisión para las vistas asíncronas de inferencia
+
+Las llamadas al modelo se ejecutan en un pool de hilos acotado, así el bucle de
+eventos de ASGI nunca se bloquea en una pasada del modelo. Si ya hay max_en_curso
+peticiones en cola o en el modelo, las nuevas se rechazan al momento (la vista
+responde 429 con Retry-After) en lugar de alargar la cola y la latencia de todas.
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ServidorSaturado(Exception):
+    """No se admiten más peticiones: se ha llegado a max_en_curso"""
+
+    def __init__(self, retry_after):
+        super().__init__(f'Demasiadas peticiones en curso, reintentar en {retry_after} s')
+        self.retry_after = retry_after
+
+
+class ControlAdmision:
+    """Pool de hilos para el modelo con un límite de peticiones en curso"""
+
+    def __init__(self, max_en_curso: int = 64, max_workers: int = 16, retry_after: int = 1):
+        if max_en_curso < 1 or max_workers < 1:
+            raise ValueError('max_en_curso y max_workers deben ser al menos 1')
+        self.max_en_curso = max_en_curso
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='texto-inferencia')
+        self._en_curso = 0
+        self._rechazadas = 0
+        self._lock = threading.Lock()
+
+    def _admitir(self):
+        with self._lock:
+            if self._en_curso >= self.max_en_curso:
+                self._rechazadas += 1
+                raise ServidorSaturado(self.retry_after)
+            self._en_curso += 1
+
+    def _liberar(self, futuro=None):
+        with self._lock:
+            self._en_curso -= 1
+
+    async def ejecutar(self, funcion, *args, **kwargs):
+        """Ejecuta funcion(*args, **kwargs) en el pool sin bloquear el bucle de eventos.
+
+        Lanza ServidorSaturado si no se admite. La plaza se libera cuando termina la
+        llamada, no cuando se cancela la espera (p. ej. si el cliente se desconecta):
+        así el límite cuenta todo el trabajo que sigue ocupando el modelo.
+        """
+        self._admitir()
+        try:
+            futuro = self._executor.submit(functools.partial(funcion, *args, **kwargs))
+        except BaseException:
+            self._liberar()
+            raise
+        futuro.add_done_callback(self._liberar)
+        return await asyncio.wrap_future(futuro)
+
+    def estadisticas(self):
+        with self._lock:
+            return {'en_curso': self._en_curso, 'max_en_curso': self.max_en_curso,
+                    'rechazadas': self._rechazadas}
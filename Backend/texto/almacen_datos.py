@@ -0,0 +1,260 @@
+"""
+Almacén de datasets en Parquet (o CSV) compartido por los scripts de texto/
+
+El formato se decide por la ruta: '.csv' se lee y escribe como siempre; cualquier
+otra ruta (p. ej. 'dataset_binario.parquet') es Parquet comprimido con zstd. Con
+particiones, la ruta es una carpeta con subcarpetas Hive por columna:
+
+    dataset.parquet/label=human/estado_traduccion=traducida/part-0.parquet
+
+En Parquet se pueden leer solo algunas columnas (columnas=['label', 'text_es']) y
+solo algunas particiones (filtros=[('estado_traduccion', '=', 'pendiente')]) sin
+tocar el resto del archivo. Para conservar el orden de las filas entre particiones
+se guarda una columna interna __fila.
+"""
+import json
+import os
+import shutil
+
+import pandas as pd
+
+COLUMNA_ORDEN = '__fila'
+COLUMNA_ESTADO = 'estado_traduccion'
+COMPRESION = 'zstd'
+
+
+def es_csv(ruta):
+    return str(ruta).lower().endswith('.csv')
+
+
+def ruta_parquet(ruta):
+    """Cambia la extensión .csv de ruta por .parquet (para los flags --parquet)"""
+    return os.path.splitext(ruta)[0] + '.parquet' if es_csv(ruta) else ruta
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise ImportError('Para leer o escribir Parquet instala pyarrow (pip install pyarrow)') from None
+    return pyarrow
+
+
+def estado_traduccion(text_es):
+    """'pendiente', 'error' o 'traducida' según el contenido de la columna text_es"""
+    texto = text_es.astype(object).where(text_es.map(type) == str, '').str.strip()
+    estado = pd.Series('traducida', index=text_es.index, dtype=object)
+    estado[texto.str.startswith('ERROR')] = 'error'
+    estado[texto == ''] = 'pendiente'
+    return estado
+
+
+def _restaurar_tipos(df, particiones):
+    # Las columnas de partición vuelven como categorías: se recupera su tipo original
+    for columna in particiones:
+        if columna in df.columns and isinstance(df[columna].dtype, pd.CategoricalDtype):
+            df[columna] = df[columna].astype(df[columna].cat.categories.dtype)
+    return df
+
+
+def _filtrar(df, filtros):
+    # Mismo formato que los filtros de pyarrow, para los CSV: [(columna, op, valor), ...]
+    operaciones = {'=': pd.Series.eq, '==': pd.Series.eq, '!=': pd.Series.ne,
+                   'in': pd.Series.isin, 'not in': lambda s, v: ~s.isin(v)}
+    mascara = pd.Series(True, index=df.index)
+    for columna, op, valor in filtros:
+        serie = estado_traduccion(df['text_es']) if columna == COLUMNA_ESTADO and columna not in df else df[columna]
+        mascara &= operaciones[op](serie, valor)
+    return df[mascara]
+
+
+def leer_dataset(ruta, columnas=None, filtros=None):
+    """Lee un dataset CSV o Parquet, opcionalmente solo algunas columnas y filas.
+
+    Las filas salen en el orden en que se escribieron. La columna estado_traduccion
+    solo se devuelve si se pide en columnas.
+    """
+    if es_csv(ruta):
+        usecols = None
+        if columnas is not None:
+            # En CSV estado_traduccion se calcula a partir de text_es
+            usecols = list(columnas) + [c for c, _, _ in filtros or []]
+            usecols = list(dict.fromkeys('text_es' if c == COLUMNA_ESTADO else c for c in usecols))
+        df = pd.read_csv(ruta, usecols=usecols)
+        if filtros:
+            df = _filtrar(df, filtros).reset_index(drop=True)
+        if columnas is not None:
+            if COLUMNA_ESTADO in columnas:
+                df[COLUMNA_ESTADO] = estado_traduccion(df['text_es'])
+            df = df[list(columnas)]
+        return df
+
+    pa = _pyarrow()
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(ruta, format='parquet', partitioning='hive')
+    nombres = dataset.schema.names
+    leer = None
+    if columnas is not None:
+        leer = list(columnas) + ([COLUMNA_ORDEN] if COLUMNA_ORDEN in nombres else [])
+    filtro = pa.parquet.filters_to_expression(filtros) if filtros else None
+    df = dataset.to_table(columns=leer, filter=filtro).to_pandas()
+    if COLUMNA_ORDEN in df.columns:
+        df = df.sort_values(COLUMNA_ORDEN, kind='stable').drop(columns=COLUMNA_ORDEN).reset_index(drop=True)
+    if columnas is None:
+        metadatos = dataset.schema.metadata or {}
+        orden = json.loads(metadatos[b'columnas']) if b'columnas' in metadatos else list(df.columns)
+        df = df[[c for c in orden if c in df.columns]]
+    return _restaurar_tipos(df, nombres)
+
+
+def iterar_dataset(ruta, columnas=None, chunk_rows=20000, filtros=None, dtype=None):
+    """Devuelve el dataset por bloques de como mucho chunk_rows filas (memoria acotada).
+
+    dtype solo se aplica a los CSV (Parquet ya guarda el tipo de cada columna). Para
+    Parquet particionado los bloques salen partición a partición, no en el orden
+    original de las filas.
+    """
+    if es_csv(ruta):
+        for bloque in pd.read_csv(ruta, usecols=columnas, chunksize=chunk_rows, dtype=dtype):
+            yield _filtrar(bloque, filtros) if filtros else bloque
+        return
+
+    pa = _pyarrow()
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(ruta, format='parquet', partitioning='hive')
+    if columnas is None:
+        metadatos = dataset.schema.metadata or {}
+        columnas = (json.loads(metadatos[b'columnas']) if b'columnas' in metadatos else
+                    [c for c in dataset.schema.names if c not in (COLUMNA_ORDEN, COLUMNA_ESTADO)])
+    filtro = pa.parquet.filters_to_expression(filtros) if filtros else None
+    for lote in dataset.to_batches(columns=list(columnas), filter=filtro, batch_size=chunk_rows):
+        if lote.num_rows:
+            yield _restaurar_tipos(lote.to_pandas(), dataset.schema.names)
+
+
+class EscritorDataset:
+    """Escribe un dataset bloque a bloque en CSV o Parquet, con particiones opcionales.
+
+    En Parquet cada partición tiene su propio ParquetWriter y cada bloque es un
+    grupo de filas, así que la memoria usada no depende del tamaño del dataset.
+    Si se particiona por estado_traduccion y el bloque no tiene esa columna, se
+    calcula a partir de text_es; las columnas de partición que no estén en el
+    primer bloque se ignoran.
+    """
+
+    def __init__(self, ruta, particiones=None, compresion=COMPRESION):
+        self.ruta = ruta
+        self.particiones = list(particiones or [])
+        self.compresion = compresion
+        self.filas = 0
+        self._escritores = {}
+        self._esquema = None
+        self._csv = None
+        if not es_csv(ruta):
+            _pyarrow()
+            self._temporal = ruta.rstrip('/\\') + '.tmp'
+            if os.path.isdir(self._temporal):
+                shutil.rmtree(self._temporal)
+            elif os.path.exists(self._temporal):
+                os.remove(self._temporal)
+
+    def escribir(self, bloque):
+        if es_csv(self.ruta):
+            if self._csv is None:
+                self._csv = open(self.ruta, 'w', encoding='utf-8', newline='')
+                bloque.head(0).to_csv(self._csv, index=False)
+            bloque.to_csv(self._csv, index=False, header=False)
+            self.filas += len(bloque)
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        bloque = bloque.reset_index(drop=True)
+        if self._esquema is None:
+            self.particiones = [c for c in self.particiones if c in bloque.columns
+                                or (c == COLUMNA_ESTADO and 'text_es' in bloque.columns)]
+            if self.particiones:
+                os.makedirs(self._temporal)
+        if COLUMNA_ESTADO in self.particiones and COLUMNA_ESTADO not in bloque.columns:
+            bloque[COLUMNA_ESTADO] = estado_traduccion(bloque['text_es'])
+        if self.particiones:
+            bloque[COLUMNA_ORDEN] = range(self.filas, self.filas + len(bloque))
+        self.filas += len(bloque)
+
+        datos = bloque.drop(columns=self.particiones)
+        if self._esquema is None:
+            # Columnas sin ningún valor en el primer bloque: se guardan como texto
+            esquema = pa.Schema.from_pandas(datos, preserve_index=False)
+            esquema = pa.schema([pa.field(c.name, pa.string()) if pa.types.is_null(c.type) else c
+                                 for c in esquema], metadata=esquema.metadata)
+            # Orden original de las columnas, para colocar las de partición al leer
+            columnas = [c for c in bloque.columns if c not in (COLUMNA_ORDEN, COLUMNA_ESTADO)]
+            self._esquema = esquema.with_metadata({**(esquema.metadata or {}),
+                                                   b'columnas': json.dumps(columnas).encode('utf-8')})
+        if not self.particiones:
+            grupos = [((), datos)]
+        elif len(bloque):
+            grupos = list(datos.groupby([bloque[c] for c in self.particiones], sort=False))
+        else:
+            grupos = []
+        for clave, grupo in grupos:
+            clave = clave if isinstance(clave, tuple) else (clave,)
+            if clave not in self._escritores:
+                carpeta = os.path.join(self._temporal, *(f'{c}={v}' for c, v in zip(self.particiones, clave)))
+                if self.particiones:
+                    os.makedirs(carpeta, exist_ok=True)
+                destino = os.path.join(carpeta, 'part-0.parquet') if self.particiones else self._temporal
+                self._escritores[clave] = pq.ParquetWriter(destino, self._esquema, compression=self.compresion)
+            tabla = pa.Table.from_pandas(grupo, schema=self._esquema, preserve_index=False)
+            self._escritores[clave].write_table(tabla)
+
+    def cerrar(self):
+        if es_csv(self.ruta):
+            if self._csv is None:
+                open(self.ruta, 'w', encoding='utf-8').close()
+            else:
+                self._csv.close()
+            return
+        if not self.particiones and not self._escritores and self._esquema is not None:
+            import pyarrow.parquet as pq
+            # Dataset vacío: se escribe un archivo con el esquema y sin filas
+            pq.ParquetWriter(self._temporal, self._esquema, compression=self.compresion).close()
+        for escritor in self._escritores.values():
+            escritor.close()
+        if os.path.isdir(self.ruta):
+            shutil.rmtree(self.ruta)
+        elif self.particiones and os.path.exists(self.ruta):
+            os.remove(self.ruta)
+        if os.path.exists(self._temporal):
+            os.replace(self._temporal, self.ruta)
+
+    def abortar(self):
+        """Cierra sin publicar nada: el dataset anterior en ruta queda intacto"""
+        if self._csv is not None:
+            self._csv.close()
+        for escritor in self._escritores.values():
+            escritor.close()
+        if not es_csv(self.ruta):
+            if os.path.isdir(self._temporal):
+                shutil.rmtree(self._temporal)
+            elif os.path.exists(self._temporal):
+                os.remove(self._temporal)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, *exc):
+        if tipo is None:
+            self.cerrar()
+        else:
+            self.abortar()
+
+
+def guardar_dataset(df, ruta, particiones=None, compresion=COMPRESION):
+    """Guarda df completo en CSV o Parquet (particionado por las columnas de particiones)"""
+    with EscritorDataset(ruta, particiones, compresion) as escritor:
+        escritor.escribir(df)
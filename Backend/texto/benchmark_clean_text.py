@@ -0,0 +1,54 @@
+"""
+Micro-benchmark: clean_text aplicado uno a uno vs clean_texts vectorizado
+
+Uso:
+    python benchmark_clean_text.py --n 100000 --workers 4
+"""
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from preprocesamiento import clean_text, clean_texts
+
+PALABRAS = ['the', 'essay', 'students', 'should', 'car', 'Venus', 'however', 'because',
+            'también', 'educación', 'niños', 'pingüino', 'año', 'however,', '"quoted"',
+            'e-mail', '2023', 'It\'s', 'ÁRBOL', 'well-being', '(1)', 'ok!', '\tTab', 'línea\n']
+
+
+def ensayos_sinteticos(n, palabras_por_ensayo=300, semilla=42):
+    """Genera n ensayos sintéticos con mayúsculas, signos, números y acentos"""
+    rng = random.Random(semilla)
+    return [' '.join(rng.choices(PALABRAS, k=palabras_por_ensayo)) for _ in range(n)]
+
+
+def medir(funcion, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = funcion(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara clean_text y clean_texts')
+    parser.add_argument('--n', type=int, default=100000, help='número de ensayos sintéticos')
+    parser.add_argument('--workers', type=int, default=4, help='procesos para el modo multiproceso')
+    args = parser.parse_args()
+
+    serie = pd.Series(ensayos_sinteticos(args.n), dtype=object)
+    print(f'{args.n} ensayos sintéticos generados')
+
+    referencia, t_uno_a_uno = medir(lambda: [clean_text(t) for t in serie])
+    vectorizado, t_vectorizado = medir(clean_texts, serie)
+    multiproceso, t_multiproceso = medir(clean_texts, serie, workers=args.workers)
+
+    assert vectorizado.tolist() == referencia, 'clean_texts no coincide con clean_text'
+    assert multiproceso.tolist() == referencia, 'clean_texts (multiproceso) no coincide con clean_text'
+
+    print(f'clean_text uno a uno:       {t_uno_a_uno:.2f} s')
+    print(f'clean_texts vectorizado:    {t_vectorizado:.2f} s ({t_uno_a_uno / t_vectorizado:.2f}x)')
+    print(f'clean_texts {args.workers} procesos:    {t_multiproceso:.2f} s ({t_uno_a_uno / t_multiproceso:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
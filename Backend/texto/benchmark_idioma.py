@@ -0,0 +1,68 @@
+"""
+Benchmark: idioma.py frente a langdetect en velocidad y coincidencia
+
+Usa los textos en inglés (columna text) y sus traducciones (columna text_es) del
+dataset traducido, así que también mide el acierto esperado: 'en' y 'es'.
+
+Uso:
+    python benchmark_idioma.py --csv Dataset_traducidos/dataset_binario_español.csv --n 2000
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from idioma import IdentificadorIdioma
+
+dataset_path = 'Dataset_traducidos/dataset_binario_español.csv'
+
+
+def medir(funcion, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = funcion(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+
+def con_langdetect(textos):
+    import langdetect
+    from langdetect.lang_detect_exception import LangDetectException
+
+    langdetect.DetectorFactory.seed = 0
+    resultado = []
+    for texto in textos:
+        try:
+            resultado.append(langdetect.detect(texto[:1000]))
+        except LangDetectException:
+            resultado.append('desconocido')
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara idioma.py con langdetect')
+    parser.add_argument('--csv', default=dataset_path, help='CSV con columnas text y text_es')
+    parser.add_argument('--n', type=int, default=2000, help='filas a usar (de cada columna)')
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv).dropna(subset=['text', 'text_es']).head(args.n)
+    textos = df['text'].astype(str).tolist() + df['text_es'].astype(str).tolist()
+    esperado = ['en'] * len(df) + ['es'] * len(df)
+    print(f'{len(textos)} textos ({len(df)} en inglés y {len(df)} en español)')
+
+    identificador, t_carga = medir(IdentificadorIdioma)
+    interno, t_interno = medir(identificador.detectar_lote, textos)
+    solo_es_en, t_es_en = medir(identificador.detectar_lote, textos, candidatos=('es', 'en'))
+    referencia, t_langdetect = medir(con_langdetect, textos)
+
+    def acierto(resultado):
+        return sum(r == e for r, e in zip(resultado, esperado)) / len(textos)
+
+    coincidencia = sum(a == b for a, b in zip(interno, referencia)) / len(textos)
+    print(f'langdetect:  {t_langdetect:.2f} s ({len(textos) / t_langdetect:.0f} textos/s), acierto {acierto(referencia):.2%}')
+    print(f'idioma.py:   {t_interno:.2f} s ({len(textos) / t_interno:.0f} textos/s), acierto {acierto(interno):.2%} '
+          f'(carga de perfiles {t_carga * 1000:.1f} ms)')
+    print(f'idioma.py (solo es/en): {t_es_en:.2f} s, acierto {acierto(solo_es_en):.2%}')
+    print(f'Aceleración: {t_langdetect / t_interno:.1f}x, coincidencia con langdetect: {coincidencia:.2%}')
+
+
+if __name__ == '__main__':
+    main()
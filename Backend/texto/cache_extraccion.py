@@ -0,0 +1,91 @@
+"""
+Caché en disco del texto extraído de PDF/DOCX/TXT, direccionada por contenido.
+
+La clave es el hash SHA-256 del archivo más la versión del extractor, así que
+renombrar o mover un archivo no invalida su entrada y cambiar el extractor sí.
+Cada entrada guarda el texto extraído y el texto después de clean_text.
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+
+
+def hash_archivo(file_path, tam_bloque=1024 * 1024):
+    """SHA-256 del contenido del archivo, leído por bloques"""
+    h = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for bloque in iter(lambda: f.read(tam_bloque), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+class CacheExtraccion:
+    """Entradas gzip+JSON en <directorio>/<2 primeros caracteres>/<clave>.json.gz
+
+    Es segura entre procesos: cada escritura va a un temporal y se renombra.
+    Al leer una entrada se actualiza su mtime, que es el orden de desalojo.
+    """
+
+    def __init__(self, directorio, version_extractor, max_bytes=2 * 1024 ** 3):
+        self.directorio = directorio
+        self.version_extractor = str(version_extractor)
+        self.max_bytes = max_bytes
+
+    def clave(self, file_path):
+        return f'{hash_archivo(file_path)}-v{self.version_extractor}'
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, clave[:2], f'{clave}.json.gz')
+
+    def obtener(self, clave):
+        """Devuelve {'texto', 'texto_limpio'} o None si no está en caché"""
+        ruta = self._ruta(clave)
+        try:
+            with gzip.open(ruta, 'rt', encoding='utf-8') as f:
+                entrada = json.load(f)
+            os.utime(ruta)
+        except (OSError, ValueError):
+            return None
+        return entrada
+
+    def guardar(self, clave, texto, texto_limpio):
+        ruta = self._ruta(clave)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        fd, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as crudo, gzip.open(crudo, 'wt', encoding='utf-8') as f:
+                json.dump({'texto': texto, 'texto_limpio': texto_limpio}, f, ensure_ascii=False)
+            os.replace(temporal, ruta)
+        except BaseException:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+
+    def desalojar(self):
+        """Borra las entradas usadas hace más tiempo hasta quedar bajo max_bytes"""
+        entradas = []
+        total = 0
+        for raiz, _, archivos in os.walk(self.directorio):
+            for nombre in archivos:
+                if not nombre.endswith('.json.gz'):
+                    continue
+                ruta = os.path.join(raiz, nombre)
+                try:
+                    stat = os.stat(ruta)
+                except OSError:
+                    continue
+                entradas.append((stat.st_mtime, stat.st_size, ruta))
+                total += stat.st_size
+        borradas = 0
+        for _, tam, ruta in sorted(entradas):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(ruta)
+            except OSError:
+                continue
+            total -= tam
+            borradas += 1
+        return borradas
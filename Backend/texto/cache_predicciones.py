@@ -0,0 +1,107 @@
+"""
+Caché de predicciones en dos niveles para la API de texto
+
+1. LRU en memoria del proceso (OrderedDict), sin coste de base de datos.
+2. Tabla PrediccionCache (models.py), compartida entre procesos y reinicios.
+
+La clave es el hash del texto ya normalizado con clean_text más la versión del
+modelo (Predictor.version, calculada a partir de los archivos de modelo_binario
+al cargarlo): si se reentrena el
+modelo, la versión cambia y las entradas anteriores dejan de usarse (y se borran
+de la tabla al cargar el nuevo modelo).
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable
+
+from django.db import DatabaseError
+
+
+def clave_prediccion(texto_limpio: str, version: str) -> str:
+    return hashlib.sha256(f'{version}\0{texto_limpio}'.encode('utf-8')).hexdigest()
+
+
+class CachePredicciones:
+    """LRU en memoria delante de la tabla PrediccionCache, con contadores de aciertos"""
+
+    def __init__(self, version: str, max_entradas: int = 10000, persistente: bool = True):
+        self.version = version
+        self.max_entradas = max_entradas
+        self.persistente = persistente
+        self._memoria = OrderedDict()
+        self._lock = threading.Lock()
+        self._contadores = {'aciertos_memoria': 0, 'aciertos_bd': 0, 'fallos': 0}
+
+    def clave(self, texto_limpio: str) -> str:
+        return clave_prediccion(texto_limpio, self.version)
+
+    def _guardar_memoria(self, clave, resultado):
+        # Se llama con self._lock adquirido
+        self._memoria[clave] = resultado
+        self._memoria.move_to_end(clave)
+        while len(self._memoria) > self.max_entradas:
+            self._memoria.popitem(last=False)
+
+    def obtener(self, claves: Iterable[str]) -> Dict[str, Dict]:
+        """Devuelve {clave: resultado} de las claves en caché (primero memoria, luego tabla)"""
+        claves = list(dict.fromkeys(claves))
+        encontrados = {}
+        with self._lock:
+            for clave in claves:
+                if clave in self._memoria:
+                    self._memoria.move_to_end(clave)
+                    encontrados[clave] = self._memoria[clave]
+            self._contadores['aciertos_memoria'] += len(encontrados)
+
+        faltan = [c for c in claves if c not in encontrados]
+        if faltan and self.persistente:
+            from .models import PrediccionCache
+
+            try:
+                en_bd = dict(PrediccionCache.objects.filter(clave__in=faltan).values_list('clave', 'resultado'))
+            except DatabaseError:
+                # Sin tabla (migrate pendiente) o base de datos no disponible: solo memoria
+                en_bd = {}
+            with self._lock:
+                for clave, resultado in en_bd.items():
+                    self._guardar_memoria(clave, resultado)
+                self._contadores['aciertos_bd'] += len(en_bd)
+            encontrados.update(en_bd)
+
+        with self._lock:
+            self._contadores['fallos'] += len(claves) - len(encontrados)
+        return encontrados
+
+    def guardar(self, resultados: Dict[str, Dict]):
+        with self._lock:
+            for clave, resultado in resultados.items():
+                self._guardar_memoria(clave, resultado)
+        if resultados and self.persistente:
+            from .models import PrediccionCache
+
+            try:
+                PrediccionCache.objects.bulk_create(
+                    [PrediccionCache(clave=c, version_modelo=self.version, resultado=r) for c, r in resultados.items()],
+                    ignore_conflicts=True)
+            except DatabaseError:
+                pass
+
+    def purgar_otras_versiones(self) -> int:
+        """Borra de la tabla las predicciones de versiones anteriores del modelo"""
+        if not self.persistente:
+            return 0
+        from .models import PrediccionCache
+
+        try:
+            borradas, _ = PrediccionCache.objects.exclude(version_modelo=self.version).delete()
+        except DatabaseError:
+            return 0
+        return borradas
+
+    def estadisticas(self) -> Dict:
+        with self._lock:
+            estadisticas = dict(self._contadores, entradas_memoria=len(self._memoria), version_modelo=self.version)
+        consultas = estadisticas['aciertos_memoria'] + estadisticas['aciertos_bd'] + estadisticas['fallos']
+        estadisticas['tasa_aciertos'] = round((consultas - estadisticas['fallos']) / consultas, 4) if consultas else 0.0
+        return estadisticas
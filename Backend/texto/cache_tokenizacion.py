@@ -0,0 +1,90 @@
+"""
+Caché de tokenización para entrenamiento_modelo.py
+
+El corpus se tokeniza una sola vez, por lotes y con el tokenizador rápido, y se
+guarda como arrays de numpy mapeados en memoria:
+
+    <directorio>/<clave>/input_ids.npy       (n, max_length) uint16/int32
+    <directorio>/<clave>/attention_mask.npy  (n, max_length) int8
+    <directorio>/<clave>/lengths.npy         (n,) int32, tokens reales por fila
+    <directorio>/<clave>/meta.json
+
+La clave depende del contenido de los textos, del tokenizador y de max_length, así
+que volver a entrenar o cambiar hiperparámetros reutiliza la caché.
+"""
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+
+def hash_textos(textos):
+    h = hashlib.sha256()
+    for texto in textos:
+        h.update(str(texto).encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+def clave_cache(textos, tokenizer, max_length):
+    h = hashlib.sha256()
+    h.update(hash_textos(textos).encode())
+    h.update(type(tokenizer).__name__.encode())
+    h.update(str(tokenizer.name_or_path).encode())
+    h.update(str(len(tokenizer)).encode())
+    h.update(str(max_length).encode())
+    return h.hexdigest()[:32]
+
+
+class CorpusTokenizado:
+    """Vista de solo lectura sobre los arrays mapeados en memoria de una entrada"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.input_ids = np.load(os.path.join(ruta, 'input_ids.npy'), mmap_mode='r')
+        self.attention_mask = np.load(os.path.join(ruta, 'attention_mask.npy'), mmap_mode='r')
+        self.lengths = np.load(os.path.join(ruta, 'lengths.npy'), mmap_mode='r')
+
+    def __len__(self):
+        return len(self.lengths)
+
+
+def tokenizar_con_cache(textos, tokenizer, directorio, max_length=256, batch_size=1000):
+    """Devuelve el CorpusTokenizado de textos, tokenizándolos solo si no está en caché"""
+    textos = [str(t) for t in textos]
+    ruta = os.path.join(directorio, clave_cache(textos, tokenizer, max_length))
+    if os.path.exists(os.path.join(ruta, 'meta.json')):
+        print(f'Tokenización encontrada en caché: {ruta}')
+        return CorpusTokenizado(ruta)
+
+    print(f'Tokenizando {len(textos)} textos (se guardará en {ruta})...')
+    temporal = ruta + '.tmp'
+    shutil.rmtree(temporal, ignore_errors=True)
+    os.makedirs(temporal)
+    n = len(textos)
+    dtype_ids = np.uint16 if len(tokenizer) <= np.iinfo(np.uint16).max + 1 else np.int32
+    input_ids = np.lib.format.open_memmap(os.path.join(temporal, 'input_ids.npy'), mode='w+',
+                                          dtype=dtype_ids, shape=(n, max_length))
+    attention_mask = np.lib.format.open_memmap(os.path.join(temporal, 'attention_mask.npy'), mode='w+',
+                                               dtype=np.int8, shape=(n, max_length))
+    lengths = np.lib.format.open_memmap(os.path.join(temporal, 'lengths.npy'), mode='w+',
+                                        dtype=np.int32, shape=(n,))
+    for inicio in range(0, n, batch_size):
+        lote = textos[inicio:inicio + batch_size]
+        encodings = tokenizer(lote, truncation=True, max_length=max_length,
+                              padding='max_length', return_tensors='np')
+        fin = inicio + len(lote)
+        input_ids[inicio:fin] = encodings['input_ids']
+        attention_mask[inicio:fin] = encodings['attention_mask']
+        lengths[inicio:fin] = encodings['attention_mask'].sum(axis=1)
+    for array in (input_ids, attention_mask, lengths):
+        array.flush()
+    del input_ids, attention_mask, lengths
+
+    with open(os.path.join(temporal, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({'n': n, 'max_length': max_length, 'tokenizer': str(tokenizer.name_or_path)}, f)
+    shutil.rmtree(ruta, ignore_errors=True)
+    os.replace(temporal, ruta)
+    return CorpusTokenizado(ruta)
@@ -0,0 +1,291 @@
+"""
+Características estilométricas del Paso 3 (Documentacion/README.md), calculadas por lotes
+
+- Estadísticas del texto: número de palabras y oraciones, longitud media de palabra
+  y de oración, desviación de la longitud de oración, burstiness, diversidad léxica
+  (TTR) y frecuencia de palabras funcionales. Los textos del lote se tokenizan con
+  una expresión regular y todo lo demás son operaciones de numpy sobre el corpus
+  concatenado, sin bucles por palabra.
+- Perplejidad con un modelo de lenguaje causal pequeño (carpeta configurable), en
+  lotes ordenados por longitud y rellenados solo hasta el más largo del lote.
+
+MotorCaracteristicas guarda el resultado de cada texto en una caché SQLite por hash
+del texto, así que el entrenamiento y la API (POST /api/v1/text-features) solo
+calculan una vez cada texto.
+
+Uso:
+    python caracteristicas.py --dataset dataset_binario.csv --output caracteristicas.csv \\
+        --modelo-perplejidad ./modelo_perplejidad
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Configuración
+dataset_path = 'dataset_binario.csv'
+output_path = 'caracteristicas.csv'
+cache_path = 'caracteristicas.sqlite'
+
+# Incrementar si cambia el cálculo: invalida las entradas de la caché
+VERSION_CARACTERISTICAS = 1
+
+# Palabras y signos de fin de oración; los números no cuentan como palabras
+_TOKEN = re.compile(r'[^\W\d_]+|[.!?…]+')
+
+PALABRAS_FUNCIONALES = frozenset(
+    'el la los las un una unos unas lo al del de que y e o u en a por para con sin sobre entre '
+    'se su sus mi mis tu tus no ni pero como más muy ya si es son fue ser ha han hay le les me te nos '
+    'the of and to in a is that for it as with on be by this are or was an'.split()
+)
+
+COLUMNAS_ESTADISTICAS = [
+    'n_palabras', 'n_oraciones', 'longitud_media_palabra', 'longitud_media_oracion',
+    'desviacion_longitud_oracion', 'burstiness', 'ttr', 'frecuencia_funcionales',
+]
+
+
+def hash_texto(texto):
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()
+
+
+def estadisticas_texto(textos):
+    """DataFrame con COLUMNAS_ESTADISTICAS para cada texto (NaN si no tiene palabras).
+
+    burstiness es (σ - μ) / (σ + μ) de las longitudes de oración: -1 si todas miden
+    lo mismo, 0 si varían como un proceso de Poisson y cerca de 1 si son muy irregulares.
+    """
+    n = len(textos)
+    tokens = [_TOKEN.findall(t.lower()) if isinstance(t, str) else [] for t in textos]
+    por_texto = np.fromiter((len(t) for t in tokens), dtype=np.int64, count=n)
+    planos = pd.Series([tok for lista in tokens for tok in lista], dtype=object)
+    id_texto = np.repeat(np.arange(n), por_texto)
+
+    codigos, vocabulario = pd.factorize(planos)
+    vocabulario = pd.Index(vocabulario, dtype=object)
+    es_fin = np.zeros(len(vocabulario), dtype=bool)
+    if len(vocabulario):
+        es_fin = ~np.asarray(vocabulario.str[0].str.isalpha(), dtype=bool)
+    es_fin = es_fin[codigos]
+    es_palabra = ~es_fin
+    funcional = vocabulario.isin(PALABRAS_FUNCIONALES)[codigos]
+    longitudes = np.asarray(vocabulario.str.len(), dtype=float)[codigos] if len(vocabulario) else np.zeros(0)
+
+    palabras = np.bincount(id_texto[es_palabra], minlength=n).astype(float)
+    letras = np.bincount(id_texto[es_palabra], weights=longitudes[es_palabra], minlength=n)
+    funcionales = np.bincount(id_texto[es_palabra & funcional], minlength=n)
+
+    # Palabras distintas: pares (texto, palabra) únicos
+    pares = np.unique(id_texto[es_palabra] * max(len(vocabulario), 1) + codigos[es_palabra])
+    distintas = np.bincount(pares // max(len(vocabulario), 1), minlength=n)
+
+    # Oraciones: cada signo de fin o cambio de texto empieza una nueva; se cuentan sus palabras
+    desplazamientos = np.cumsum(por_texto) - por_texto
+    nueva = np.zeros(len(codigos), dtype=bool)
+    nueva[desplazamientos[por_texto > 0]] = True
+    nueva[1:] |= es_fin[:-1]
+    id_oracion = np.cumsum(nueva) - 1
+    palabras_oracion = np.bincount(id_oracion[es_palabra], minlength=int(nueva.sum()))
+    texto_oracion = id_texto[nueva]
+    con_palabras = palabras_oracion > 0
+    palabras_oracion, texto_oracion = palabras_oracion[con_palabras], texto_oracion[con_palabras]
+    oraciones = np.bincount(texto_oracion, minlength=n).astype(float)
+    suma = np.bincount(texto_oracion, weights=palabras_oracion, minlength=n)
+    suma_cuadrados = np.bincount(texto_oracion, weights=palabras_oracion.astype(float) ** 2, minlength=n)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media_oracion = suma / oraciones
+        desviacion = np.sqrt(np.maximum(suma_cuadrados / oraciones - media_oracion ** 2, 0))
+        resultado = pd.DataFrame({
+            'n_palabras': palabras,
+            'n_oraciones': oraciones,
+            'longitud_media_palabra': letras / palabras,
+            'longitud_media_oracion': media_oracion,
+            'desviacion_longitud_oracion': desviacion,
+            'burstiness': (desviacion - media_oracion) / (desviacion + media_oracion),
+            'ttr': distintas / palabras,
+            'frecuencia_funcionales': funcionales / palabras,
+        })
+    return resultado
+
+
+class CalculadorPerplejidad:
+    """Perplejidad de cada texto según un modelo causal (AutoModelForCausalLM) de model_path"""
+
+    def __init__(self, model_path, max_length=256, batch_size=16):
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        self.model_path = str(model_path)
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_path)
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        self.model = AutoModelForCausalLM.from_pretrained(self.model_path)
+        self.model.eval()
+        # No más tokens que posiciones tenga el modelo
+        posiciones = getattr(self.model.config, 'max_position_embeddings', None)
+        if posiciones:
+            self.max_length = min(self.max_length, posiciones)
+        self._torch = torch
+
+    def huella(self):
+        """Identifica el modelo cargado (ruta, tamaño y fecha de sus archivos) para la caché"""
+        h = hashlib.sha1(os.path.abspath(self.model_path).encode('utf-8'))
+        for nombre in sorted(os.listdir(self.model_path)):
+            ruta = os.path.join(self.model_path, nombre)
+            if os.path.isfile(ruta):
+                info = os.stat(ruta)
+                h.update(f'{nombre}\0{info.st_size}\0{info.st_mtime_ns}\0'.encode('utf-8'))
+        return f'{h.hexdigest()[:12]}-{self.max_length}'
+
+    def calcular(self, textos):
+        """Array con la perplejidad de cada texto (NaN si tiene menos de 2 tokens)"""
+        torch = self._torch
+        ids = self.tokenizer([t if isinstance(t, str) else '' for t in textos], truncation=True,
+                             max_length=self.max_length)['input_ids']
+        perplejidades = np.full(len(textos), np.nan)
+        # Lotes de textos de longitud parecida: menos padding
+        orden = np.argsort([len(i) for i in ids], kind='stable')
+        for inicio in range(0, len(orden), self.batch_size):
+            lote = orden[inicio:inicio + self.batch_size]
+            encodings = self.tokenizer.pad({'input_ids': [ids[i] for i in lote]}, return_tensors='pt')
+            with torch.inference_mode():
+                logits = self.model(**encodings).logits
+            objetivo = encodings['input_ids'][:, 1:]
+            mascara = encodings['attention_mask'][:, 1:].float()
+            nll = torch.nn.functional.cross_entropy(logits[:, :-1].transpose(1, 2).float(), objetivo,
+                                                    reduction='none')
+            tokens = mascara.sum(dim=1)
+            media = (nll * mascara).sum(dim=1) / tokens.clamp(min=1)
+            valores = torch.exp(media).numpy()
+            valores[tokens.numpy() == 0] = np.nan
+            perplejidades[lote] = valores
+        return perplejidades
+
+
+class MotorCaracteristicas:
+    """Características de textos con caché SQLite por hash del texto.
+
+    Sin modelo_perplejidad solo se calculan las estadísticas. La versión de la caché
+    incluye VERSION_CARACTERISTICAS y la huella del modelo de perplejidad, así que
+    cambiar cualquiera de los dos recalcula los textos.
+    """
+
+    def __init__(self, modelo_perplejidad=None, ruta_cache=None, max_length=256, batch_size=16):
+        self.perplejidad = (CalculadorPerplejidad(modelo_perplejidad, max_length, batch_size)
+                            if modelo_perplejidad else None)
+        self.version = f'v{VERSION_CARACTERISTICAS}'
+        if self.perplejidad is not None:
+            self.version += '-' + self.perplejidad.huella()
+        self.columnas = COLUMNAS_ESTADISTICAS + (['perplejidad'] if self.perplejidad is not None else [])
+        self._conexion = None
+        # La API la usa desde varios hilos del pool
+        self._lock = threading.Lock()
+        if ruta_cache:
+            self._conexion = sqlite3.connect(str(ruta_cache), check_same_thread=False)
+            self._conexion.execute('PRAGMA journal_mode=WAL')
+            self._conexion.execute('PRAGMA busy_timeout=30000')
+            self._conexion.execute(
+                'CREATE TABLE IF NOT EXISTS caracteristicas ('
+                ' version TEXT NOT NULL,'
+                ' hash_texto TEXT NOT NULL,'
+                ' valores TEXT NOT NULL,'
+                ' creado REAL NOT NULL,'
+                ' PRIMARY KEY (version, hash_texto))'
+            )
+            self._conexion.commit()
+
+    def _buscar(self, hashes):
+        encontrados = {}
+        if self._conexion is None:
+            return encontrados
+        unicos = list(set(hashes))
+        with self._lock:
+            for inicio in range(0, len(unicos), 500):
+                lote = unicos[inicio:inicio + 500]
+                consulta = ('SELECT hash_texto, valores FROM caracteristicas WHERE version = ? AND hash_texto IN (%s)'
+                            % ','.join('?' * len(lote)))
+                for clave, valores in self._conexion.execute(consulta, [self.version] + lote):
+                    encontrados[clave] = json.loads(valores)
+        return encontrados
+
+    def _guardar(self, filas):
+        if self._conexion is None or not filas:
+            return
+        ahora = time.time()
+        with self._lock, self._conexion:
+            self._conexion.executemany(
+                'INSERT OR REPLACE INTO caracteristicas (version, hash_texto, valores, creado) VALUES (?, ?, ?, ?)',
+                [(self.version, clave, json.dumps(valores), ahora) for clave, valores in filas.items()]
+            )
+
+    def calcular(self, textos):
+        """DataFrame con una fila por texto (en el mismo orden) y las columnas de self.columnas"""
+        textos = [t if isinstance(t, str) else '' for t in textos]
+        hashes = [hash_texto(t) for t in textos]
+        en_cache = self._buscar(hashes)
+        pendientes = {}
+        for clave, texto in zip(hashes, textos):
+            if clave not in en_cache:
+                pendientes.setdefault(clave, texto)
+
+        nuevos = {}
+        if pendientes:
+            lote = list(pendientes.values())
+            calculado = estadisticas_texto(lote)
+            if self.perplejidad is not None:
+                calculado['perplejidad'] = self.perplejidad.calcular(lote)
+            for clave, fila in zip(pendientes, calculado.to_dict('records')):
+                # JSON no admite NaN: se guarda como null
+                nuevos[clave] = {c: (None if isinstance(v, float) and math.isnan(v) else float(v))
+                                 for c, v in fila.items()}
+            self._guardar(nuevos)
+
+        filas = [en_cache.get(clave) or nuevos[clave] for clave in hashes]
+        return pd.DataFrame(filas, columns=self.columnas, dtype=float)
+
+    def cerrar(self):
+        if self._conexion is not None:
+            self._conexion.close()
+
+
+def main():
+    from almacen_datos import EscritorDataset, iterar_dataset
+
+    parser = argparse.ArgumentParser(description='Calcula las características estilométricas de un dataset')
+    parser.add_argument('--dataset', default=dataset_path, help='CSV o Parquet con la columna text')
+    parser.add_argument('--output', default=output_path, help='CSV o Parquet de salida (características y label)')
+    parser.add_argument('--modelo-perplejidad', default=None,
+                        help='carpeta de un modelo causal para la perplejidad (sin ella no se calcula)')
+    parser.add_argument('--cache', default=cache_path, help='caché SQLite de características ("" = sin caché)')
+    parser.add_argument('--chunk-rows', type=int, default=5000, help='textos por bloque')
+    parser.add_argument('--batch-size', type=int, default=16, help='textos por pasada del modelo de perplejidad')
+    parser.add_argument('--max-length', type=int, default=256, help='tokens por texto para la perplejidad')
+    args = parser.parse_args()
+
+    motor = MotorCaracteristicas(args.modelo_perplejidad, args.cache or None, max_length=args.max_length,
+                                 batch_size=args.batch_size)
+    inicio = time.perf_counter()
+    with EscritorDataset(args.output) as escritor:
+        for bloque in iterar_dataset(args.dataset, chunk_rows=args.chunk_rows):
+            salida = motor.calcular(bloque['text'].tolist())
+            if 'label' in bloque.columns:
+                salida['label'] = bloque['label'].to_numpy()
+            escritor.escribir(salida)
+            print(f'Procesados {escritor.filas} textos...', end='\r')
+    motor.cerrar()
+    print(f'\n{escritor.filas} textos en {time.perf_counter() - inicio:.1f} s, guardados en {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+Cascada de dos etapas: un filtro TF-IDF + regresión logística antes de BERT
+
+El filtro se entrena con entrenamiento_modelo.py (mismo dataset y mismo split) y
+contesta directamente los textos de los que está seguro. Solo los textos cuya
+probabilidad de IA cae dentro de la banda de incertidumbre [bajo, alto] pasan a
+modelo_binario. La banda puede ser asimétrica: como un falso positivo (texto humano
+marcado como IA) es el error más caro, alto suele estar más cerca de 1 que bajo de 0.
+
+Este script entrena el filtro por separado (--entrenar) y compara en la validación
+BERT solo con la cascada: tasa de escalado, textos por segundo, F1 y tasa de falsos
+positivos sobre los textos humanos.
+
+Uso:
+    python cascada.py --dataset dataset_binario.csv --bandas "0.2,0.9;0.1,0.95"
+"""
+import argparse
+import time
+
+import joblib
+import numpy as np
+
+# Configuración (mismos valores que entrenamiento_modelo.py)
+dataset_path = 'dataset_binario.csv'
+model_dir = './modelo_binario'
+filtro_path = './filtro_tfidf.joblib'
+banda_por_defecto = (0.2, 0.9)
+
+# Incrementar si cambia el formato guardado
+VERSION_FILTRO = 1
+
+
+class FiltroTfidf:
+    """TF-IDF de palabras y bigramas + regresión logística, con su banda de incertidumbre.
+
+    Recibe textos ya limpios (clean_text), como los del dataset de entrenamiento.
+    """
+
+    def __init__(self, pipeline, banda=banda_por_defecto):
+        bajo, alto = banda
+        if not 0 <= bajo <= alto <= 1:
+            raise ValueError('La banda debe cumplir 0 <= bajo <= alto <= 1')
+        self.pipeline = pipeline
+        self.banda = (bajo, alto)
+
+    @classmethod
+    def entrenar(cls, textos, etiquetas, banda=banda_por_defecto, max_features=200000):
+        """Entrena el filtro con etiquetas 0 (human) y 1 (ia)"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.pipeline import make_pipeline
+
+        pipeline = make_pipeline(
+            TfidfVectorizer(ngram_range=(1, 2), min_df=2, max_features=max_features, sublinear_tf=True,
+                            dtype=np.float32),
+            LogisticRegression(max_iter=1000, C=4.0),
+        )
+        pipeline.fit([t if isinstance(t, str) else '' for t in textos], etiquetas)
+        return cls(pipeline, banda)
+
+    def guardar(self, ruta):
+        joblib.dump({'version': VERSION_FILTRO, 'pipeline': self.pipeline}, ruta)
+
+    @classmethod
+    def cargar(cls, ruta, banda=banda_por_defecto):
+        datos = joblib.load(ruta)
+        if datos.get('version') != VERSION_FILTRO:
+            raise ValueError(f'{ruta} es de otra versión del filtro: vuelve a entrenarlo')
+        return cls(datos['pipeline'], banda)
+
+    def probabilidad_ia(self, textos):
+        return self.pipeline.predict_proba([t if isinstance(t, str) else '' for t in textos])[:, 1]
+
+    def decidir(self, textos):
+        """Devuelve (probabilidad de IA del filtro, máscara de los textos a escalar a BERT)"""
+        probabilidad = self.probabilidad_ia(textos)
+        bajo, alto = self.banda
+        return probabilidad, (probabilidad >= bajo) & (probabilidad <= alto)
+
+
+def metricas(etiquetas, predicciones):
+    """F1 de la clase IA y tasa de falsos positivos (textos humanos marcados como IA)"""
+    from sklearn.metrics import f1_score
+
+    etiquetas, predicciones = np.asarray(etiquetas), np.asarray(predicciones)
+    humanos = etiquetas == 0
+    return {
+        'f1': f1_score(etiquetas, predicciones, zero_division=0),
+        'fpr': float((predicciones[humanos] == 1).mean()) if humanos.any() else float('nan'),
+    }
+
+
+def main():
+    from transformers import AutoTokenizer, BertForSequenceClassification
+
+    from almacen_datos import leer_dataset, ruta_parquet
+    from cuantizacion import cargar_cuantizado, es_cuantizado
+    from evaluar_cuantizacion import predecir, split_validacion
+    from preprocesamiento import clean_text
+
+    parser = argparse.ArgumentParser(description='Entrena y evalúa la cascada TF-IDF -> BERT')
+    parser.add_argument('--dataset', default=dataset_path, help='CSV o Parquet con columnas text y label')
+    parser.add_argument('--parquet', action='store_true', help='usar la versión .parquet de --dataset')
+    parser.add_argument('--model-dir', default=model_dir, help='modelo BERT (fp32 o exportación int8)')
+    parser.add_argument('--filtro', default=filtro_path, help='archivo .joblib del filtro TF-IDF')
+    parser.add_argument('--entrenar', action='store_true', help='entrenar el filtro antes de evaluar')
+    parser.add_argument('--bandas', default='%g,%g' % banda_por_defecto,
+                        help='bandas "bajo,alto" a comparar, separadas por ";"')
+    parser.add_argument('--n', type=int, default=None, help='usar solo los primeros N textos de la validación')
+    parser.add_argument('--batch-size', type=int, default=16, help='textos por pasada de BERT')
+    args = parser.parse_args()
+    dataset = ruta_parquet(args.dataset) if args.parquet else args.dataset
+
+    if args.entrenar:
+        from sklearn.model_selection import train_test_split
+
+        df = leer_dataset(dataset, columnas=['text', 'label'])
+        texts = df['text'].tolist()
+        labels = df['label'].map({'human': 0, 'ia': 1}).tolist()
+        train_idx, _, train_labels, _ = train_test_split(
+            list(range(len(texts))), labels, test_size=0.2, random_state=42)
+        inicio = time.perf_counter()
+        FiltroTfidf.entrenar([texts[i] for i in train_idx], train_labels).guardar(args.filtro)
+        print(f'Filtro entrenado en {time.perf_counter() - inicio:.1f} s y guardado en {args.filtro}')
+
+    textos, etiquetas = split_validacion(dataset)
+    if args.n:
+        textos, etiquetas = textos[:args.n], etiquetas[:args.n]
+    limpios = [clean_text(str(t)) for t in textos]
+    print(f'{len(textos)} textos de validación')
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model_dir)
+    if es_cuantizado(args.model_dir):
+        model = cargar_cuantizado(args.model_dir)
+    else:
+        model = BertForSequenceClassification.from_pretrained(args.model_dir)
+        model.eval()
+    filtro = FiltroTfidf.cargar(args.filtro)
+
+    def bert(indices):
+        resultado = []
+        for i in range(0, len(indices), args.batch_size):
+            resultado.extend(predecir(model, tokenizer, [limpios[j] for j in indices[i:i + args.batch_size]]))
+        return np.array(resultado, dtype=int)
+
+    # Calentamiento
+    bert(list(range(min(args.batch_size, len(textos)))))
+
+    inicio = time.perf_counter()
+    solo_bert = bert(list(range(len(textos))))
+    t_bert = time.perf_counter() - inicio
+    base = metricas(etiquetas, solo_bert)
+    print(f"\nSolo BERT: {len(textos) / t_bert:.1f} textos/s, F1 {base['f1']:.4f}, "
+          f"falsos positivos {base['fpr']:.2%}")
+
+    print(f"\n{'banda':>12}{'escalados':>11}{'textos/s':>10}{'aceleración':>13}{'F1':>8}{'ΔF1':>9}"
+          f"{'FPR':>8}{'ΔFPR':>9}")
+    for banda in args.bandas.split(';'):
+        bajo, alto = (float(x) for x in banda.split(','))
+        filtro.banda = (bajo, alto)
+        inicio = time.perf_counter()
+        probabilidad, escalar = filtro.decidir(limpios)
+        predicciones = (probabilidad > 0.5).astype(int)
+        indices = np.flatnonzero(escalar).tolist()
+        if indices:
+            predicciones[indices] = bert(indices)
+        t_cascada = time.perf_counter() - inicio
+        m = metricas(etiquetas, predicciones)
+        print(f"{bajo:>5.2f}-{alto:<6.2f}{escalar.mean():>11.1%}{len(textos) / t_cascada:>10.1f}"
+              f"{t_bert / t_cascada:>12.1f}x{m['f1']:>8.4f}{m['f1'] - base['f1']:>+9.4f}"
+              f"{m['fpr']:>8.2%}{(m['fpr'] - base['fpr']) * 100:>+8.2f}p")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,51 +1,182 @@
 """
 Script para combinar y etiquetar textos humanos e IA en un solo dataset para entrenamiento
+
+Uso:
+    python combinar_datos.py                 # modo original, un solo núcleo
+    python combinar_datos.py --workers 8     # extracción en paralelo y escritura por bloques
+    python combinar_datos.py --parquet       # dataset_binario.parquet, particionado por label
+
+El texto extraído se guarda en una caché por contenido (--cache-dir), así que al
+reconstruir el dataset solo se extraen los archivos nuevos o modificados.
+
+Los casi duplicados (MinHash/LSH, deduplicacion.py) se quitan antes de guardar, así
+no se traducen varias veces ni acaban repartidos entre train y val. Los textos
+eliminados y su cluster quedan en --informe-duplicados; --sin-dedup lo desactiva.
 """
+import argparse
 import os
+import shutil
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 import pandas as pd
+from almacen_datos import EscritorDataset, es_csv, guardar_dataset, ruta_parquet
+from cache_extraccion import CacheExtraccion
+from deduplicacion import deduplicar_dataset, deduplicar_df, resumen
+from extraccion import EXTENSIONES, extraer_texto
 from preprocesamiento import clean_text
-from docx import Document
-import pdfplumber
 
 # Configura las rutas a tus carpetas de datos
 human_folder = './data/human'  # Cambia según tu estructura
 ia_folder = './data/ia'        # Cambia según tu estructura
+output_path = 'dataset_binario.csv'
+informe_duplicados_path = 'duplicados.csv'
+umbral_duplicados = 0.8
+cache_dir = './cache_extraccion'
+
+# Incrementar si cambia extraer_texto o clean_text: invalida las entradas de la caché
+EXTRACTOR_VERSION = 1
+
+# Extrae, limpia y etiqueta un archivo (se ejecuta dentro de los procesos del pool)
+def procesar_archivo(file_path, label, cache=None):
+    if cache is not None:
+        clave = cache.clave(file_path)
+        entrada = cache.obtener(clave)
+        if entrada is not None:
+            return {'text': entrada['texto_limpio'], 'label': label}
+    text = extraer_texto(file_path)
+    if not text:
+        return None
+    cleaned = clean_text(text)
+    if cache is not None:
+        cache.guardar(clave, text, cleaned)
+    return {'text': cleaned, 'label': label}
+
+def listar_archivos(folder_path):
+    with os.scandir(folder_path) as entradas:
+        for entrada in entradas:
+            if entrada.is_file() and entrada.name.endswith(EXTENSIONES):
+                yield entrada.path
 
 # Función para cargar textos de una carpeta y asignar etiqueta
-def load_and_label(folder_path, label):
+def load_and_label(folder_path, label, cache=None):
     texts = []
-    for filename in os.listdir(folder_path):
-        file_path = os.path.join(folder_path, filename)
-        text = None
-        if filename.endswith('.txt'):
-            with open(file_path, 'r', encoding='utf-8') as f:
-                text = f.read()
-        elif filename.endswith('.docx'):
-            try:
-                doc = Document(file_path)
-                text = '\n'.join([para.text for para in doc.paragraphs])
-            except Exception as e:
-                print(f'Error leyendo {filename}: {e}')
-        elif filename.endswith('.pdf'):
-            try:
-                with pdfplumber.open(file_path) as pdf:
-                    text = '\n'.join([page.extract_text() or '' for page in pdf.pages])
-            except Exception as e:
-                print(f'Error leyendo {filename}: {e}')
-        if text:
-            text = clean_text(text)
-            texts.append({'text': text, 'label': label})
+    for file_path in listar_archivos(folder_path):
+        registro = procesar_archivo(file_path, label, cache)
+        if registro:
+            texts.append(registro)
     return texts
 
-# Cargar textos humanos e IA
-human_texts = load_and_label(human_folder, 'human')
-ia_texts = load_and_label(ia_folder, 'ia')
+def _registros_validos(futuros):
+    for futuro in futuros:
+        registro = futuro.result()
+        if registro:
+            yield registro
+
+# Versión en paralelo: devuelve los registros {text, label} a medida que terminan.
+# Como mucho hay max_pendientes archivos en vuelo, así la memoria no crece con la carpeta.
+def iter_load_and_label(folder_path, label, workers=None, max_pendientes=None, cache=None):
+    workers = workers or os.cpu_count()
+    max_pendientes = max_pendientes or workers * 4
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pendientes = set()
+        for file_path in listar_archivos(folder_path):
+            pendientes.add(executor.submit(procesar_archivo, file_path, label, cache))
+            if len(pendientes) >= max_pendientes:
+                hechos, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                yield from _registros_validos(hechos)
+        while pendientes:
+            hechos, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+            yield from _registros_validos(hechos)
+
+# Escribe los registros en el CSV (o Parquet) en bloques de chunk_rows filas
+def guardar_por_bloques(registros, output_path, chunk_rows=1000):
+    bloque = []
+    with EscritorDataset(output_path, None if es_csv(output_path) else ['label']) as escritor:
+        for registro in registros:
+            bloque.append(registro)
+            if len(bloque) >= chunk_rows:
+                escritor.escribir(pd.DataFrame(bloque, columns=['text', 'label']))
+                bloque = []
+        if bloque or not escritor.filas:
+            escritor.escribir(pd.DataFrame(bloque, columns=['text', 'label']))
+    return escritor.filas
+
+# Quita los casi duplicados (se conserva la primera aparición) y guarda el informe
+def deduplicar(df, args):
+    df, informe = deduplicar_df(df, umbral=args.umbral_duplicados, workers=args.workers)
+    informe.to_csv(args.informe_duplicados, index=False)
+    print(resumen(informe, len(df) + len(informe)))
+    return df, informe
+
+def borrar_dataset(ruta):
+    if os.path.isdir(ruta):
+        shutil.rmtree(ruta)
+    elif os.path.exists(ruta):
+        os.remove(ruta)
+
+def main():
+    parser = argparse.ArgumentParser(description='Combina textos humanos e IA en dataset_binario.csv')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='procesos para extraer PDF/DOCX en paralelo (0 = modo original secuencial)')
+    parser.add_argument('--chunk-rows', type=int, default=1000,
+                        help='filas por bloque escrito en el CSV en modo paralelo')
+    parser.add_argument('--cache-dir', default=cache_dir,
+                        help='carpeta de la caché de extracción')
+    parser.add_argument('--cache-max-mb', type=int, default=2048,
+                        help='tamaño máximo de la caché; se borran primero las entradas menos usadas')
+    parser.add_argument('--sin-cache', action='store_true', help='extraer todo de nuevo sin usar la caché')
+    parser.add_argument('--parquet', action='store_true',
+                        help='guardar en Parquet comprimido y particionado por label en vez de CSV')
+    parser.add_argument('--sin-dedup', action='store_true', help='no quitar los casi duplicados')
+    parser.add_argument('--umbral-duplicados', type=float, default=umbral_duplicados,
+                        help='similitud de Jaccard a partir de la cual dos textos son duplicados')
+    parser.add_argument('--informe-duplicados', default=informe_duplicados_path,
+                        help='CSV con los textos eliminados por duplicados y su cluster')
+    args = parser.parse_args()
+    salida = ruta_parquet(output_path) if args.parquet else output_path
+
+    cache = None
+    if not args.sin_cache:
+        cache = CacheExtraccion(args.cache_dir, EXTRACTOR_VERSION, max_bytes=args.cache_max_mb * 1024 * 1024)
+
+    if args.workers > 0:
+        # Modo streaming: no se mezcla el orden en memoria; train_test_split en
+        # entrenamiento_modelo.py ya baraja los datos
+        registros = (registro
+                     for folder, label in ((human_folder, 'human'), (ia_folder, 'ia'))
+                     for registro in iter_load_and_label(folder, label, workers=args.workers, cache=cache))
+        if args.sin_dedup:
+            total = guardar_por_bloques(registros, salida, chunk_rows=args.chunk_rows)
+        else:
+            # Se escribe todo en un dataset intermedio y se copia a salida sin los
+            # duplicados; de cada texto solo se queda en memoria su firma MinHash
+            base, extension = os.path.splitext(salida)
+            intermedio = f'{base}.sin_dedup{extension}'
+            guardar_por_bloques(registros, intermedio, chunk_rows=args.chunk_rows)
+            total, informe = deduplicar_dataset(intermedio, salida, umbral=args.umbral_duplicados,
+                                                workers=args.workers,
+                                                particiones=None if es_csv(salida) else ['label'])
+            borrar_dataset(intermedio)
+            informe.to_csv(args.informe_duplicados, index=False)
+            print(resumen(informe, total + len(informe)))
+        print(f'Dataset combinado guardado como {salida} ({total} textos)')
+    else:
+        # Cargar textos humanos e IA
+        human_texts = load_and_label(human_folder, 'human', cache)
+        ia_texts = load_and_label(ia_folder, 'ia', cache)
+
+        # Combinar y guardar en un solo CSV
+        all_texts = human_texts + ia_texts
+
+        df = pd.DataFrame(all_texts)
+        if not args.sin_dedup:
+            df, _ = deduplicar(df, args)
+        df = df.sample(frac=1, random_state=42).reset_index(drop=True)  # Mezclar aleatoriamente
 
-# Combinar y guardar en un solo CSV
-all_texts = human_texts + ia_texts
+        guardar_dataset(df, salida, None if es_csv(salida) else ['label'])
+        print(f'Dataset combinado guardado como {salida}')
 
-df = pd.DataFrame(all_texts)
-df = df.sample(frac=1, random_state=42).reset_index(drop=True)  # Mezclar aleatoriamente
+    if cache is not None:
+        cache.desalojar()
 
-df.to_csv('dataset_binario.csv', index=False)
-print('Dataset combinado guardado como dataset_binario.csv')
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Exportación del modelo de modelo_binario a int8 con cuantización dinámica (solo CPU)
+
+Las capas Linear del BERT (atención, feed-forward y clasificador) pasan a pesos int8;
+las activaciones se cuantizan al vuelo en cada pasada. Los embeddings y LayerNorm
+siguen en fp32. La carpeta exportada se sirve igual que modelo_binario
+(TEXTO_MODELO_CUANTIZADO en settings.py):
+
+    modelo_binario_int8/config.json, tokenizer.json, ...   copiados del modelo fp32
+    modelo_binario_int8/modelo_int8.pt                      state_dict cuantizado
+    modelo_binario_int8/cuantizacion.json                   metadatos de la exportación
+
+Uso:
+    python cuantizacion.py --model-dir ./modelo_binario --output-dir ./modelo_binario_int8
+"""
+import argparse
+import json
+import os
+import time
+import warnings
+
+model_dir = './modelo_binario'
+output_dir = './modelo_binario_int8'
+
+ARCHIVO_PESOS = 'modelo_int8.pt'
+ARCHIVO_METADATOS = 'cuantizacion.json'
+
+
+def es_cuantizado(model_dir):
+    """Indica si model_dir es una exportación de este módulo"""
+    return os.path.isfile(os.path.join(str(model_dir), ARCHIVO_METADATOS))
+
+
+def cuantizar(model):
+    """Versión int8 (cuantización dinámica de las capas Linear) de un modelo en modo eval"""
+    import torch
+
+    with warnings.catch_warnings():
+        # torch.ao.quantization está marcado como obsoleto en favor de torchao, que no
+        # es dependencia del proyecto; quantize_dynamic sigue siendo la vía para CPU
+        warnings.simplefilter('ignore')
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def exportar(model_dir, output_dir):
+    """Cuantiza el BertForSequenceClassification de model_dir y lo guarda en output_dir"""
+    import torch
+    from transformers import AutoTokenizer, BertForSequenceClassification
+
+    model = BertForSequenceClassification.from_pretrained(model_dir)
+    model.eval()
+    cuantizado = cuantizar(model)
+
+    os.makedirs(output_dir, exist_ok=True)
+    model.config.save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(model_dir).save_pretrained(output_dir)
+    torch.save(cuantizado.state_dict(), os.path.join(output_dir, ARCHIVO_PESOS))
+    metadatos = {
+        'origen': os.path.abspath(model_dir),
+        'dtype': 'qint8',
+        'capas': ['Linear'],
+        'torch': torch.__version__,
+        'creado': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    # El archivo de metadatos se escribe el último: marca la exportación como completa
+    with open(os.path.join(output_dir, ARCHIVO_METADATOS), 'w', encoding='utf-8') as f:
+        json.dump(metadatos, f, indent=2)
+    return cuantizado
+
+
+def cargar_cuantizado(model_dir):
+    """Carga una exportación int8: se crea el modelo desde config.json, se cuantiza y se
+    cargan los pesos int8 (torch.load con weights_only, sin ejecutar código del archivo)"""
+    import torch
+    from transformers import BertConfig, BertForSequenceClassification
+
+    config = BertConfig.from_pretrained(model_dir)
+    model = BertForSequenceClassification(config)
+    model.eval()
+    model = cuantizar(model)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        estado = torch.load(os.path.join(str(model_dir), ARCHIVO_PESOS), map_location='cpu', weights_only=True)
+    model.load_state_dict(estado)
+    return model
+
+
+def tamano_pesos(model_dir):
+    """Bytes de los archivos de pesos de un modelo (fp32 o int8)"""
+    extensiones = ('.safetensors', '.bin', '.pt')
+    return sum(os.path.getsize(os.path.join(model_dir, nombre)) for nombre in os.listdir(model_dir)
+               if nombre.endswith(extensiones))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Exporta modelo_binario a int8 para inferencia en CPU')
+    parser.add_argument('--model-dir', default=model_dir, help='carpeta del modelo fp32 (entrenamiento_modelo.py)')
+    parser.add_argument('--output-dir', default=output_dir, help='carpeta de la exportación int8')
+    args = parser.parse_args()
+
+    exportar(args.model_dir, args.output_dir)
+    fp32, int8 = tamano_pesos(args.model_dir), tamano_pesos(args.output_dir)
+    print(f'Modelo int8 guardado en {args.output_dir}: {int8 / 2**20:.1f} MiB '
+          f'(fp32: {fp32 / 2**20:.1f} MiB, {fp32 / int8:.1f}x más pequeño)')
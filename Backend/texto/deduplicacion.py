@@ -0,0 +1,295 @@
+"""
+Eliminación de casi duplicados con firmas MinHash y bandas LSH
+
+Cada texto (limpio, con clean_texts) se convierte en su conjunto de shingles de
+tamano_shingle palabras y en una firma MinHash de num_permutaciones valores. Las
+firmas se parten en bandas: dos textos son candidatos si coinciden en alguna banda
+entera, y se confirman si su similitud de Jaccard estimada (fracción de valores
+iguales de la firma) llega al umbral. Los confirmados se unen en clusters y de cada
+cluster se conserva el primer texto.
+
+Las firmas se calculan en un pool de procesos por bloques; las bandas y la
+verificación son operaciones de numpy sobre la matriz de firmas, así que el coste
+crece linealmente con el número de documentos.
+
+combinar_datos.py lo aplica al construir dataset_binario.csv (antes de traducir y
+de dividir en train/val). Para un dataset ya existente:
+
+    python deduplicacion.py --dataset dataset_binario.csv --output dataset_binario_dedup.csv --workers 8
+"""
+import argparse
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from almacen_datos import EscritorDataset, es_csv, guardar_dataset, iterar_dataset, leer_dataset, ruta_parquet
+from preprocesamiento import clean_texts
+
+# Configuración
+dataset_path = 'dataset_binario.csv'
+informe_path = 'duplicados.csv'
+umbral_por_defecto = 0.8
+num_permutaciones = 128
+tamano_shingle = 5
+max_por_cubo = 100  # textos de un cubo LSH que se comparan todos con todos
+
+# Primo de Mersenne 2^61 - 1 de las funciones hash de MinHash
+_PRIMO = np.uint64((1 << 61) - 1)
+_MASCARA_32 = np.uint64(0xFFFFFFFF)
+
+
+def permutaciones(n, semilla=1):
+    """Coeficientes (a, b) de las n funciones hash h(x) = ((a * x + b) mod 2^64) mod (2^61 - 1).
+
+    a y b son de hasta 61 bits: con coeficientes pequeños h sería creciente en x para
+    los x pequeños y el mínimo caería casi siempre en el mismo shingle.
+    """
+    rng = np.random.default_rng(semilla)
+    return (rng.integers(1, int(_PRIMO), size=n, dtype=np.uint64),
+            rng.integers(0, int(_PRIMO), size=n, dtype=np.uint64))
+
+
+def hashes_shingles(texto, k=tamano_shingle):
+    """Hashes de 32 bits (sin repetir) de los grupos de k palabras consecutivas del texto.
+
+    Los textos de menos de k palabras forman un único shingle con todas ellas.
+    """
+    palabras = texto.split()
+    if not palabras:
+        return np.zeros(0, dtype=np.uint64)
+    h = np.fromiter((zlib.crc32(p.encode('utf-8')) for p in palabras), dtype=np.uint64, count=len(palabras))
+    k = min(k, len(h))
+    n = len(h) - k + 1
+    # Polinomio sobre los hashes de las k palabras (módulo 2^64) plegado a 32 bits
+    combinado = np.zeros(n, dtype=np.uint64)
+    for j in range(k):
+        combinado = combinado * np.uint64(1000003) + h[j:j + n]
+    return np.unique((combinado ^ (combinado >> np.uint64(32))) & _MASCARA_32)
+
+
+def firmas_minhash(textos, num_perm=num_permutaciones, k=tamano_shingle, semilla=1):
+    """Matriz (len(textos), num_perm) de firmas MinHash. Un texto vacío tiene todos
+    sus valores a 2^61 - 1 (ningún shingle da ese valor) y no se compara con nada."""
+    a, b = permutaciones(num_perm, semilla)
+    firmas = np.full((len(textos), num_perm), _PRIMO, dtype=np.uint64)
+    for i, texto in enumerate(textos):
+        shingles = hashes_shingles(texto if isinstance(texto, str) else '', k)
+        if len(shingles):
+            # Los productos desbordan a propósito (módulo 2^64, como en datasketch)
+            firmas[i] = ((shingles[:, None] * a + b) % _PRIMO).min(axis=0)
+    return firmas
+
+
+def calcular_firmas(textos, num_perm=num_permutaciones, k=tamano_shingle, workers=0, chunk_size=2000):
+    """firmas_minhash por bloques de chunk_size textos en workers procesos (0 o 1 = en este proceso)"""
+    textos = list(textos)
+    if workers <= 1 or len(textos) <= chunk_size:
+        return firmas_minhash(textos, num_perm, k)
+    bloques = [textos[i:i + chunk_size] for i in range(0, len(textos), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return np.vstack(list(executor.map(partial(firmas_minhash, num_perm=num_perm, k=k), bloques)))
+
+
+def bandas_filas(num_perm, umbral):
+    """(bandas, filas) con bandas * filas = num_perm y el mayor umbral LSH
+    (1/bandas)^(1/filas) que no pase de umbral.
+
+    Quedar por debajo da más candidatos (que la verificación descarta) a cambio de
+    no perder pares: con 128 valores y umbral 0.8 son 16 bandas de 8 filas, y un par
+    con similitud 0.8 es candidato con probabilidad 0.995.
+    """
+    def umbral_lsh(opcion):
+        bandas, filas = opcion
+        return (1 / bandas) ** (1 / filas)
+
+    opciones = [(num_perm // r, r) for r in range(1, num_perm + 1) if num_perm % r == 0]
+    por_debajo = [opcion for opcion in opciones if umbral_lsh(opcion) <= umbral]
+    return max(por_debajo, key=umbral_lsh) if por_debajo else min(opciones, key=umbral_lsh)
+
+
+def _raiz(padres, i):
+    while padres[i] != i:
+        padres[i] = padres[padres[i]]
+        i = padres[i]
+    return i
+
+
+def _pares_cubo(textos, cubo, n, max_cubo):
+    """Pares (i, j) de textos de un mismo cubo, codificados como i * n + j.
+
+    textos viene agrupado por cubo y, dentro de cada uno, en orden de aparición. En
+    los cubos de hasta max_cubo textos salen todos los pares; en los mayores cada
+    texto se compara con el primero del cubo y con los max_cubo - 1 siguientes, así
+    un cubo enorme (p. ej. miles de copias del mismo texto) no genera pares sin fin.
+    """
+    es_primero = np.r_[True, cubo[1:] != cubo[:-1]]
+    primero = textos[np.maximum.accumulate(np.where(es_primero, np.arange(len(textos)), 0))]
+    pares = [primero[~es_primero] * n + textos[~es_primero]]
+    # Distancia d dentro del cubo: textos[p] con textos[p + d] si están en el mismo cubo
+    for d in range(1, max_cubo):
+        mismo = np.flatnonzero(cubo[:-d] == cubo[d:])
+        if not len(mismo):
+            break
+        pares.append(textos[mismo] * n + textos[mismo + d])
+    return pares
+
+
+def agrupar(firmas, umbral=umbral_por_defecto, bandas=None, max_cubo=max_por_cubo):
+    """Devuelve (representante, similitud) por texto.
+
+    representante[i] es el índice del primer texto de su cluster (i si se conserva) y
+    similitud[i] la similitud de Jaccard estimada con ese representante. Se verifican
+    todos los pares que coinciden en una banda (ver _pares_cubo para los cubos de más
+    de max_cubo textos).
+    """
+    n, num_perm = firmas.shape
+    if bandas is None:
+        bandas, filas = bandas_filas(num_perm, umbral)
+    else:
+        filas = num_perm // bandas
+    validos = np.flatnonzero(firmas[:, 0] != _PRIMO)
+    # Claves de banda: combinación lineal (módulo 2^64) de sus filas; una colisión
+    # solo añade un candidato, que la verificación descarta
+    multiplicadores = permutaciones(filas, semilla=2)[0]
+    candidatos = [np.zeros(0, dtype=np.int64)]
+    for banda in range(bandas):
+        claves = (firmas[validos, banda * filas:(banda + 1) * filas] * multiplicadores).sum(axis=1)
+        _, inverso, conteos = np.unique(claves, return_inverse=True, return_counts=True)
+        repetidos = np.flatnonzero(conteos[inverso] > 1)
+        if not len(repetidos):
+            continue
+        # Textos de cada cubo en orden de aparición
+        orden = repetidos[np.lexsort((repetidos, inverso[repetidos]))]
+        candidatos.extend(_pares_cubo(validos[orden], inverso[orden], n, max_cubo))
+    # Un mismo par puede salir en varias bandas: se verifica una sola vez
+    candidatos = np.unique(np.concatenate(candidatos))
+    candidatos = np.column_stack([candidatos // n, candidatos % n])
+
+    padres = np.arange(n)
+    for inicio in range(0, len(candidatos), 100000):
+        pares = candidatos[inicio:inicio + 100000]
+        similitud = (firmas[pares[:, 0]] == firmas[pares[:, 1]]).mean(axis=1)
+        for i, j in pares[similitud >= umbral]:
+            ri, rj = _raiz(padres, i), _raiz(padres, j)
+            if ri != rj:
+                # La raíz es siempre el índice menor: el primer texto del cluster
+                padres[max(ri, rj)] = min(ri, rj)
+    representante = np.array([_raiz(padres, i) for i in range(n)], dtype=np.int64)
+    similitud = (firmas == firmas[representante]).mean(axis=1)
+    return representante, similitud
+
+
+def _informe(representante, similitud, textos, labels=None):
+    """Una fila por texto eliminado. textos y labels son Series indexadas por la
+    posición del texto; basta con que tengan los eliminados y sus representantes."""
+    eliminados = np.flatnonzero(representante != np.arange(len(representante)))
+    informe = pd.DataFrame({
+        'cluster': representante[eliminados],
+        'eliminado': eliminados,
+        'similitud': similitud[eliminados].round(4),
+    })
+    if labels is not None:
+        informe['label_conservado'] = labels.loc[informe['cluster']].to_numpy()
+        informe['label_eliminado'] = labels.loc[informe['eliminado']].to_numpy()
+    textos = textos.astype(str).str.slice(0, 120)
+    informe['texto_conservado'] = textos.loc[informe['cluster']].to_numpy()
+    informe['texto_eliminado'] = textos.loc[informe['eliminado']].to_numpy()
+    return informe.sort_values(['cluster', 'eliminado'])
+
+
+def deduplicar_df(df, columna='text', umbral=umbral_por_defecto, num_perm=num_permutaciones,
+                  k=tamano_shingle, workers=0):
+    """Quita los casi duplicados de df (sobre el texto limpio de columna).
+
+    Devuelve (df sin duplicados, informe) con una fila por texto eliminado: cluster
+    (posición del texto conservado), eliminado, similitud, las etiquetas de ambos si
+    df tiene label y el comienzo de los dos textos.
+    """
+    df = df.reset_index(drop=True)
+    limpios = clean_texts(df[columna]).fillna('').tolist()
+    firmas = calcular_firmas(limpios, num_perm, k, workers)
+    representante, similitud = agrupar(firmas, umbral)
+    informe = _informe(representante, similitud, df[columna], df['label'] if 'label' in df.columns else None)
+    return df.drop(index=informe['eliminado']).reset_index(drop=True), informe
+
+
+def deduplicar_dataset(entrada, salida, columna='text', umbral=umbral_por_defecto, num_perm=num_permutaciones,
+                       k=tamano_shingle, workers=0, particiones=None, chunk_rows=20000):
+    """deduplicar_df sin cargar el dataset en memoria.
+
+    Una primera pasada por bloques de entrada calcula las firmas, que es lo único que
+    se guarda de cada texto; después de agrupar, una segunda pasada escribe en salida
+    (que no puede ser entrada) las filas conservadas. Las posiciones del informe
+    siguen el orden de iterar_dataset. Devuelve (filas escritas, informe).
+    """
+    firmas = [np.zeros((0, num_perm), dtype=np.uint64)]
+    for bloque in iterar_dataset(entrada, [columna], chunk_rows):
+        firmas.append(calcular_firmas(clean_texts(bloque[columna]).fillna('').tolist(), num_perm, k, workers))
+    representante, similitud = agrupar(np.vstack(firmas), umbral)
+    del firmas
+
+    conservar = representante == np.arange(len(representante))
+    # Para el informe solo hacen falta los textos eliminados y sus representantes
+    en_informe = ~conservar
+    en_informe[representante[~conservar]] = True
+    textos, labels = [], []
+    inicio = 0
+    with EscritorDataset(salida, particiones) as escritor:
+        for bloque in iterar_dataset(entrada, chunk_rows=chunk_rows):
+            posiciones = np.arange(inicio, inicio + len(bloque))
+            inicio += len(bloque)
+            bloque = bloque.set_axis(posiciones)
+            textos.append(bloque[columna][en_informe[posiciones]])
+            if 'label' in bloque.columns:
+                labels.append(bloque['label'][en_informe[posiciones]])
+            escritor.escribir(bloque[conservar[posiciones]].reset_index(drop=True))
+    textos = pd.concat(textos) if textos else pd.Series(dtype=object)
+    labels = pd.concat(labels) if labels else None
+    return escritor.filas, _informe(representante, similitud, textos, labels)
+
+
+def resumen(informe, total):
+    """Texto con los duplicados eliminados para imprimir al final de un script"""
+    lineas = [f'Casi duplicados eliminados: {len(informe)} de {total} textos '
+              f'en {informe["cluster"].nunique()} clusters']
+    if 'label_conservado' in informe.columns:
+        cruzados = int((informe['label_conservado'] != informe['label_eliminado']).sum())
+        if cruzados:
+            lineas.append(f'  {cruzados} tenían una etiqueta distinta de la del texto conservado')
+    return '\n'.join(lineas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Elimina casi duplicados de un dataset con MinHash y LSH')
+    parser.add_argument('--dataset', default=dataset_path, help='CSV o Parquet con columna text')
+    parser.add_argument('--parquet', action='store_true', help='usar la versión .parquet de --dataset')
+    parser.add_argument('--output', default=None, help='dataset sin duplicados (por defecto, sobrescribe --dataset)')
+    parser.add_argument('--informe', default=informe_path, help='CSV con los textos eliminados y su cluster')
+    parser.add_argument('--columna', default='text', help='columna de texto a comparar')
+    parser.add_argument('--umbral', type=float, default=umbral_por_defecto,
+                        help='similitud de Jaccard mínima para considerar dos textos duplicados')
+    parser.add_argument('--num-perm', type=int, default=num_permutaciones, help='valores de cada firma MinHash')
+    parser.add_argument('--shingle', type=int, default=tamano_shingle, help='palabras por shingle')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='procesos para calcular las firmas')
+    args = parser.parse_args()
+    dataset = ruta_parquet(args.dataset) if args.parquet else args.dataset
+    salida = args.output or dataset
+
+    df = leer_dataset(dataset)
+    inicio = time.perf_counter()
+    dedup, informe = deduplicar_df(df, args.columna, args.umbral, args.num_perm, args.shingle, args.workers)
+    print(f'{len(df)} textos analizados en {time.perf_counter() - inicio:.1f} s')
+    print(resumen(informe, len(df)))
+
+    informe.to_csv(args.informe, index=False)
+    guardar_dataset(dedup, salida, None if es_csv(salida) else ['label'])
+    print(f'Dataset sin duplicados guardado en {salida} ({len(dedup)} textos); informe en {args.informe}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,61 +1,211 @@
 """
 Entrenamiento de modelo de clasificación binaria para distinguir textos humanos de textos generados por IA
+
+La tokenización se guarda en una caché en disco (cache_tokenizacion.py): volver a
+entrenar con el mismo dataset y tokenizador no vuelve a tokenizar. Los lotes se
+agrupan por longitud y se rellenan solo hasta el texto más largo de cada lote
+(muestreo_longitud.py); --buckets define los límites de las cubetas.
+
+--dataset acepta CSV o Parquet (almacen_datos.py); de Parquet solo se leen las
+columnas text y label.
+
+Con el mismo split se entrena también el filtro TF-IDF de la cascada (cascada.py),
+que se guarda en --filtro-tfidf ("" para no entrenarlo).
+
+Con --procesos N se entrena en paralelo de datos (DDP, backend gloo) con N procesos
+locales en CPU: cada uno recibe uno de cada N lotes y los gradientes se promedian
+entre todos. El tamaño de lote efectivo (--batch-efectivo) no cambia con N: se
+reparte entre procesos y pasos de acumulación de gradiente, así que el resultado es
+el mismo modelo_binario. escalado_entrenamiento.py mide las muestras por segundo
+con distinto número de procesos.
 """
-import pandas as pd
+import argparse
+import json
+import os
+import socket
+
 import torch
-from transformers import BertTokenizer, BertForSequenceClassification, Trainer, TrainingArguments
+from transformers import AutoTokenizer, BertForSequenceClassification, TrainingArguments
 from sklearn.model_selection import train_test_split
+from almacen_datos import leer_dataset, ruta_parquet
+from cache_tokenizacion import tokenizar_con_cache
+from cascada import FiltroTfidf
+from muestreo_longitud import TrainerPorLongitud, ratio_padding
 
-# Cargar datos preprocesados (ajusta el path según tu flujo)
-df = pd.read_csv('human_texts_cleaned.csv')  # Cambia por tu dataset combinado
-texts = df['text'].tolist()
-labels = df['label'].map({'human': 0, 'ia': 1}).tolist()  # Ajusta si tienes ambas clases
-
-# Tokenización
+# Configuración (ajusta el path según tu flujo)
+dataset_path = 'human_texts_cleaned.csv'  # Cambia por tu dataset combinado
 model_name = 'bert-base-uncased'
-tokenizer = BertTokenizer.from_pretrained(model_name)
-encodings = tokenizer(texts, truncation=True, padding=True, max_length=256)
+output_dir = './modelo_binario'
+cache_dir = './cache_tokens'
+filtro_path = './filtro_tfidf.joblib'
+max_length = 256
+bucket_limits = '64,128,192'
+num_epochs = 2
+batch_efectivo = 8  # textos por actualización de pesos, sumando procesos y acumulación
+batch_por_proceso = 8  # máximo de textos por pasada en cada proceso
 
 class TextDataset(torch.utils.data.Dataset):
-    def __init__(self, encodings, labels):
-        self.encodings = encodings
+    """Filas de un CorpusTokenizado (arrays en memoria mapeada) seleccionadas por índice.
+
+    Devuelve cada ejemplo sin padding; el relleno lo hace PaddingDinamico por lote.
+    """
+    def __init__(self, corpus, indices, labels):
+        self.corpus = corpus
+        self.indices = indices
         self.labels = labels
+        self.lengths = corpus.lengths[indices]
     def __getitem__(self, idx):
-        item = {key: torch.tensor(val[idx]) for key, val in self.encodings.items()}
+        fila = self.indices[idx]
+        n = self.lengths[idx]
+        item = {
+            'input_ids': torch.tensor(self.corpus.input_ids[fila, :n], dtype=torch.long),
+            'attention_mask': torch.tensor(self.corpus.attention_mask[fila, :n], dtype=torch.long),
+        }
         item['labels'] = torch.tensor(self.labels[idx])
         return item
     def __len__(self):
         return len(self.labels)
 
-# División en train/val
-train_texts, val_texts, train_labels, val_labels = train_test_split(texts, labels, test_size=0.2, random_state=42)
-train_encodings = tokenizer(train_texts, truncation=True, padding=True, max_length=256)
-val_encodings = tokenizer(val_texts, truncation=True, padding=True, max_length=256)
-train_dataset = TextDataset(train_encodings, train_labels)
-val_dataset = TextDataset(val_encodings, val_labels)
-
-# Modelo
-model = BertForSequenceClassification.from_pretrained(model_name, num_labels=2)
-
-# Entrenamiento
-training_args = TrainingArguments(
-    output_dir='./results',
-    num_train_epochs=2,
-    per_device_train_batch_size=8,
-    per_device_eval_batch_size=8,
-    evaluation_strategy='epoch',
-    save_strategy='epoch',
-    logging_dir='./logs',
-    logging_steps=10,
-)
-trainer = Trainer(
-    model=model,
-    args=training_args,
-    train_dataset=train_dataset,
-    eval_dataset=val_dataset,
-)
-trainer.train()
-
-# Guardar modelo
-model.save_pretrained('./modelo_binario')
-tokenizer.save_pretrained('./modelo_binario')
+def reparto_batch(efectivo, procesos, maximo_por_proceso):
+    """(lote por proceso, pasos de acumulación) con lote * pasos * procesos == efectivo"""
+    if efectivo % procesos:
+        raise ValueError(f'--batch-efectivo ({efectivo}) debe ser múltiplo de --procesos ({procesos})')
+    por_proceso = efectivo // procesos
+    pasos = -(-por_proceso // maximo_por_proceso)
+    while por_proceso % pasos:
+        pasos += 1
+    return por_proceso // pasos, pasos
+
+def cargar_datos(args):
+    """Tokenizador, textos, corpus tokenizado y split (train_idx, val_idx, train_labels, val_labels)"""
+    # Cargar datos preprocesados (solo las columnas necesarias)
+    df = leer_dataset(ruta_parquet(args.dataset) if args.parquet else args.dataset, columnas=['text', 'label'])
+    texts = df['text'].tolist()
+    labels = df['label'].map({'human': 0, 'ia': 1}).tolist()  # Ajusta si tienes ambas clases
+
+    # Tokenización (tokenizador rápido, por lotes y con caché en disco)
+    tokenizer = AutoTokenizer.from_pretrained(args.model_name, use_fast=True)
+    corpus = tokenizar_con_cache(texts, tokenizer, args.cache_dir, max_length=max_length)
+
+    # División en train/val (sobre índices del corpus tokenizado)
+    split = train_test_split(list(range(len(texts))), labels, test_size=0.2, random_state=42)
+    return tokenizer, texts, corpus, split
+
+def entrenar_filtro(args, texts, split):
+    # Filtro TF-IDF de la cascada: mismos textos de entrenamiento, unos segundos
+    if args.filtro_tfidf:
+        train_idx, _, train_labels, _ = split
+        FiltroTfidf.entrenar([texts[i] for i in train_idx], train_labels).guardar(args.filtro_tfidf)
+        print(f'Filtro TF-IDF guardado en {args.filtro_tfidf}')
+
+def entrenar(args, con_filtro=True):
+    """Entrena en este proceso (o en uno de los procesos de --procesos) y guarda el modelo"""
+    tokenizer, texts, corpus, split = cargar_datos(args)
+    if con_filtro:
+        entrenar_filtro(args, texts, split)
+    train_idx, val_idx, train_labels, val_labels = split
+    train_dataset = TextDataset(corpus, train_idx, train_labels)
+    val_dataset = TextDataset(corpus, val_idx, val_labels)
+
+    # Modelo
+    model = BertForSequenceClassification.from_pretrained(args.model_name, num_labels=2)
+
+    # Entrenamiento
+    batch_size, pasos_acumulacion = reparto_batch(args.batch_efectivo, args.procesos, args.batch_size)
+    distribuido = args.procesos > 1
+    training_args = TrainingArguments(
+        output_dir='./results',
+        num_train_epochs=args.epochs,
+        max_steps=args.max_steps,
+        per_device_train_batch_size=batch_size,
+        per_device_eval_batch_size=batch_size,
+        gradient_accumulation_steps=pasos_acumulacion,
+        eval_strategy='epoch' if args.max_steps < 0 else 'no',
+        save_strategy='epoch' if args.max_steps < 0 else 'no',
+        logging_steps=10,
+        use_cpu=distribuido,
+        ddp_backend='gloo' if distribuido else None,
+        # Todos los parámetros de BERT intervienen en cada pasada
+        ddp_find_unused_parameters=False if distribuido else None,
+    )
+    trainer = TrainerPorLongitud(
+        model=model,
+        args=training_args,
+        train_dataset=train_dataset,
+        eval_dataset=val_dataset,
+        limites=[int(x) for x in args.buckets.split(',') if x.strip()],
+        pad_token_id=tokenizer.pad_token_id,
+    )
+    resultado = trainer.train()
+
+    tokens_reales, tokens_totales = trainer.totales_train
+    if distribuido:
+        # Cada proceso contó solo sus lotes
+        totales = torch.tensor([tokens_reales, tokens_totales], dtype=torch.long)
+        torch.distributed.all_reduce(totales)
+        tokens_reales, tokens_totales = totales.tolist()
+    if not trainer.is_world_process_zero():
+        return
+    print(f'Lote por proceso {batch_size} x {pasos_acumulacion} pasos de acumulación x {args.procesos} '
+          f'procesos = {batch_size * pasos_acumulacion * args.procesos} textos por actualización')
+    print(f'Tokens reales procesados: {tokens_reales} '
+          f'({tokens_reales / resultado.metrics["train_runtime"]:.1f} tokens/s)')
+    print(f'Padding en entrenamiento: {ratio_padding(tokens_reales, tokens_totales):.1%}')
+    if args.metricas_json:
+        with open(args.metricas_json, 'w', encoding='utf-8') as f:
+            json.dump(dict(resultado.metrics, procesos=args.procesos, batch_por_proceso=batch_size,
+                           pasos_acumulacion=pasos_acumulacion, tokens_por_segundo=
+                           tokens_reales / resultado.metrics['train_runtime']), f, indent=2)
+
+    # Guardar modelo
+    model.save_pretrained(args.output_dir)
+    tokenizer.save_pretrained(args.output_dir)
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def _proceso(rank, args, puerto):
+    # Variables que leen torch.distributed y TrainingArguments (las mismas que pone torchrun)
+    os.environ.update(MASTER_ADDR='127.0.0.1', MASTER_PORT=str(puerto), RANK=str(rank), LOCAL_RANK=str(rank),
+                      WORLD_SIZE=str(args.procesos), LOCAL_WORLD_SIZE=str(args.procesos))
+    torch.set_num_threads(args.hilos_por_proceso or max(1, (os.cpu_count() or 1) // args.procesos))
+    entrenar(args, con_filtro=False)
+
+def main():
+    parser = argparse.ArgumentParser(description='Entrena el clasificador humano/IA y lo guarda en modelo_binario')
+    parser.add_argument('--dataset', default=dataset_path, help='CSV o Parquet con columnas text y label')
+    parser.add_argument('--parquet', action='store_true', help='usar la versión .parquet de --dataset')
+    parser.add_argument('--model-name', default=model_name, help='modelo base de Hugging Face o carpeta local')
+    parser.add_argument('--output-dir', default=output_dir, help='carpeta donde se guarda el modelo entrenado')
+    parser.add_argument('--cache-dir', default=cache_dir, help='carpeta de la caché de tokenización')
+    parser.add_argument('--buckets', default=bucket_limits,
+                        help='límites de las cubetas de longitud en tokens, separados por comas ("" = una sola cubeta)')
+    parser.add_argument('--filtro-tfidf', default=filtro_path,
+                        help='archivo donde guardar el filtro TF-IDF de la cascada ("" = no entrenarlo)')
+    parser.add_argument('--procesos', type=int, default=1,
+                        help='procesos locales de entrenamiento en paralelo de datos (DDP con gloo)')
+    parser.add_argument('--hilos-por-proceso', type=int, default=None,
+                        help='hilos de torch de cada proceso (por defecto, núcleos / procesos)')
+    parser.add_argument('--batch-efectivo', type=int, default=batch_efectivo,
+                        help='textos por actualización de pesos, igual con cualquier número de procesos')
+    parser.add_argument('--batch-size', type=int, default=batch_por_proceso,
+                        help='máximo de textos por pasada en cada proceso (el resto se acumula)')
+    parser.add_argument('--epochs', type=float, default=num_epochs, help='épocas de entrenamiento')
+    parser.add_argument('--max-steps', type=int, default=-1,
+                        help='parar tras N actualizaciones, sin evaluar ni guardar checkpoints (para medir)')
+    parser.add_argument('--metricas-json', default=None, help='guardar las métricas del entrenamiento en este JSON')
+    args = parser.parse_args()
+    reparto_batch(args.batch_efectivo, args.procesos, args.batch_size)
+
+    if args.procesos > 1:
+        # Se tokeniza (y se llena la caché) y se entrena el filtro una sola vez antes de lanzar los procesos
+        _, texts, _, split = cargar_datos(args)
+        entrenar_filtro(args, texts, split)
+        torch.multiprocessing.spawn(_proceso, args=(args, _puerto_libre()), nprocs=args.procesos)
+    else:
+        entrenar(args)
+
+if __name__ == '__main__':
+    main()
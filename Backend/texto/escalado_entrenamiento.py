@@ -0,0 +1,93 @@
+"""
+Informe de escalado del entrenamiento en paralelo de datos (entrenamiento_modelo.py --procesos)
+
+Lanza un entrenamiento corto (--max-steps actualizaciones, sin evaluar ni guardar
+checkpoints) con cada número de procesos y compara las muestras por segundo. El
+tamaño de lote efectivo es el mismo en todas las ejecuciones, así que solo cambia
+cómo se reparte el trabajo. Conviene un --batch-efectivo múltiplo de todos los
+números de procesos y lo bastante grande para que cada proceso tenga lotes útiles.
+
+Uso:
+    python escalado_entrenamiento.py --dataset dataset_binario.csv --procesos 1,2,4,8 --batch-efectivo 64
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# Configuración (mismos valores que entrenamiento_modelo.py)
+dataset_path = 'human_texts_cleaned.csv'
+model_name = 'bert-base-uncased'
+lista_procesos = '1,2,4,8'
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'entrenamiento_modelo.py')
+
+
+def medir(procesos, args, carpeta):
+    """Ejecuta el entrenamiento corto con procesos procesos y devuelve sus métricas"""
+    metricas = os.path.join(carpeta, f'metricas_{procesos}.json')
+    comando = [sys.executable, SCRIPT, '--dataset', args.dataset, '--model-name', args.model_name,
+               '--output-dir', os.path.join(carpeta, f'modelo_{procesos}'), '--filtro-tfidf', '',
+               '--procesos', str(procesos), '--batch-efectivo', str(args.batch_efectivo),
+               '--batch-size', str(args.batch_size), '--max-steps', str(args.max_steps),
+               '--metricas-json', metricas]
+    if args.parquet:
+        comando.append('--parquet')
+    if args.hilos_por_proceso:
+        comando += ['--hilos-por-proceso', str(args.hilos_por_proceso)]
+    salida = subprocess.run(comando, capture_output=True, text=True)
+    if salida.returncode != 0:
+        print(salida.stderr[-3000:], file=sys.stderr)
+        raise RuntimeError(f'El entrenamiento con {procesos} procesos terminó con código {salida.returncode}')
+    with open(metricas, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Muestras por segundo del entrenamiento con 1, 2, 4... procesos')
+    parser.add_argument('--dataset', default=dataset_path, help='CSV o Parquet con columnas text y label')
+    parser.add_argument('--parquet', action='store_true', help='usar la versión .parquet de --dataset')
+    parser.add_argument('--model-name', default=model_name, help='modelo base de Hugging Face o carpeta local')
+    parser.add_argument('--procesos', default=lista_procesos, help='números de procesos a medir, separados por comas')
+    parser.add_argument('--batch-efectivo', type=int, default=64, help='textos por actualización (igual en todas)')
+    parser.add_argument('--batch-size', type=int, default=8, help='máximo de textos por pasada en cada proceso')
+    parser.add_argument('--hilos-por-proceso', type=int, default=None,
+                        help='hilos de torch de cada proceso (por defecto, núcleos / procesos)')
+    parser.add_argument('--max-steps', type=int, default=20, help='actualizaciones de pesos por ejecución')
+    parser.add_argument('--json', default=None, help='guardar el informe en este archivo JSON')
+    args = parser.parse_args()
+
+    nucleos = os.cpu_count() or 1
+    print(f'{nucleos} núcleos, lote efectivo {args.batch_efectivo}, {args.max_steps} actualizaciones por ejecución\n')
+    print(f"{'procesos':>8}{'lote x acum.':>14}{'muestras/s':>12}{'tokens/s':>10}{'aceleración':>13}{'eficiencia':>12}")
+    filas = []
+    with tempfile.TemporaryDirectory() as carpeta:
+        for procesos in (int(p) for p in args.procesos.split(',') if p.strip()):
+            try:
+                m = medir(procesos, args, carpeta)
+            except RuntimeError as e:
+                # Normalmente falta de memoria: se informa y se sigue con el resto
+                print(f'{procesos:>8}  {e}')
+                continue
+            # Respecto a la primera ejecución de la lista (normalmente 1 proceso)
+            base = filas[0] if filas else dict(m, procesos=procesos)
+            fila = dict(m, procesos=procesos)
+            fila['aceleracion'] = m['train_samples_per_second'] / base['train_samples_per_second']
+            fila['eficiencia'] = fila['aceleracion'] * base['procesos'] / procesos
+            filas.append(fila)
+            aviso = '  (más procesos que núcleos)' if procesos > nucleos else ''
+            print(f"{procesos:>8}{m['batch_por_proceso']:>7} x {m['pasos_acumulacion']:<4}"
+                  f"{m['train_samples_per_second']:>12.2f}{m['tokens_por_segundo']:>10.0f}"
+                  f"{fila['aceleracion']:>12.2f}x{fila['eficiencia']:>12.0%}{aviso}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'nucleos': nucleos, 'batch_efectivo': args.batch_efectivo, 'max_steps': args.max_steps,
+                       'resultados': filas}, f, indent=2)
+        print(f'\nInforme guardado en {args.json}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Evaluación del modelo int8 (cuantizacion.py) frente al fp32 de modelo_binario
+
+Usa el mismo split de validación que entrenamiento_modelo.py (20 %, random_state=42)
+y mide, para cada modelo:
+
+- latencia de un texto por petición (p50 y p99), como en predict-text sin micro-lotes;
+- throughput en lotes de --batch-size textos;
+- tamaño de los pesos en disco;
+- accuracy y F1 (clase IA) sobre la validación, y la diferencia del int8 con el fp32.
+
+Uso:
+    python evaluar_cuantizacion.py --dataset human_texts_cleaned.csv --n 2000 --threads 4
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import torch
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import train_test_split
+from transformers import AutoTokenizer, BertForSequenceClassification
+
+from almacen_datos import leer_dataset, ruta_parquet
+from cuantizacion import cargar_cuantizado, tamano_pesos
+from preprocesamiento import clean_text
+
+# Configuración (mismos valores que entrenamiento_modelo.py y cuantizacion.py)
+dataset_path = 'human_texts_cleaned.csv'
+model_dir = './modelo_binario'
+int8_dir = './modelo_binario_int8'
+max_length = 256
+
+
+def split_validacion(ruta):
+    """Textos y etiquetas (0 = human, 1 = ia) de la validación de entrenamiento_modelo.py"""
+    df = leer_dataset(ruta, columnas=['text', 'label'])
+    texts = df['text'].tolist()
+    labels = df['label'].map({'human': 0, 'ia': 1}).tolist()
+    _, val_idx, _, val_labels = train_test_split(
+        list(range(len(texts))), labels, test_size=0.2, random_state=42)
+    return [texts[i] for i in val_idx], val_labels
+
+
+def predecir(model, tokenizer, textos):
+    """Clase predicha de cada texto en una sola pasada del modelo"""
+    encodings = tokenizer([clean_text(str(t)) for t in textos], truncation=True, padding=True,
+                          max_length=max_length, return_tensors='pt')
+    with torch.inference_mode():
+        return model(**encodings).logits.argmax(dim=-1).tolist()
+
+
+def medir(model, tokenizer, textos, etiquetas, batch_size, n_latencia):
+    # Calentamiento: la primera pasada reserva memoria y prepara los kernels
+    predecir(model, tokenizer, textos[:batch_size])
+
+    latencias = []
+    for texto in textos[:n_latencia]:
+        inicio = time.perf_counter()
+        predecir(model, tokenizer, [texto])
+        latencias.append(time.perf_counter() - inicio)
+
+    predicciones = []
+    inicio = time.perf_counter()
+    for i in range(0, len(textos), batch_size):
+        predicciones.extend(predecir(model, tokenizer, textos[i:i + batch_size]))
+    duracion = time.perf_counter() - inicio
+
+    return {
+        'latencia_p50_ms': float(np.percentile(latencias, 50) * 1000),
+        'latencia_p99_ms': float(np.percentile(latencias, 99) * 1000),
+        'textos_por_segundo': len(textos) / duracion,
+        'accuracy': accuracy_score(etiquetas, predicciones),
+        'f1': f1_score(etiquetas, predicciones, zero_division=0),
+    }, predicciones
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara el modelo int8 con el fp32 en la validación')
+    parser.add_argument('--dataset', default=dataset_path, help='CSV o Parquet con columnas text y label')
+    parser.add_argument('--parquet', action='store_true', help='usar la versión .parquet de --dataset')
+    parser.add_argument('--model-dir', default=model_dir, help='carpeta del modelo fp32')
+    parser.add_argument('--int8-dir', default=int8_dir, help='carpeta de la exportación int8')
+    parser.add_argument('--n', type=int, default=None, help='usar solo los primeros N textos de la validación')
+    parser.add_argument('--n-latencia', type=int, default=200, help='textos para medir la latencia de uno en uno')
+    parser.add_argument('--batch-size', type=int, default=16, help='textos por pasada al medir el throughput')
+    parser.add_argument('--threads', type=int, default=None, help='hilos de torch (por defecto, los de torch)')
+    parser.add_argument('--json', default=None, help='guardar también los resultados en este archivo JSON')
+    args = parser.parse_args()
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    textos, etiquetas = split_validacion(ruta_parquet(args.dataset) if args.parquet else args.dataset)
+    if args.n:
+        textos, etiquetas = textos[:args.n], etiquetas[:args.n]
+    print(f'{len(textos)} textos de validación, {torch.get_num_threads()} hilos de torch')
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model_dir)
+    fp32 = BertForSequenceClassification.from_pretrained(args.model_dir)
+    fp32.eval()
+    int8 = cargar_cuantizado(args.int8_dir)
+
+    resultados = {}
+    resultados['fp32'], pred_fp32 = medir(fp32, tokenizer, textos, etiquetas, args.batch_size, args.n_latencia)
+    resultados['int8'], pred_int8 = medir(int8, tokenizer, textos, etiquetas, args.batch_size, args.n_latencia)
+    resultados['fp32']['tamano_mib'] = tamano_pesos(args.model_dir) / 2**20
+    resultados['int8']['tamano_mib'] = tamano_pesos(args.int8_dir) / 2**20
+
+    print(f"\n{'':6}{'p50 (ms)':>10}{'p99 (ms)':>10}{'textos/s':>10}{'MiB':>8}{'accuracy':>10}{'F1':>8}")
+    for nombre, r in resultados.items():
+        print(f"{nombre:6}{r['latencia_p50_ms']:10.2f}{r['latencia_p99_ms']:10.2f}{r['textos_por_segundo']:10.1f}"
+              f"{r['tamano_mib']:8.1f}{r['accuracy']:10.4f}{r['f1']:8.4f}")
+
+    f, q = resultados['fp32'], resultados['int8']
+    resultados['comparacion'] = {
+        'aceleracion_p50': f['latencia_p50_ms'] / q['latencia_p50_ms'],
+        'aceleracion_throughput': q['textos_por_segundo'] / f['textos_por_segundo'],
+        'reduccion_tamano': f['tamano_mib'] / q['tamano_mib'],
+        'delta_accuracy': q['accuracy'] - f['accuracy'],
+        'delta_f1': q['f1'] - f['f1'],
+        'coincidencia': float(np.mean(np.array(pred_fp32) == np.array(pred_int8))),
+    }
+    c = resultados['comparacion']
+    print(f"\nint8 frente a fp32: latencia p50 {c['aceleracion_p50']:.2f}x, throughput "
+          f"{c['aceleracion_throughput']:.2f}x, {c['reduccion_tamano']:.1f}x más pequeño")
+    print(f"Δ accuracy {c['delta_accuracy']:+.4f}, Δ F1 {c['delta_f1']:+.4f}, "
+          f"misma predicción en el {c['coincidencia']:.2%} de los textos")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as salida:
+            json.dump(resultados, salida, indent=2)
+
+
+if __name__ == '__main__':
+    main()
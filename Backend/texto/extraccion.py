@@ -0,0 +1,150 @@
+"""
+Extracción de texto de archivos .txt, .docx y .pdf
+
+extraer_texto devuelve el texto completo (lo usa combinar_datos.py para el dataset).
+iterar_fragmentos lo devuelve por partes para no tener todo el documento en memoria:
+página a página en los PDF y en bloques de párrafos en DOCX y TXT. Es lo que usa el
+endpoint de subida de documentos (views.analyze_document).
+
+python-docx y pdfplumber se importan solo al leer un archivo de ese formato.
+"""
+import codecs
+import os
+import re
+
+EXTENSIONES = ('.txt', '.docx', '.pdf')
+
+# Tamaño aproximado de cada bloque de párrafos (DOCX y TXT), en caracteres
+CARACTERES_POR_BLOQUE = 2000
+
+_SEPARADOR_PARRAFOS = re.compile(r'\n[ \t\r\f\v]*\n')
+
+
+class ArchivoNoLegible(ValueError):
+    """El archivo no tiene un formato soportado o no se puede leer"""
+
+
+class LimiteExcedido(ValueError):
+    """El documento supera el número de páginas permitido"""
+
+
+# Función para extraer el texto de un archivo .txt, .docx o .pdf
+def extraer_texto(file_path):
+    filename = os.path.basename(file_path)
+    text = None
+    if filename.endswith('.txt'):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+    elif filename.endswith('.docx'):
+        try:
+            from docx import Document
+            doc = Document(file_path)
+            text = '\n'.join([para.text for para in doc.paragraphs])
+        except Exception as e:
+            print(f'Error leyendo {filename}: {e}')
+    elif filename.endswith('.pdf'):
+        try:
+            import pdfplumber
+            with pdfplumber.open(file_path) as pdf:
+                text = '\n'.join([page.extract_text() or '' for page in pdf.pages])
+        except Exception as e:
+            print(f'Error leyendo {filename}: {e}')
+    return text
+
+
+def _agrupar_parrafos(parrafos, caracteres_por_bloque):
+    """Junta párrafos consecutivos (sin partirlos) en bloques de unos caracteres_por_bloque.
+
+    Devuelve ({'paragraphs': [primero, último]}, texto) por bloque; los párrafos
+    vacíos no cuentan para el tamaño pero sí para la numeración.
+    """
+    bloque, inicio, tamano = [], None, 0
+    for i, parrafo in enumerate(parrafos):
+        if not parrafo.strip():
+            continue
+        if bloque and tamano + len(parrafo) > caracteres_por_bloque:
+            yield {'paragraphs': [inicio, ultimo]}, '\n'.join(bloque)
+            bloque, tamano = [], 0
+        if not bloque:
+            inicio = i
+        bloque.append(parrafo)
+        tamano += len(parrafo)
+        ultimo = i
+    if bloque:
+        yield {'paragraphs': [inicio, ultimo]}, '\n'.join(bloque)
+
+
+def _parrafos_txt(archivo, encoding='utf-8', tam_lectura=64 * 1024):
+    """Párrafos (separados por líneas en blanco) de un archivo binario, leído por trozos"""
+    decodificador = codecs.getincrementaldecoder(encoding)(errors='replace')
+    pendiente = ''
+    while True:
+        datos = archivo.read(tam_lectura)
+        pendiente += decodificador.decode(datos, final=not datos)
+        partes = _SEPARADOR_PARRAFOS.split(pendiente)
+        # La última parte puede continuar en el siguiente trozo
+        pendiente = partes.pop()
+        yield from partes
+        if not datos:
+            break
+    yield pendiente
+
+
+def _paginas_pdf(archivo, max_paginas=None):
+    import pdfplumber
+
+    try:
+        pdf = pdfplumber.open(archivo)
+    except Exception as e:
+        raise ArchivoNoLegible(f'No se pudo leer el PDF: {e}') from e
+    with pdf:
+        try:
+            paginas = pdf.pages
+        except Exception as e:
+            raise ArchivoNoLegible(f'No se pudo leer el PDF: {e}') from e
+        if max_paginas is not None and len(paginas) > max_paginas:
+            raise LimiteExcedido(f'El PDF tiene {len(paginas)} páginas (máximo {max_paginas})')
+        for numero, page in enumerate(paginas, start=1):
+            try:
+                texto, error = page.extract_text() or '', None
+            except Exception as e:
+                # Una página dañada no invalida el resto del documento
+                texto, error = None, e
+            # Libera los objetos de la página ya leída
+            page.close()
+            if texto is None:
+                yield {'page': numero, 'error': f'No se pudo extraer el texto: {error}'}, None
+            elif texto.strip():
+                yield {'page': numero}, texto
+
+
+def _parrafos_docx(archivo):
+    from docx import Document
+
+    try:
+        doc = Document(archivo)
+    except Exception as e:
+        raise ArchivoNoLegible(f'No se pudo leer el DOCX: {e}') from e
+    for para in doc.paragraphs:
+        yield para.text
+
+
+def iterar_fragmentos(archivo, nombre, max_paginas=None, caracteres_por_bloque=CARACTERES_POR_BLOQUE):
+    """Devuelve (posición, texto) por cada página de un PDF o bloque de párrafos de DOCX/TXT.
+
+    archivo es un archivo binario abierto (p. ej. un UploadedFile de Django) y nombre
+    decide el formato por su extensión. posición es {'page': n} o
+    {'paragraphs': [primero, último]}. Una página de PDF que no se puede extraer se
+    devuelve con texto None y el motivo en posición['error'], para que el llamador
+    la salte e informe de ella. Lanza ArchivoNoLegible si el formato no está
+    soportado o, al empezar a iterar, si el archivo está dañado; y LimiteExcedido si
+    un PDF tiene más de max_paginas páginas (antes de extraer ninguna).
+    """
+    extension = os.path.splitext(nombre.lower())[1]
+    if extension == '.pdf':
+        return _paginas_pdf(archivo, max_paginas)
+    if extension == '.docx':
+        return _agrupar_parrafos(_parrafos_docx(archivo), caracteres_por_bloque)
+    if extension == '.txt':
+        return _agrupar_parrafos(_parrafos_txt(archivo), caracteres_por_bloque)
+    raise ArchivoNoLegible(f"Formato no soportado: usa {', '.join(EXTENSIONES)}")
@@ -0,0 +1,191 @@
+"""
+Identificación de idioma por n-gramas de caracteres, sin dependencias más allá de numpy
+
+Los perfiles (perfiles_idioma.npz) guardan, para el vocabulario de n-gramas de 1 a 3
+caracteres de cada idioma, el hash de 64 bits del n-grama y su log-probabilidad en
+cada idioma. Se generan una sola vez a partir de los perfiles de langdetect:
+
+    python idioma.py --idiomas en,es,pt,fr,it,de,ca,nl
+
+Para detectar, los textos de un lote se concatenan en un solo array de puntos de
+código y los n-gramas, los hashes y las puntuaciones (Naive Bayes) se calculan con
+operaciones de numpy, sin bucles por carácter. El resultado es determinista.
+"""
+import argparse
+import json
+import os
+import threading
+
+import numpy as np
+
+RUTA_PERFILES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'perfiles_idioma.npz')
+
+MAX_CARACTERES = 1000
+N_MAX = 3
+ESPACIO = 32
+
+_PRIMO = np.uint64(0x100000001B3)
+# Los puntos de código a partir de aquí se consideran letras sin consultar la tabla
+_LIMITE_TABLA = 0x3000
+_ES_LETRA = np.array([chr(i).isalpha() for i in range(_LIMITE_TABLA)], dtype=bool)
+
+
+def _normalizar(codigos):
+    """Cambia lo que no es letra por espacios (codigos es un array uint32 que se modifica)"""
+    tabla = codigos < _LIMITE_TABLA
+    no_letra = np.zeros(len(codigos), dtype=bool)
+    no_letra[tabla] = ~_ES_LETRA[codigos[tabla]]
+    codigos[no_letra] = ESPACIO
+    return codigos
+
+
+def _hashes(codigos, n):
+    """Hash de 64 bits de cada n-grama que empieza en cada posición de codigos"""
+    h = np.full(len(codigos) - n + 1, n, dtype=np.uint64)
+    for k in range(n):
+        h = (h * _PRIMO) ^ codigos[k:len(codigos) - n + 1 + k].astype(np.uint64)
+    return h
+
+
+def hash_ngrama(ngrama):
+    codigos = _normalizar(np.frombuffer(ngrama.lower().encode('utf-32-le'), dtype=np.uint32).copy())
+    return int(_hashes(codigos, len(ngrama))[0])
+
+
+def extraer_ngramas(textos, max_caracteres=MAX_CARACTERES):
+    """Hashes de los n-gramas (1 a N_MAX) de todos los textos y el índice del texto de cada uno.
+
+    Cada texto se pasa a minúsculas, se recorta a max_caracteres, lo que no es letra se
+    cambia por un espacio y los espacios seguidos se reducen a uno, como al generar los perfiles.
+    """
+    piezas = [' ' + (t if isinstance(t, str) else '')[:max_caracteres].lower() + ' ' for t in textos]
+    longitudes = np.fromiter((len(p) for p in piezas), dtype=np.int64, count=len(piezas))
+    codigos = _normalizar(np.frombuffer(''.join(piezas).encode('utf-32-le'), dtype=np.uint32).copy())
+    ids = np.repeat(np.arange(len(piezas)), longitudes)
+
+    # Reducir espacios seguidos dentro de cada texto
+    repetido = np.zeros(len(codigos), dtype=bool)
+    repetido[1:] = (codigos[1:] == ESPACIO) & (codigos[:-1] == ESPACIO) & (ids[1:] == ids[:-1])
+    codigos, ids = codigos[~repetido], ids[~repetido]
+
+    hashes, pertenece = [], []
+    for n in range(1, N_MAX + 1):
+        if len(codigos) < n:
+            break
+        h = _hashes(codigos, n)
+        valido = ids[:len(h)] == ids[n - 1:]
+        if n == 1:
+            valido &= codigos != ESPACIO
+        hashes.append(h[valido])
+        pertenece.append(ids[:len(h)][valido])
+    if not hashes:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(hashes), np.concatenate(pertenece)
+
+
+class IdentificadorIdioma:
+    """Clasificador Naive Bayes de idioma sobre los perfiles compactos de perfiles_idioma.npz"""
+
+    def __init__(self, ruta=RUTA_PERFILES):
+        with np.load(ruta) as datos:
+            self.idiomas = [str(i) for i in datos['idiomas']]
+            self.hashes = datos['hashes']
+            self.log_probs = datos['log_probs'].astype(np.float32)
+
+    def puntuaciones(self, textos, max_caracteres=MAX_CARACTERES):
+        """Devuelve (log-verosimilitud por texto e idioma, n-gramas conocidos por texto)"""
+        hashes, ids = extraer_ngramas(textos, max_caracteres)
+        posiciones = np.minimum(np.searchsorted(self.hashes, hashes), len(self.hashes) - 1)
+        conocido = self.hashes[posiciones] == hashes
+        posiciones, ids = posiciones[conocido], ids[conocido]
+        puntuaciones = np.stack([np.bincount(ids, weights=self.log_probs[posiciones, j], minlength=len(textos))
+                                 for j in range(len(self.idiomas))], axis=1)
+        return puntuaciones, np.bincount(ids, minlength=len(textos))
+
+    def probabilidades(self, textos, max_caracteres=MAX_CARACTERES):
+        """Probabilidad de cada idioma por texto (filas de ceros si no hay n-gramas conocidos)"""
+        puntuaciones, conocidos = self.puntuaciones(textos, max_caracteres)
+        probs = np.exp(puntuaciones - puntuaciones.max(axis=1, keepdims=True))
+        probs /= probs.sum(axis=1, keepdims=True)
+        probs[conocidos == 0] = 0.0
+        return probs
+
+    def detectar_lote(self, textos, default='desconocido', candidatos=None, max_caracteres=MAX_CARACTERES):
+        """Código de idioma ('es', 'en', ...) de cada texto, o default si no hay evidencia.
+
+        candidatos limita la elección a unos idiomas, p. ej. ('es', 'en') para decidir
+        solo entre español e inglés sin confundir textos cortos con portugués o catalán.
+        """
+        puntuaciones, conocidos = self.puntuaciones(textos, max_caracteres)
+        idiomas = np.asarray(self.idiomas, dtype=object)
+        if candidatos is not None:
+            columnas = [self.idiomas.index(c) for c in candidatos]
+            puntuaciones, idiomas = puntuaciones[:, columnas], idiomas[columnas]
+        mejores = idiomas[puntuaciones.argmax(axis=1)]
+        mejores[conocidos == 0] = default
+        return mejores.tolist()
+
+    def detectar(self, texto, default='desconocido', candidatos=None):
+        return self.detectar_lote([texto], default, candidatos)[0]
+
+
+_identificador = None
+_lock = threading.Lock()
+
+
+def identificador():
+    """Instancia compartida, cargada la primera vez que se usa"""
+    global _identificador
+    if _identificador is None:
+        with _lock:
+            if _identificador is None:
+                _identificador = IdentificadorIdioma()
+    return _identificador
+
+
+def detectar_idioma(texto, default='desconocido', candidatos=None):
+    return identificador().detectar(texto, default, candidatos)
+
+
+def detectar_idiomas(textos, default='desconocido', candidatos=None):
+    return identificador().detectar_lote(textos, default, candidatos)
+
+
+def generar_perfiles(idiomas, ruta=RUTA_PERFILES):
+    """Crea perfiles_idioma.npz a partir de los perfiles de n-gramas que trae langdetect"""
+    import langdetect
+
+    carpeta = os.path.join(os.path.dirname(langdetect.__file__), 'profiles')
+    frecuencias = []
+    for idioma in idiomas:
+        with open(os.path.join(carpeta, idioma), encoding='utf-8') as f:
+            perfil = json.load(f)
+        totales = perfil['n_words']
+        conteos = {}
+        for ngrama, conteo in perfil['freq'].items():
+            if 1 <= len(ngrama) <= N_MAX:
+                clave = (hash_ngrama(ngrama), len(ngrama))
+                conteos[clave] = conteos.get(clave, 0) + conteo
+        frecuencias.append((conteos, totales))
+
+    vocabulario = sorted({clave for conteos, _ in frecuencias for clave in conteos})
+    log_probs = np.empty((len(vocabulario), len(idiomas)), dtype=np.float32)
+    for j, (conteos, totales) in enumerate(frecuencias):
+        # Los perfiles solo guardan los n-gramas frecuentes: a los ausentes se les da
+        # la mitad de la frecuencia mínima de su longitud en ese idioma
+        minimos = {n: min((c for (_, m), c in conteos.items() if m == n), default=1) / 2 for n in range(1, N_MAX + 1)}
+        for i, (h, n) in enumerate(vocabulario):
+            log_probs[i, j] = np.log(conteos.get((h, n), minimos[n]) / totales[n - 1])
+
+    np.savez_compressed(ruta, idiomas=np.array(idiomas), hashes=np.array([h for h, _ in vocabulario], dtype=np.uint64),
+                        log_probs=log_probs.astype(np.float16))
+    print(f'{len(vocabulario)} n-gramas de {len(idiomas)} idiomas guardados en {ruta} '
+          f'({os.path.getsize(ruta) / 1024:.0f} KiB)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Genera los perfiles compactos de idioma desde langdetect')
+    parser.add_argument('--idiomas', default='en,es,pt,fr,it,de,ca,nl', help='códigos de idioma separados por comas')
+    parser.add_argument('--salida', default=RUTA_PERFILES, help='archivo .npz de salida')
+    args = parser.parse_args()
+    generar_perfiles(args.idiomas.split(','), args.salida)
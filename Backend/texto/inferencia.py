@@ -0,0 +1,173 @@
+"""
+Inferencia con el modelo BERT entrenado por entrenamiento_modelo.py (carpeta modelo_binario)
+
+predecir_lote clasifica textos truncados a max_length tokens, como en el
+entrenamiento. predecir_documento cubre documentos largos con ventanas solapadas de
+max_length tokens que se clasifican por lotes: el coste crece linealmente con la
+longitud del documento.
+"""
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, List
+
+from .cuantizacion import cargar_cuantizado, es_cuantizado
+from .metricas import ETAPAS, LONGITUD_SECUENCIA, TAMANO_LOTE
+from .preprocesamiento import clean_text, clean_text_con_posiciones
+
+# Mismo mapeo que en entrenamiento_modelo.py: human -> 0, ia -> 1
+ETIQUETAS = {0: 'Humano', 1: 'IA'}
+
+
+class DocumentoVacio(ValueError):
+    """El documento no tiene nada que clasificar después de clean_text"""
+
+
+class DemasiadasVentanas(ValueError):
+    """El documento necesita más ventanas que max_ventanas"""
+
+
+def formatear_resultado(probabilidades: List[float]) -> Dict:
+    """Convierte las probabilidades [humano, ia] en la respuesta de la API"""
+    indice = max(range(len(probabilidades)), key=probabilidades.__getitem__)
+    return {
+        'label': ETIQUETAS[indice],
+        'confidence': round(float(probabilidades[indice]), 4),
+        'human_score': round(float(probabilidades[0]), 4),
+    }
+
+
+def inicios_ventanas(n_tokens: int, longitud: int, solapamiento: int) -> List[int]:
+    """Posición inicial de cada ventana de longitud tokens para cubrir n_tokens.
+
+    Ventanas consecutivas comparten solapamiento tokens; la última se alinea con el
+    final del documento para que no quede una ventana casi vacía.
+    """
+    if not 0 <= solapamiento < longitud:
+        raise ValueError('solapamiento debe estar entre 0 y la longitud de la ventana')
+    paso = longitud - solapamiento
+    inicios = list(range(0, max(n_tokens - longitud, 0) + 1, paso))
+    if inicios[-1] + longitud < n_tokens:
+        inicios.append(n_tokens - longitud)
+    return inicios
+
+
+def version_modelo(model_dir) -> str:
+    """Hash de los nombres, tamaños y fechas de modificación de los archivos del modelo"""
+    h = hashlib.sha256()
+    model_dir = str(model_dir)
+    if os.path.isdir(model_dir):
+        for nombre in sorted(os.listdir(model_dir)):
+            ruta = os.path.join(model_dir, nombre)
+            if os.path.isfile(ruta):
+                info = os.stat(ruta)
+                h.update(f'{nombre}\0{info.st_size}\0{info.st_mtime_ns}\0'.encode('utf-8'))
+    return h.hexdigest()[:16]
+
+
+class Predictor:
+    """Carga el tokenizador y el modelo de modelo_binario y predice lotes de textos"""
+
+    def __init__(self, model_dir, max_length: int = 256):
+        self.model_dir = str(model_dir)
+        self.max_length = max_length
+        self.tokenizer = None
+        self.model = None
+        # Versión de los archivos cargados (la de modelo_binario en el momento de cargar)
+        self.version = None
+        self._lock = threading.Lock()
+
+    def cargar(self):
+        """Carga el modelo una sola vez (torch y transformers se importan aquí)"""
+        with self._lock:
+            if self.model is not None:
+                return
+            from transformers import AutoTokenizer, BertForSequenceClassification
+
+            version = version_modelo(self.model_dir)
+            self.tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+            if es_cuantizado(self.model_dir):
+                # Exportación int8 de cuantizacion.py
+                model = cargar_cuantizado(self.model_dir)
+            else:
+                model = BertForSequenceClassification.from_pretrained(self.model_dir)
+            model.eval()
+            self.model = model
+            self.version = version
+
+    def predecir_lote(self, textos: List[str]) -> List[Dict]:
+        """Limpia, tokeniza y clasifica todos los textos en una sola pasada del modelo"""
+        import torch
+
+        self.cargar()
+        with ETAPAS.cronometro('limpieza'):
+            limpios = [clean_text(t) for t in textos]
+        with ETAPAS.cronometro('tokenizacion'):
+            encodings = self.tokenizer(limpios, truncation=True, padding=True,
+                                       max_length=self.max_length, return_tensors='pt')
+        TAMANO_LOTE.observar(len(limpios), 'textos')
+        LONGITUD_SECUENCIA.observar(encodings['input_ids'].shape[1], 'textos')
+        with ETAPAS.cronometro('modelo'), torch.inference_mode():
+            logits = self.model(**encodings).logits
+        with ETAPAS.cronometro('postproceso'):
+            probabilidades = torch.softmax(logits, dim=-1).tolist()
+            return [formatear_resultado(p) for p in probabilidades]
+
+    def predecir_documento(self, texto: str, solapamiento: int = 64, ventanas_por_lote: int = 16,
+                           max_ventanas: int = None) -> Dict:
+        """Clasifica un documento de cualquier longitud con ventanas solapadas.
+
+        La puntuación del documento es la media de las probabilidades de las
+        ventanas, ponderada por sus tokens. 'windows' trae la de cada ventana con su
+        tramo (start, end) en el texto original, para resaltarlo. Si el documento
+        necesita más de max_ventanas ventanas se lanza DemasiadasVentanas sin pasar por
+        el modelo, y DocumentoVacio si no queda texto tras la limpieza (sin cargarlo).
+        """
+        import torch
+
+        with ETAPAS.cronometro('limpieza'):
+            limpio, posiciones = clean_text_con_posiciones(texto)
+        if not limpio:
+            raise DocumentoVacio('El documento no contiene texto que clasificar')
+        self.cargar()
+        with ETAPAS.cronometro('tokenizacion'):
+            encoding = self.tokenizer(limpio, add_special_tokens=False, truncation=False, verbose=False,
+                                      return_offsets_mapping=self.tokenizer.is_fast)
+        ids = encoding['input_ids']
+        if not ids:
+            raise DocumentoVacio('El documento no contiene texto que clasificar')
+        # Cada ventana es [CLS] + tokens + [SEP], como las entradas del entrenamiento
+        cls, sep = self.tokenizer.cls_token_id, self.tokenizer.sep_token_id
+        longitud = self.max_length - 2
+        inicios = inicios_ventanas(len(ids), longitud, solapamiento)
+        if max_ventanas is not None and len(inicios) > max_ventanas:
+            raise DemasiadasVentanas(f'El documento necesita {len(inicios)} ventanas (máximo {max_ventanas})')
+
+        probabilidades = []
+        for i in range(0, len(inicios), ventanas_por_lote):
+            lote = [[cls] + ids[inicio:inicio + longitud] + [sep]
+                    for inicio in inicios[i:i + ventanas_por_lote]]
+            encodings = self.tokenizer.pad({'input_ids': lote}, return_tensors='pt')
+            TAMANO_LOTE.observar(len(lote), 'ventanas')
+            LONGITUD_SECUENCIA.observar(encodings['input_ids'].shape[1], 'ventanas')
+            with ETAPAS.cronometro('modelo'), torch.inference_mode():
+                logits = self.model(**encodings).logits
+            probabilidades.extend(torch.softmax(logits, dim=-1).tolist())
+
+        inicio_postproceso = time.perf_counter()
+        ventanas = []
+        pesos = [max(min(longitud, len(ids) - inicio), 1) for inicio in inicios]
+        for inicio, p in zip(inicios, probabilidades):
+            ventana = formatear_resultado(p)
+            if 'offset_mapping' in encoding:
+                fin = min(inicio + longitud, len(ids)) - 1
+                # Del tramo en el texto limpio al tramo en el texto original
+                ventana['start'] = posiciones[encoding['offset_mapping'][inicio][0]]
+                ventana['end'] = posiciones[encoding['offset_mapping'][fin][1] - 1] + 1
+            ventanas.append(ventana)
+
+        media = [sum(w * p[k] for w, p in zip(pesos, probabilidades)) / sum(pesos)
+                 for k in range(len(probabilidades[0]))]
+        ETAPAS.observar(time.perf_counter() - inicio_postproceso, 'postproceso')
+        return dict(formatear_resultado(media), tokens=len(ids), windows=ventanas)
@@ -0,0 +1,351 @@
+"""
+Benchmark reproducible del pipeline de texto y del camino de inferencia
+
+Mide sobre un corpus sintético (misma semilla, mismos textos en cada ejecución):
+clean_text / clean_texts, la extracción de load_and_label sobre archivos .txt y
+.docx temporales, la tokenización, la latencia (p50/p95/p99) y el rendimiento de la
+inferencia de uno en uno y por lotes, y el pipeline de traducción con el traductor
+falso (sin red). Escribe el resultado en JSON para comparar entre commits:
+
+    python manage.py benchmark_texto --output bench_antes.json
+    python manage.py benchmark_texto --output bench_despues.json --comparar bench_antes.json
+
+Si no hay modelo en --model-dir (TEXTO_MODELO_DIR por defecto) las partes de
+tokenización e inferencia se marcan como omitidas.
+"""
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+_TEXTO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Incrementar si cambia el corpus sintético o qué se mide: los JSON de otra versión no son comparables
+VERSION_BENCHMARK = 1
+
+PALABRAS = ['the', 'essay', 'students', 'should', 'car', 'Venus', 'however', 'because', 'technology',
+            'school', 'online', 'classes', 'people', 'would', 'think', 'important', 'also', 'many',
+            'también', 'educación', 'niños', 'año', 'e-mail', '2023', "It's", 'ÁRBOL', 'well-being',
+            '(1)', 'ok!', '"quoted"', 'community', 'advice', 'summer', 'project', 'driverless']
+
+# Sufijos de las métricas en las que un valor mayor es mejor (en el resto, menor es mejor)
+_MAYOR_ES_MEJOR = ('por_segundo',)
+
+
+def corpus_sintetico(n, semilla=42, palabras_min=50, palabras_max=600):
+    """n ensayos con oraciones y párrafos de longitud variable (deterministas por semilla)"""
+    rng = random.Random(semilla)
+    ensayos = []
+    for _ in range(n):
+        oraciones = []
+        for _ in range(rng.randint(palabras_min, palabras_max) // 15 + 1):
+            palabras = rng.choices(PALABRAS, k=rng.randint(6, 24))
+            oraciones.append(' '.join(palabras).capitalize() + rng.choice('..!?'))
+        parrafos = [' '.join(oraciones[i:i + 5]) for i in range(0, len(oraciones), 5)]
+        ensayos.append('\n\n'.join(parrafos))
+    return ensayos
+
+
+def percentiles_ms(tiempos):
+    ms = np.asarray(tiempos) * 1000
+    return {'p50_ms': round(float(np.percentile(ms, 50)), 3),
+            'p95_ms': round(float(np.percentile(ms, 95)), 3),
+            'p99_ms': round(float(np.percentile(ms, 99)), 3)}
+
+
+def medir(funcion, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = funcion(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+
+def por_segundo(n, segundos):
+    return round(n / segundos, 2) if segundos > 0 else None
+
+
+def bench_limpieza(textos, workers):
+    from ...preprocesamiento import clean_text, clean_texts
+
+    referencia, t_uno = medir(lambda: [clean_text(t) for t in textos])
+    vectorizado, t_vec = medir(clean_texts, textos)
+    if vectorizado != referencia:
+        raise CommandError('clean_texts no coincide con clean_text')
+    resultado = {'textos': len(textos),
+                 'clean_text_textos_por_segundo': por_segundo(len(textos), t_uno),
+                 'clean_texts_textos_por_segundo': por_segundo(len(textos), t_vec)}
+    if workers > 1:
+        _, t_multi = medir(clean_texts, textos, workers=workers, chunk_size=max(1, len(textos) // workers))
+        resultado['clean_texts_multiproceso_textos_por_segundo'] = por_segundo(len(textos), t_multi)
+    return resultado
+
+
+def bench_extraccion(textos, workers):
+    from docx import Document
+
+    from combinar_datos import iter_load_and_label, load_and_label
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        for i, texto in enumerate(textos):
+            if i % 4 == 3:
+                doc = Document()
+                for parrafo in texto.split('\n\n'):
+                    doc.add_paragraph(parrafo)
+                doc.save(os.path.join(carpeta, f'ensayo_{i}.docx'))
+            else:
+                with open(os.path.join(carpeta, f'ensayo_{i}.txt'), 'w', encoding='utf-8') as f:
+                    f.write(texto)
+        registros, t_seq = medir(load_and_label, carpeta, 'human')
+        resultado = {'archivos': len(textos), 'docx': len(textos) // 4,
+                     'load_and_label_archivos_por_segundo': por_segundo(len(registros), t_seq)}
+        if workers > 1:
+            paralelo, t_par = medir(lambda: list(iter_load_and_label(carpeta, 'human', workers=workers)))
+            resultado['iter_load_and_label_archivos_por_segundo'] = por_segundo(len(paralelo), t_par)
+    if len(registros) != len(textos):
+        raise CommandError(f'load_and_label devolvió {len(registros)} de {len(textos)} archivos')
+    return resultado
+
+
+def bench_tokenizacion(predictor, textos, batch_size):
+    from ...preprocesamiento import clean_text
+
+    limpios = [clean_text(t) for t in textos]
+    tokenizer = predictor.tokenizer
+    _, t_uno = medir(lambda: [tokenizer(t, truncation=True, max_length=predictor.max_length) for t in limpios])
+    _, t_lote = medir(lambda: [tokenizer(limpios[i:i + batch_size], truncation=True, padding=True,
+                                         max_length=predictor.max_length, return_tensors='pt')
+                               for i in range(0, len(limpios), batch_size)])
+    longitudes = [len(ids) for ids in tokenizer(limpios, truncation=True, max_length=predictor.max_length)['input_ids']]
+    return {'textos': len(textos), 'tokens_medios': round(float(np.mean(longitudes)), 1),
+            'uno_a_uno_textos_por_segundo': por_segundo(len(textos), t_uno),
+            'por_lotes_textos_por_segundo': por_segundo(len(textos), t_lote)}
+
+
+def bench_inferencia(predictor, textos, batch_size, calentamiento):
+    for i in range(calentamiento):
+        predictor.predecir_lote([textos[i % len(textos)]])
+
+    individuales = []
+    for texto in textos:
+        _, t = medir(predictor.predecir_lote, [texto])
+        individuales.append(t)
+    lotes = []
+    for i in range(0, len(textos), batch_size):
+        _, t = medir(predictor.predecir_lote, textos[i:i + batch_size])
+        lotes.append(t)
+    return {
+        'individual': dict(percentiles_ms(individuales), textos=len(textos),
+                           textos_por_segundo=por_segundo(len(textos), sum(individuales))),
+        'por_lotes': dict(percentiles_ms(lotes), batch_size=batch_size, lotes=len(lotes),
+                          textos_por_segundo=por_segundo(len(textos), sum(lotes))),
+    }
+
+
+def bench_traduccion(textos, latencia, tasa_fallos, concurrencia):
+    from memoria_traduccion import MemoriaTraduccion
+    from traductores import ClienteTraduccion, TraductorFalso
+
+    # Los reintentos eligen la espera al azar: se fija la semilla para repetir los tiempos
+    random.seed(0)
+    cliente = ClienteTraduccion(TraductorFalso(latencia, tasa_fallos), concurrencia=concurrencia, espera_base=0.01)
+    traducciones, t_sin_memoria = medir(cliente.traducir_sync, textos)
+    errores = sum(isinstance(r, Exception) for r in traducciones)
+    resultado = {'textos': len(textos), 'latencia_simulada_s': latencia, 'tasa_fallos': tasa_fallos,
+                 'textos_por_segundo': por_segundo(len(textos), t_sin_memoria),
+                 'peticiones': cliente.estadisticas['peticiones'],
+                 'reintentos': cliente.estadisticas['reintentos'], 'errores': errores}
+
+    # Con memoria de traducción: la primera pasada la llena y la segunda sale de ella
+    with tempfile.TemporaryDirectory() as carpeta:
+        memoria = MemoriaTraduccion(os.path.join(carpeta, 'memoria.sqlite'))
+        try:
+            for pasada in ('memoria_fria', 'memoria_caliente'):
+                cliente = ClienteTraduccion(TraductorFalso(latencia, tasa_fallos), concurrencia=concurrencia,
+                                            espera_base=0.01, memoria=memoria)
+                _, t = medir(cliente.traducir_sync, textos)
+                segmentos = cliente.estadisticas['segmentos']
+                resultado[pasada] = {
+                    'textos_por_segundo': por_segundo(len(textos), t),
+                    'peticiones': cliente.estadisticas['peticiones'],
+                    'aciertos_memoria': round(cliente.estadisticas['segmentos_en_memoria'] / segmentos, 4)
+                    if segmentos else None,
+                }
+        finally:
+            memoria.cerrar()
+    return resultado
+
+
+def anadir_carpeta_scripts(carpeta):
+    """Añade a sys.path una carpeta de scripts con imports planos (combinar_datos.py en
+    texto/, traductores.py en Dataset_traducidos/), como cuando se ejecutan desde ella.
+    Solo se llama antes de medir la parte que los usa."""
+    if carpeta not in sys.path:
+        sys.path.append(carpeta)
+
+
+def commit_actual():
+    try:
+        salida = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=_TEXTO_DIR,
+                                capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return salida.stdout.strip() or None
+
+
+def metricas_planas(resultados, prefijo=''):
+    """{'inferencia.individual.p50_ms': 12.3, ...} con solo los valores numéricos"""
+    planas = {}
+    for clave, valor in resultados.items():
+        nombre = f'{prefijo}{clave}'
+        if isinstance(valor, dict):
+            planas.update(metricas_planas(valor, nombre + '.'))
+        elif isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            planas[nombre] = valor
+    return planas
+
+
+def comparar(actual, anterior, tolerancia):
+    """Cambio relativo de cada métrica de tiempo o rendimiento y las que empeoran más de tolerancia"""
+    if anterior.get('version') != actual['version']:
+        raise CommandError('El JSON de referencia es de otra versión del benchmark')
+    previas = metricas_planas(anterior['resultados'])
+    cambios, regresiones = [], []
+    for nombre, valor in metricas_planas(actual['resultados']).items():
+        mayor_es_mejor = nombre.endswith(_MAYOR_ES_MEJOR)
+        if not (mayor_es_mejor or nombre.endswith('_ms')) or not previas.get(nombre):
+            continue
+        cambio = (valor - previas[nombre]) / previas[nombre]
+        cambios.append((nombre, previas[nombre], valor, cambio))
+        if (-cambio if mayor_es_mejor else cambio) > tolerancia:
+            regresiones.append(nombre)
+    return cambios, regresiones
+
+
+class Command(BaseCommand):
+    help = 'Benchmark del pipeline de texto e inferencia sobre un corpus sintético (salida JSON)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--n', type=int, default=2000, help='ensayos sintéticos para la limpieza')
+        parser.add_argument('--n-archivos', type=int, default=200, help='archivos temporales para load_and_label')
+        parser.add_argument('--n-inferencia', type=int, default=200, help='textos para tokenización e inferencia')
+        parser.add_argument('--n-traduccion', type=int, default=200, help='textos para el traductor falso')
+        parser.add_argument('--semilla', type=int, default=42, help='semilla del corpus sintético')
+        parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1),
+                            help='procesos para clean_texts e iter_load_and_label (1 = sin multiproceso)')
+        parser.add_argument('--model-dir', default=None, help='modelo a medir (TEXTO_MODELO_DIR por defecto)')
+        parser.add_argument('--batch-size', type=int, default=settings.TEXTO_MAX_BATCH_SIZE,
+                            help='textos por lote en tokenización e inferencia')
+        parser.add_argument('--calentamiento', type=int, default=5, help='pasadas del modelo antes de medir')
+        parser.add_argument('--threads', type=int, default=settings.TEXTO_TORCH_THREADS,
+                            help='hilos de torch (por defecto TEXTO_TORCH_THREADS)')
+        parser.add_argument('--latencia-traductor', type=float, default=0.02,
+                            help='segundos por petición del traductor falso')
+        parser.add_argument('--tasa-fallos', type=float, default=0.05,
+                            help='fracción de textos cuyo primer intento de traducción falla')
+        parser.add_argument('--concurrencia', type=int, default=4, help='peticiones de traducción simultáneas')
+        parser.add_argument('--solo', default=None,
+                            help='partes a medir separadas por comas: limpieza,extraccion,tokenizacion,inferencia,traduccion')
+        parser.add_argument('--output', default=None, help='archivo JSON de salida (por defecto, la salida estándar)')
+        parser.add_argument('--comparar', default=None, help='JSON de una ejecución anterior con el que comparar')
+        parser.add_argument('--tolerancia', type=float, default=0.10,
+                            help='empeoramiento relativo permitido al comparar (0.10 = 10%%)')
+
+    def handle(self, *args, **opciones):
+        partes = ['limpieza', 'extraccion', 'tokenizacion', 'inferencia', 'traduccion']
+        if opciones['solo']:
+            pedidas = [p.strip() for p in opciones['solo'].split(',') if p.strip()]
+            desconocidas = set(pedidas) - set(partes)
+            if desconocidas:
+                raise CommandError(f"Partes desconocidas: {', '.join(sorted(desconocidas))}")
+            partes = [p for p in partes if p in pedidas]
+
+        n_max = max(opciones['n'], opciones['n_archivos'], opciones['n_inferencia'], opciones['n_traduccion'])
+        corpus = corpus_sintetico(n_max, semilla=opciones['semilla'])
+        model_dir = str(opciones['model_dir'] or settings.TEXTO_MODELO_DIR)
+        workers = opciones['workers']
+
+        resultados, omitidas = {}, {}
+        predictor = None
+        if 'tokenizacion' in partes or 'inferencia' in partes:
+            from ...inferencia import Predictor
+            from ...registro import fijar_hilos_torch
+
+            fijar_hilos_torch(opciones['threads'])
+            predictor = Predictor(model_dir, max_length=settings.TEXTO_MAX_LENGTH)
+            try:
+                predictor.cargar()
+            except OSError as e:
+                omitidas['tokenizacion'] = omitidas['inferencia'] = f'No se pudo cargar el modelo de {model_dir}: {e}'
+                predictor = None
+
+        for parte in partes:
+            if parte in omitidas:
+                continue
+            self.stderr.write(f'Midiendo {parte}...')
+            if parte == 'limpieza':
+                resultados[parte] = bench_limpieza(corpus[:opciones['n']], workers)
+            elif parte == 'extraccion':
+                anadir_carpeta_scripts(_TEXTO_DIR)
+                resultados[parte] = bench_extraccion(corpus[:opciones['n_archivos']], workers)
+            elif parte == 'tokenizacion':
+                resultados[parte] = bench_tokenizacion(predictor, corpus[:opciones['n_inferencia']],
+                                                       opciones['batch_size'])
+            elif parte == 'inferencia':
+                resultados[parte] = bench_inferencia(predictor, corpus[:opciones['n_inferencia']],
+                                                     opciones['batch_size'], opciones['calentamiento'])
+            elif parte == 'traduccion':
+                anadir_carpeta_scripts(os.path.join(_TEXTO_DIR, 'Dataset_traducidos'))
+                resultados[parte] = bench_traduccion(corpus[:opciones['n_traduccion']],
+                                                     opciones['latencia_traductor'], opciones['tasa_fallos'],
+                                                     opciones['concurrencia'])
+
+        informe = {
+            'version': VERSION_BENCHMARK,
+            'commit': commit_actual(),
+            'fecha': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'entorno': self._entorno(predictor),
+            'parametros': {clave: opciones[clave] for clave in (
+                'n', 'n_archivos', 'n_inferencia', 'n_traduccion', 'semilla', 'workers', 'batch_size',
+                'calentamiento', 'threads', 'latencia_traductor', 'tasa_fallos', 'concurrencia')},
+            'modelo': {'dir': model_dir, 'version': predictor.version if predictor else None,
+                       'max_length': settings.TEXTO_MAX_LENGTH},
+            'resultados': resultados,
+            'omitidas': omitidas,
+        }
+        salida = json.dumps(informe, ensure_ascii=False, indent=2)
+        if opciones['output']:
+            with open(opciones['output'], 'w', encoding='utf-8') as f:
+                f.write(salida + '\n')
+            self.stderr.write(f"Resultados guardados en {opciones['output']}")
+        else:
+            self.stdout.write(salida)
+
+        if opciones['comparar']:
+            with open(opciones['comparar'], encoding='utf-8') as f:
+                anterior = json.load(f)
+            cambios, regresiones = comparar(informe, anterior, opciones['tolerancia'])
+            self.stderr.write(f"\nFrente a {opciones['comparar']} (commit {anterior.get('commit')}):")
+            for nombre, antes, ahora, cambio in cambios:
+                marca = '  <- regresión' if nombre in regresiones else ''
+                self.stderr.write(f'  {nombre:<60} {antes:>12g} -> {ahora:>12g} ({cambio:+.1%}){marca}')
+            if regresiones:
+                raise CommandError(f'{len(regresiones)} métricas empeoran más de un {opciones["tolerancia"]:.0%}')
+
+    @staticmethod
+    def _entorno(predictor):
+        entorno = {'python': platform.python_version(), 'plataforma': platform.platform(),
+                   'cpus': os.cpu_count(), 'numpy': np.__version__}
+        if predictor is not None:
+            import torch
+            import transformers
+
+            entorno.update(torch=torch.__version__, transformers=transformers.__version__,
+                           torch_threads=torch.get_num_threads())
+        return entorno
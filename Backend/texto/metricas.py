@@ -0,0 +1,144 @@
+"""
+Métricas del servicio de inferencia en el formato de texto de Prometheus
+
+Histogramas en memoria del proceso, sin dependencias: observar un valor es una
+búsqueda binaria en los límites y dos sumas bajo un lock, así que se pueden dejar
+activos con carga. Los valores que ya llevan otros objetos (caché, control de
+admisión, cola del micro-batcher) no se duplican: se leen al exponer con
+colectores registrados con registrar_colector.
+
+Cada proceso tiene sus propias métricas: con varios workers de gunicorn o uvicorn
+Prometheus debe leer /metrics de cada uno.
+"""
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Límites en segundos para las etapas del camino de inferencia (de 0,1 ms a 10 s)
+BUCKETS_SEGUNDOS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_LOTE = (1, 2, 4, 8, 16, 32, 64)
+BUCKETS_TOKENS = (16, 32, 64, 128, 192, 256, 384, 512)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _etiquetas(nombres, valores, extra=None):
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+def _numero(valor):
+    if valor == math.inf:
+        return '+Inf'
+    if isinstance(valor, float) and valor.is_integer() and abs(valor) < 1e15:
+        return str(int(valor))
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Histograma:
+    """Distribución de valores en cubetas acumuladas (_bucket, _sum y _count)"""
+
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, buckets, etiquetas=()):
+        self.nombre, self.ayuda, self.etiquetas = nombre, ayuda, tuple(etiquetas)
+        self.buckets = tuple(sorted(buckets))
+        # Por etiquetas: [conteos por cubeta (la última es +Inf), suma]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor, *valores):
+        indice = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][indice] += 1
+            serie[1] += valor
+
+    @contextmanager
+    def cronometro(self, *valores):
+        """Observa los segundos que tarda el bloque with"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, *valores)
+
+    def lineas(self):
+        with self._lock:
+            series = {clave: (list(conteos), suma) for clave, (conteos, suma) in self._series.items()}
+        for clave, (conteos, suma) in sorted(series.items()):
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (math.inf,), conteos):
+                acumulado += conteo
+                le = f'le="{_numero(float(limite))}"'
+                yield f'{self.nombre}_bucket{_etiquetas(self.etiquetas, clave, le)} {acumulado}'
+            yield f'{self.nombre}_sum{_etiquetas(self.etiquetas, clave)} {_numero(suma)}'
+            yield f'{self.nombre}_count{_etiquetas(self.etiquetas, clave)} {acumulado}'
+
+
+class RegistroMetricas:
+    """Conjunto de métricas del proceso y colectores que se leen al exponer"""
+
+    def __init__(self):
+        self._metricas = {}
+        self._colectores = []
+        self._lock = threading.Lock()
+
+    def _registrar(self, metrica):
+        with self._lock:
+            if metrica.nombre in self._metricas:
+                raise ValueError(f'La métrica {metrica.nombre} ya está registrada')
+            self._metricas[metrica.nombre] = metrica
+        return metrica
+
+    def histograma(self, nombre, ayuda, buckets=BUCKETS_SEGUNDOS, etiquetas=()):
+        return self._registrar(Histograma(nombre, ayuda, buckets, etiquetas))
+
+    def registrar_colector(self, colector):
+        """colector() devuelve tuplas (nombre, tipo, ayuda, [(etiquetas, valor), ...]).
+
+        Se llama en cada lectura de /metrics; no debe cargar el modelo ni bloquear.
+        """
+        with self._lock:
+            self._colectores.append(colector)
+
+    def exponer(self):
+        """Todas las métricas en el formato de texto de Prometheus"""
+        with self._lock:
+            metricas = list(self._metricas.values())
+            colectores = list(self._colectores)
+        lineas = []
+        for metrica in metricas:
+            lineas.append(f'# HELP {metrica.nombre} {metrica.ayuda}')
+            lineas.append(f'# TYPE {metrica.nombre} {metrica.tipo}')
+            lineas.extend(metrica.lineas())
+        for colector in colectores:
+            for nombre, tipo, ayuda, muestras in colector():
+                lineas.append(f'# HELP {nombre} {ayuda}')
+                lineas.append(f'# TYPE {nombre} {tipo}')
+                for etiquetas, valor in muestras:
+                    lineas.append(f'{nombre}{_etiquetas(etiquetas.keys(), etiquetas.values())} {_numero(valor)}')
+        return '\n'.join(lineas) + '\n'
+
+
+metricas = RegistroMetricas()
+
+# Etapas del camino de inferencia: limpieza, tokenizacion, espera_cola, modelo y postproceso
+ETAPAS = metricas.histograma('texto_etapa_segundos', 'Segundos por etapa del camino de inferencia',
+                             etiquetas=('etapa',))
+TAMANO_LOTE = metricas.histograma('texto_lote_textos', 'Textos (o ventanas) por pasada del modelo',
+                                  BUCKETS_LOTE, etiquetas=('origen',))
+LONGITUD_SECUENCIA = metricas.histograma('texto_secuencia_tokens', 'Tokens por secuencia tras el padding',
+                                         BUCKETS_TOKENS, etiquetas=('origen',))
+PETICIONES = metricas.histograma('texto_peticion_segundos', 'Segundos por petición de la API',
+                                 etiquetas=('endpoint', 'estado'))
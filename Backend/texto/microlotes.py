@@ -0,0 +1,78 @@
+"""
+Agrupación dinámica de peticiones concurrentes en micro-lotes para el modelo
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """Junta peticiones concurrentes y las procesa en una sola llamada por lote.
+
+    Un hilo de fondo espera la primera petición y luego sigue recogiendo hasta
+    llegar a max_batch_size o hasta que pasen max_wait_ms desde la primera.
+    Si se da observar_espera, se llama con los segundos que cada elemento pasó en
+    la cola antes de entrar en un lote.
+    """
+
+    def __init__(self, procesar_lote, max_batch_size: int = 16, max_wait_ms: float = 10,
+                 observar_espera=None):
+        if max_batch_size < 1:
+            raise ValueError('max_batch_size debe ser al menos 1')
+        self.procesar_lote = procesar_lote
+        self.observar_espera = observar_espera
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._cola = queue.Queue()
+        self._hilo = None
+        self._lock = threading.Lock()
+
+    def enviar(self, item) -> Future:
+        """Encola un elemento y devuelve un Future con su resultado"""
+        self._iniciar()
+        futuro = Future()
+        self._cola.put((item, futuro, time.perf_counter()))
+        return futuro
+
+    def pendientes(self) -> int:
+        """Elementos en la cola que aún no han entrado en un lote"""
+        return self._cola.qsize()
+
+    def _iniciar(self):
+        with self._lock:
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._bucle, name='texto-microlotes', daemon=True)
+                self._hilo.start()
+
+    def _recoger_lote(self):
+        lote = [self._cola.get()]
+        limite = time.monotonic() + self.max_wait_ms / 1000
+        while len(lote) < self.max_batch_size:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                lote.append(self._cola.get(timeout=restante))
+            except queue.Empty:
+                break
+        return lote
+
+    def _bucle(self):
+        while True:
+            recogidos = self._recoger_lote()
+            if self.observar_espera is not None:
+                ahora = time.perf_counter()
+                for _, _, encolado in recogidos:
+                    self.observar_espera(ahora - encolado)
+            lote = [(item, futuro) for item, futuro, _ in recogidos if futuro.set_running_or_notify_cancel()]
+            if not lote:
+                continue
+            try:
+                resultados = self.procesar_lote([item for item, _ in lote])
+            except Exception as e:
+                for _, futuro in lote:
+                    futuro.set_exception(e)
+                continue
+            for (_, futuro), resultado in zip(lote, resultados):
+                futuro.set_result(resultado)
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrediccionCache',
+            fields=[
+                ('clave', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('version_modelo', models.CharField(db_index=True, max_length=64)),
+                ('resultado', models.JSONField()),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'predicción en caché',
+                'verbose_name_plural': 'predicciones en caché',
+            },
+        ),
+    ]
@@ -1,3 +1,23 @@
 from django.db import models
 
 # Create your models here.
+
+
+class PrediccionCache(models.Model):
+    """Segundo nivel de la caché de predicciones (cache_predicciones.py).
+
+    clave es el hash del texto normalizado con clean_text y de la versión del modelo,
+    así que una predicción nunca se reutiliza con otro modelo_binario.
+    """
+
+    clave = models.CharField(max_length=64, primary_key=True)
+    version_modelo = models.CharField(max_length=64, db_index=True)
+    resultado = models.JSONField()
+    creado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'predicción en caché'
+        verbose_name_plural = 'predicciones en caché'
+
+    def __str__(self):
+        return f'{self.clave[:12]} ({self.resultado.get("label")})'
@@ -0,0 +1,160 @@
+"""
+Lotes agrupados por longitud y padding dinámico para entrenamiento_modelo.py
+
+En lugar de rellenar todos los textos hasta el más largo del split, cada lote se
+forma con textos de longitud parecida (cubetas delimitadas por limites) y se
+rellena solo hasta el más largo del lote. Así casi no se gastan FLOPs en padding.
+"""
+import time
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Sampler
+from transformers import Trainer
+
+
+class LengthBucketBatchSampler(Sampler):
+    """Genera lotes de índices cuyos textos caen en la misma cubeta de longitud.
+
+    limites=(64, 128, 192) crea las cubetas [0, 64), [64, 128), [128, 192) y
+    [192, ...). Con shuffle=True se barajan los textos dentro de cada cubeta y el
+    orden de los lotes, con una semilla distinta en cada época; con shuffle=False
+    (evaluación) los lotes salen ordenados por longitud.
+    """
+
+    def __init__(self, lengths, batch_size, limites=(64, 128, 192), shuffle=True, seed=42, drop_last=False):
+        self.lengths = np.asarray(lengths)
+        self.batch_size = batch_size
+        self.limites = sorted(limites)
+        self.shuffle = shuffle
+        self.seed = seed
+        self.drop_last = drop_last
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def _lotes(self):
+        if self.shuffle:
+            rng = np.random.default_rng(self.seed + self.epoch)
+            cubetas = np.digitize(self.lengths, self.limites)
+            grupos = [rng.permutation(np.flatnonzero(cubetas == c)) for c in np.unique(cubetas)]
+        else:
+            grupos = [np.argsort(self.lengths, kind='stable')]
+        lotes = [grupo[i:i + self.batch_size] for grupo in grupos for i in range(0, len(grupo), self.batch_size)]
+        if self.drop_last:
+            lotes = [lote for lote in lotes if len(lote) == self.batch_size]
+        if self.shuffle:
+            lotes = [lotes[i] for i in rng.permutation(len(lotes))]
+        return lotes
+
+    def __iter__(self):
+        lotes = self._lotes()
+        # Si nadie llama a set_epoch, la siguiente pasada usa otro orden igualmente
+        self.epoch += 1
+        for lote in lotes:
+            yield lote.tolist()
+
+    def __len__(self):
+        if self.shuffle:
+            _, tamanos = np.unique(np.digitize(self.lengths, self.limites), return_counts=True)
+        else:
+            tamanos = [len(self.lengths)]
+        if self.drop_last:
+            return int(sum(t // self.batch_size for t in tamanos))
+        return int(sum(-(-t // self.batch_size) for t in tamanos))
+
+
+class PaddingDinamico:
+    """collate_fn que rellena cada lote solo hasta su texto más largo y cuenta el padding"""
+
+    def __init__(self, pad_token_id=0):
+        self.pad_token_id = pad_token_id
+        self.tokens_reales = 0
+        self.tokens_totales = 0
+
+    def __call__(self, items):
+        ancho = max(len(item['input_ids']) for item in items)
+        input_ids = torch.full((len(items), ancho), self.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(items), ancho), dtype=torch.long)
+        for i, item in enumerate(items):
+            n = len(item['input_ids'])
+            input_ids[i, :n] = item['input_ids']
+            attention_mask[i, :n] = item['attention_mask']
+        self.tokens_reales += int(attention_mask.sum())
+        self.tokens_totales += attention_mask.numel()
+        return {
+            'input_ids': input_ids,
+            'attention_mask': attention_mask,
+            'labels': torch.stack([item['labels'] for item in items]),
+        }
+
+    def reiniciar(self):
+        """Devuelve (tokens_reales, tokens_totales) acumulados y pone los contadores a cero"""
+        contadores = (self.tokens_reales, self.tokens_totales)
+        self.tokens_reales = 0
+        self.tokens_totales = 0
+        return contadores
+
+
+def ratio_padding(tokens_reales, tokens_totales):
+    return 1 - tokens_reales / tokens_totales if tokens_totales else 0.0
+
+
+class TrainerPorLongitud(Trainer):
+    """Trainer con lotes por longitud y padding dinámico en entrenamiento y evaluación.
+
+    Los datasets deben exponer un atributo lengths (tokens reales de cada ejemplo)
+    y devolver ejemplos sin rellenar. A los logs se añaden tokens_per_second y
+    padding_ratio (y sus equivalentes eval_*). Los contadores viven en el proceso
+    principal, así que requieren dataloader_num_workers=0 (el valor por defecto).
+    """
+
+    def __init__(self, *args, limites=(64, 128, 192), pad_token_id=0, **kwargs):
+        super().__init__(*args, **kwargs)
+        # BertForSequenceClassification acepta **kwargs pero su pérdida es la media del
+        # lote y no usa num_items_in_batch. Sin esto Trainer no dividiría la pérdida
+        # por los pasos de acumulación y la multiplicaría por el número de procesos.
+        self.model_accepts_loss_kwargs = False
+        self.limites = limites
+        self.padding_train = PaddingDinamico(pad_token_id)
+        self.padding_eval = PaddingDinamico(pad_token_id)
+        self.totales_train = [0, 0]
+        self._ultimo_log = time.perf_counter()
+        self._tiempo_eval = 0.0
+
+    def get_train_dataloader(self):
+        sampler = LengthBucketBatchSampler(self.train_dataset.lengths, self.args.train_batch_size,
+                                           self.limites, shuffle=True, seed=self.args.seed,
+                                           drop_last=self.args.dataloader_drop_last)
+        dataloader = DataLoader(self.train_dataset, batch_sampler=sampler, collate_fn=self.padding_train,
+                                num_workers=self.args.dataloader_num_workers)
+        self._ultimo_log = time.perf_counter()
+        return self.accelerator.prepare(dataloader)
+
+    def get_eval_dataloader(self, eval_dataset=None):
+        if eval_dataset is None or isinstance(eval_dataset, str):
+            eval_dataset = self.eval_dataset if eval_dataset is None else self.eval_dataset[eval_dataset]
+        sampler = LengthBucketBatchSampler(eval_dataset.lengths, self.args.eval_batch_size, shuffle=False)
+        dataloader = DataLoader(eval_dataset, batch_sampler=sampler, collate_fn=self.padding_eval,
+                                num_workers=self.args.dataloader_num_workers)
+        return self.accelerator.prepare(dataloader)
+
+    def log(self, logs, *args, **kwargs):
+        if 'eval_runtime' in logs:
+            reales, totales = self.padding_eval.reiniciar()
+            logs['eval_padding_ratio'] = round(ratio_padding(reales, totales), 4)
+            logs['eval_tokens_per_second'] = round(reales / max(logs['eval_runtime'], 1e-9), 1)
+            self._tiempo_eval += logs['eval_runtime']
+        elif 'loss' in logs or 'train_runtime' in logs:
+            ahora = time.perf_counter()
+            reales, totales = self.padding_train.reiniciar()
+            self.totales_train[0] += reales
+            self.totales_train[1] += totales
+            transcurrido = max(ahora - self._ultimo_log - self._tiempo_eval, 1e-9)
+            if totales:
+                logs['padding_ratio'] = round(ratio_padding(reales, totales), 4)
+                logs['tokens_per_second'] = round(reales / transcurrido, 1)
+            self._ultimo_log = ahora
+            self._tiempo_eval = 0.0
+        super().log(logs, *args, **kwargs)
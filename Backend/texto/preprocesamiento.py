@@ -1,7 +1,32 @@
 import os
-import pandas as pd
 import re
-from typing import List
+from functools import lru_cache
+from multiprocessing import Pool
+from typing import TYPE_CHECKING, Iterable, List, Union
+
+# pandas (y pyarrow) solo se importan al usar clean_texts: registro.py importa este
+# módulo por clean_text y no debe cargarlos al arrancar Django
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Expresión de clean_text, compilada una sola vez
+_NO_PERMITIDOS = re.compile(r'[^a-záéíóúüñ\s]')
+
+# Para clean_texts: los mismos caracteres que \s de Python (str.isspace), escritos
+# explícitamente porque el motor de pyarrow (RE2) solo trata \s como ASCII
+_ESPACIOS_SIN_BLANCO = '\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f\x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000'
+_ESPACIOS = ' ' + _ESPACIOS_SIN_BLANCO
+_PATRON_NO_PERMITIDOS = '[^a-záéíóúüñ' + _ESPACIOS + ']+'
+# Solo se reescriben los tramos que no son ya un único espacio: muchas menos sustituciones
+_PATRON_ESPACIOS = '[' + _ESPACIOS + ']{2,}|[' + _ESPACIOS_SIN_BLANCO + ']'
+
+@lru_cache(maxsize=None)
+def _dtype_texto():
+    try:
+        import pyarrow  # noqa: F401
+        return 'string[pyarrow]'
+    except ImportError:
+        return 'string[python]'
 
 # Funciones para cargar y limpiar textos
 
@@ -15,14 +40,70 @@ def load_texts_from_folder(folder_path: str) -> List[str]:
 
 def clean_text(text: str) -> str:
     text = text.lower()
-    text = re.sub(r'[^a-záéíóúüñ\s]', '', text)
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = _NO_PERMITIDOS.sub('', text)
+    # Equivale a re.sub(r'\s+', ' ', text).strip(): split() usa la misma definición de espacio
+    text = ' '.join(text.split())
     return text
 
-# Ejemplo de uso
+def clean_text_con_posiciones(text: str):
+    """clean_text(text) y, para cada carácter del resultado, su posición en text.
+
+    Sirve para llevar los tramos del texto limpio (p. ej. las ventanas de
+    Predictor.predecir_documento) de vuelta al texto original.
+    """
+    caracteres, posiciones = [], []
+    for i, c in enumerate(text):
+        for m in c.lower():
+            if _NO_PERMITIDOS.match(m):
+                continue
+            if m.isspace():
+                if not caracteres or caracteres[-1] == ' ':
+                    continue
+                m = ' '
+            caracteres.append(m)
+            posiciones.append(i)
+    if caracteres and caracteres[-1] == ' ':
+        caracteres.pop()
+        posiciones.pop()
+    return ''.join(caracteres), posiciones
+
+def _clean_series(serie: 'pd.Series') -> 'pd.Series':
+    # Con pyarrow cada paso corre en C++ sobre toda la columna
+    return (serie.astype(_dtype_texto())
+            .str.lower()
+            .str.replace(_PATRON_NO_PERMITIDOS, '', regex=True)
+            .str.replace(_PATRON_ESPACIOS, ' ', regex=True)
+            .str.strip())
+
+def clean_texts(textos: Union['pd.Series', Iterable[str]], workers: int = 0,
+                chunk_size: int = 20000) -> Union['pd.Series', List[str]]:
+    """Versión por lotes de clean_text con operaciones vectorizadas de pandas.
+
+    Devuelve una Series (con el mismo índice) si recibe una Series y una lista en
+    otro caso. Con workers > 1 los bloques de chunk_size textos se limpian en un
+    pool de procesos, útil para DataFrames muy grandes. Los valores nulos se
+    mantienen nulos. Es mucho más rápida si pyarrow está instalado.
+    """
+    import pandas as pd
+
+    es_serie = isinstance(textos, pd.Series)
+    serie = textos if es_serie else pd.Series(list(textos), dtype=_dtype_texto())
+    if workers > 1 and len(serie) > chunk_size:
+        bloques = [serie.iloc[i:i + chunk_size] for i in range(0, len(serie), chunk_size)]
+        with Pool(workers) as pool:
+            limpia = pd.concat(pool.map(_clean_series, bloques))
+    else:
+        limpia = _clean_series(serie)
+    return limpia if es_serie else limpia.tolist()
+
+# Ejemplo de uso (con --parquet guarda human_texts_cleaned.parquet)
 if __name__ == "__main__":
+    import sys
+    import pandas as pd
+    from almacen_datos import guardar_dataset
+
     folder = "./data/human"
     texts = load_texts_from_folder(folder)
-    cleaned_texts = [clean_text(t) for t in texts]
+    cleaned_texts = clean_texts(texts)
     df = pd.DataFrame({'text': cleaned_texts, 'label': 'human'})
-    df.to_csv('human_texts_cleaned.csv', index=False)
+    guardar_dataset(df, 'human_texts_cleaned.parquet' if '--parquet' in sys.argv else 'human_texts_cleaned.csv')
@@ -0,0 +1,287 @@
+"""
+Registro de modelos del proceso: el tokenizador y el modelo de modelo_binario se
+cargan una sola vez por proceso. Backend/wsgi.py y Backend/asgi.py llaman a
+precargar_servidor al arrancar el servidor; el resto de procesos (migrate, check,
+tests...) los cargan en la primera petición si llegan a necesitarlos.
+
+Este módulo no importa torch, transformers, pandas ni joblib; solo lo hacen el
+camino de inferencia y los métodos que los usan.
+"""
+import logging
+import threading
+
+from django.conf import settings
+
+from .admision import ControlAdmision
+from .cache_predicciones import CachePredicciones
+from .inferencia import DemasiadasVentanas, DocumentoVacio, Predictor, formatear_resultado
+from .metricas import ETAPAS, metricas
+from .microlotes import MicroBatcher
+from .preprocesamiento import clean_text
+
+logger = logging.getLogger(__name__)
+
+TEXTO_CALENTAMIENTO = 'texto de calentamiento para el modelo'
+
+
+def fijar_hilos_torch(num_threads=None, num_interop_threads=None):
+    """Fija el número de hilos de torch antes de la primera pasada del modelo"""
+    import torch
+
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    if num_interop_threads:
+        try:
+            torch.set_num_interop_threads(num_interop_threads)
+        except RuntimeError:
+            # Solo se puede fijar una vez y antes de cualquier trabajo en paralelo
+            logger.warning('No se pudo fijar num_interop_threads: torch ya está en uso')
+
+
+class RegistroModelos:
+    """Mantiene el predictor y el micro-batcher compartidos por todo el proceso"""
+
+    def __init__(self):
+        self._predictor = None
+        self._batcher = None
+        self._cache = None
+        self._admision = None
+        self._caracteristicas = None
+        self._filtro = None
+        # Textos de predict-text resueltos por cada etapa de la cascada
+        self._etapas = {'tfidf': 0, 'bert': 0}
+        # Predicciones en curso por clave: envíos simultáneos del mismo texto esperan a la misma
+        self._en_curso = {}
+        self._lock = threading.Lock()
+
+    @property
+    def predictor(self) -> Predictor:
+        with self._lock:
+            if self._predictor is None:
+                model_dir = (settings.TEXTO_MODELO_INT8_DIR if settings.TEXTO_MODELO_CUANTIZADO
+                             else settings.TEXTO_MODELO_DIR)
+                self._predictor = Predictor(model_dir, max_length=settings.TEXTO_MAX_LENGTH)
+            return self._predictor
+
+    @property
+    def batcher(self) -> MicroBatcher:
+        predictor = self.predictor
+        with self._lock:
+            if self._batcher is None:
+                self._batcher = MicroBatcher(predictor.predecir_lote,
+                                             max_batch_size=settings.TEXTO_MAX_BATCH_SIZE,
+                                             max_wait_ms=settings.TEXTO_MAX_WAIT_MS,
+                                             observar_espera=lambda segundos: ETAPAS.observar(segundos, 'espera_cola'))
+            return self._batcher
+
+    @property
+    def admision(self) -> ControlAdmision:
+        """Pool de hilos y límite de peticiones en curso de las vistas asíncronas"""
+        with self._lock:
+            if self._admision is None:
+                self._admision = ControlAdmision(max_en_curso=settings.TEXTO_MAX_EN_CURSO,
+                                                 max_workers=settings.TEXTO_WORKERS_INFERENCIA,
+                                                 retry_after=settings.TEXTO_RETRY_AFTER)
+            return self._admision
+
+    @property
+    def caracteristicas(self):
+        """Motor de características estilométricas (carga el modelo de perplejidad si hay)"""
+        from .caracteristicas import MotorCaracteristicas
+
+        with self._lock:
+            if self._caracteristicas is None:
+                self._caracteristicas = MotorCaracteristicas(settings.TEXTO_MODELO_PERPLEJIDAD,
+                                                             settings.TEXTO_CACHE_CARACTERISTICAS,
+                                                             max_length=settings.TEXTO_MAX_LENGTH)
+            return self._caracteristicas
+
+    @property
+    def filtro(self):
+        """Filtro TF-IDF de la cascada (None si TEXTO_CASCADA es False o no se pudo cargar)"""
+        if not settings.TEXTO_CASCADA:
+            return None
+        with self._lock:
+            if self._filtro is None:
+                from .cascada import FiltroTfidf
+
+                try:
+                    self._filtro = FiltroTfidf.cargar(settings.TEXTO_FILTRO_TFIDF, banda=settings.TEXTO_CASCADA_BANDA)
+                except (OSError, ValueError) as e:
+                    logger.warning('Cascada desactivada, no se pudo cargar %s: %s', settings.TEXTO_FILTRO_TFIDF, e)
+                    self._filtro = False
+            return self._filtro or None
+
+    def estadisticas_cascada(self):
+        with self._lock:
+            return dict(self._etapas)
+
+    @property
+    def cache(self):
+        """Caché de predicciones del modelo cargado (None si TEXTO_CACHE_PREDICCIONES es False)"""
+        if not settings.TEXTO_CACHE_PREDICCIONES:
+            return None
+        predictor = self.predictor
+        # La clave incluye la versión del modelo, que solo se conoce al cargarlo
+        predictor.cargar()
+        with self._lock:
+            if self._cache is None:
+                cache = CachePredicciones(predictor.version, max_entradas=settings.TEXTO_CACHE_MAX_ENTRADAS,
+                                          persistente=settings.TEXTO_CACHE_PERSISTENTE)
+                borradas = cache.purgar_otras_versiones()
+                if borradas:
+                    logger.info('Borradas %d predicciones en caché de modelos anteriores', borradas)
+                self._cache = cache
+            return self._cache
+
+    def estadisticas_cache(self):
+        """Estadísticas de la caché de predicciones sin cargar el modelo: ceros si aún no
+        se ha creado (None si TEXTO_CACHE_PREDICCIONES es False)"""
+        if not settings.TEXTO_CACHE_PREDICCIONES:
+            return None
+        with self._lock:
+            cache = self._cache
+        if cache is None:
+            return CachePredicciones(version=None, persistente=False).estadisticas()
+        return cache.estadisticas()
+
+    def predecir(self, texto):
+        """Predicción de un texto: del filtro TF-IDF si la cascada está activa y el filtro
+        está seguro; si no, de la caché si ya se clasificó o del micro-batcher"""
+        filtro = self.filtro
+        if filtro is not None:
+            with ETAPAS.cronometro('filtro_tfidf'):
+                probabilidad, escalar = filtro.decidir([clean_text(texto)])
+            etapa = 'bert' if escalar[0] else 'tfidf'
+            with self._lock:
+                self._etapas[etapa] += 1
+            if etapa == 'tfidf':
+                ia = float(probabilidad[0])
+                return dict(formatear_resultado([1 - ia, ia]), stage=etapa)
+            return dict(self._predecir_bert(texto), stage=etapa)
+        return self._predecir_bert(texto)
+
+    def _predecir_bert(self, texto):
+        cache = self.cache
+        if cache is None:
+            return self.batcher.enviar(texto).result()
+        clave = cache.clave(clean_text(texto))
+        encontrado = cache.obtener([clave])
+        if clave in encontrado:
+            return encontrado[clave]
+        batcher = self.batcher
+        with self._lock:
+            futuro = self._en_curso.get(clave)
+            propio = futuro is None
+            if propio:
+                futuro = self._en_curso[clave] = batcher.enviar(texto)
+        if not propio:
+            return futuro.result()
+        try:
+            resultado = futuro.result()
+        finally:
+            with self._lock:
+                self._en_curso.pop(clave, None)
+        cache.guardar({clave: resultado})
+        return resultado
+
+    def predecir_documento(self, texto):
+        """Predicción de un documento largo por ventanas (no pasa por el micro-batcher:
+        sus ventanas ya forman lotes de TEXTO_VENTANAS_POR_LOTE)"""
+        return self.predictor.predecir_documento(texto, solapamiento=settings.TEXTO_VENTANA_SOLAPAMIENTO,
+                                                 ventanas_por_lote=settings.TEXTO_VENTANAS_POR_LOTE,
+                                                 max_ventanas=settings.TEXTO_MAX_VENTANAS)
+
+    def analizar_archivo(self, archivo, nombre):
+        """Extrae y clasifica un PDF/DOCX/TXT fragmento a fragmento (páginas o bloques de
+        párrafos), sin tener el documento entero en memoria.
+
+        La puntuación del archivo es la media de los fragmentos ponderada por sus
+        tokens. Las páginas que no se pudieron extraer se saltan y se devuelven en
+        'skipped'. Lanza LimiteExcedido si el PDF tiene más de TEXTO_MAX_PAGINAS páginas o
+        el documento necesita más de TEXTO_MAX_VENTANAS ventanas en total.
+        """
+        from .extraccion import ArchivoNoLegible, LimiteExcedido, iterar_fragmentos
+
+        predictor = self.predictor
+        restantes = settings.TEXTO_MAX_VENTANAS
+        fragmentos, omitidos, tokens, suma_humano = [], [], 0, 0.0
+        for posicion, texto in iterar_fragmentos(archivo, nombre, max_paginas=settings.TEXTO_MAX_PAGINAS):
+            if texto is None:
+                omitidos.append(posicion)
+                continue
+            try:
+                resultado = predictor.predecir_documento(texto, solapamiento=settings.TEXTO_VENTANA_SOLAPAMIENTO,
+                                                         ventanas_por_lote=settings.TEXTO_VENTANAS_POR_LOTE,
+                                                         max_ventanas=restantes)
+            except DocumentoVacio:
+                # Página o bloque sin texto tras la limpieza (solo números, símbolos...)
+                continue
+            except DemasiadasVentanas:
+                raise LimiteExcedido(f'El documento necesita más de {settings.TEXTO_MAX_VENTANAS} ventanas') from None
+            restantes -= len(resultado.pop('windows'))
+            tokens += resultado['tokens']
+            suma_humano += max(resultado['tokens'], 1) * resultado['human_score']
+            fragmentos.append(dict(posicion, **resultado))
+        if not fragmentos:
+            if omitidos:
+                raise ArchivoNoLegible('No se pudo extraer el texto de ninguna página')
+            raise ArchivoNoLegible('El archivo no contiene texto')
+        humano = suma_humano / sum(max(f['tokens'], 1) for f in fragmentos)
+        return dict(formatear_resultado([humano, 1 - humano]), tokens=tokens, fragments=fragmentos,
+                    skipped=omitidos)
+
+    def colector_metricas(self):
+        """Métricas para /metrics de lo que ya esté creado (no carga el modelo)"""
+        with self._lock:
+            predictor, batcher, cache, admision = self._predictor, self._batcher, self._cache, self._admision
+            etapas = dict(self._etapas)
+        cargado = predictor is not None and predictor.model is not None
+        yield ('texto_modelo_cargado', 'gauge', 'Si el modelo está cargado en este proceso (1) o no (0)',
+               [({}, int(cargado))])
+        yield ('texto_cola_pendientes', 'gauge', 'Textos en la cola del micro-batcher esperando lote',
+               [({}, batcher.pendientes() if batcher is not None else 0)])
+        if admision is not None:
+            estadisticas = admision.estadisticas()
+            yield ('texto_admision_en_curso', 'gauge', 'Peticiones admitidas en cola o en el modelo',
+                   [({}, estadisticas['en_curso'])])
+            yield ('texto_admision_max_en_curso', 'gauge', 'Límite de peticiones en curso (TEXTO_MAX_EN_CURSO)',
+                   [({}, estadisticas['max_en_curso'])])
+            yield ('texto_admision_rechazadas_total', 'counter', 'Peticiones rechazadas con 429',
+                   [({}, estadisticas['rechazadas'])])
+        if cache is not None:
+            estadisticas = cache.estadisticas()
+            yield ('texto_cache_consultas_total', 'counter', 'Consultas a la caché de predicciones por resultado',
+                   [({'resultado': 'acierto_memoria'}, estadisticas['aciertos_memoria']),
+                    ({'resultado': 'acierto_bd'}, estadisticas['aciertos_bd']),
+                    ({'resultado': 'fallo'}, estadisticas['fallos'])])
+            yield ('texto_cache_tasa_aciertos', 'gauge', 'Fracción de consultas a la caché con acierto',
+                   [({}, estadisticas['tasa_aciertos'])])
+            yield ('texto_cache_entradas_memoria', 'gauge', 'Predicciones en la caché en memoria',
+                   [({}, estadisticas['entradas_memoria'])])
+        if settings.TEXTO_CASCADA:
+            yield ('texto_cascada_textos_total', 'counter', 'Textos de predict-text resueltos por cada etapa de la cascada',
+                   [({'etapa': etapa}, n) for etapa, n in sorted(etapas.items())])
+
+    def precargar(self):
+        """Carga el modelo, fija los hilos de torch y hace una pasada de calentamiento"""
+        fijar_hilos_torch(settings.TEXTO_TORCH_THREADS, settings.TEXTO_TORCH_INTEROP_THREADS)
+        predictor = self.predictor
+        try:
+            predictor.cargar()
+        except OSError as e:
+            logger.warning('No se pudo cargar el modelo de %s: %s', predictor.model_dir, e)
+            return False
+        predictor.predecir_lote([TEXTO_CALENTAMIENTO])
+        logger.info('Modelo de texto cargado desde %s', predictor.model_dir)
+        return True
+
+
+registro = RegistroModelos()
+metricas.registrar_colector(registro.colector_metricas)
+
+
+def precargar_servidor():
+    """Precarga el modelo si TEXTO_PRECARGAR_MODELO está activo (lo llaman wsgi.py y asgi.py)"""
+    if settings.TEXTO_PRECARGAR_MODELO:
+        registro.precargar()
@@ -0,0 +1,47 @@
+"""
+Manejador de subidas que descarta un archivo al pasar de un tamaño máximo
+
+El límite principal lo aplica views.analyze_document con la cabecera Content-Length,
+antes de tocar request.FILES. Con WSGI el cuerpo aún no se ha leído en ese momento;
+con ASGI Django ya lo ha recibido entero (en un archivo temporal si es grande) antes
+de llamar a la vista, así que para cortar la subida en sí hay que limitar el tamaño
+del cuerpo en el servidor o el proxy (p. ej. client_max_body_size de nginx).
+"""
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from django.http import QueryDict
+from django.utils.datastructures import MultiValueDict
+
+
+class LimiteTamanoSubida(FileUploadHandler):
+    """Se coloca el primero en request.upload_handlers: cuenta los bytes de cada archivo
+    mientras se procesa el multipart y lo descarta en cuanto se supera max_bytes, sin
+    copiarlo entero a disco. Después de request.FILES, excedido indica si se descartó.
+    """
+
+    def __init__(self, request, max_bytes):
+        super().__init__(request)
+        self.max_bytes = max_bytes
+        self.excedido = False
+        self._recibidos = 0
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # Si la cabecera Content-Length ya supera el límite no se procesa el multipart.
+        # StopUpload aquí no lo captura Django (sería un 500): se devuelven POST y FILES vacíos
+        if content_length > self.max_bytes:
+            self.excedido = True
+            return QueryDict(encoding=encoding), MultiValueDict()
+        return None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self._recibidos = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self._recibidos += len(raw_data)
+        if self._recibidos > self.max_bytes:
+            self.excedido = True
+            raise StopUpload(connection_reset=True)
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
@@ -1,3 +1,1395 @@
-from django.test import TestCase
+import asyncio
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.files.uploadhandler import StopUpload
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from . import registro as modulo_registro
+from . import caracteristicas, cascada, cuantizacion, views
+from .admision import ControlAdmision, ServidorSaturado
+from .almacen_datos import COLUMNA_ESTADO, EscritorDataset, guardar_dataset, iterar_dataset, leer_dataset
+from .cache_predicciones import CachePredicciones
+from .extraccion import iterar_fragmentos
+from .inferencia import DemasiadasVentanas, DocumentoVacio, Predictor, formatear_resultado
+from .metricas import CONTENT_TYPE, RegistroMetricas
+from .microlotes import MicroBatcher
+from .models import PrediccionCache
+from .preprocesamiento import clean_text, clean_text_con_posiciones, clean_texts
+from .registro import RegistroModelos
+from .subidas import LimiteTamanoSubida
+
+CARPETA_TEXTO = os.path.dirname(os.path.abspath(__file__))
+
+
+def importar_script(nombre):
+    """Importa un script de texto/ o texto/Dataset_traducidos/ como cuando se ejecuta:
+    esos scripts se importan entre sí sin paquete (from preprocesamiento import ...)"""
+    for carpeta in (CARPETA_TEXTO, os.path.join(CARPETA_TEXTO, 'Dataset_traducidos')):
+        if carpeta not in sys.path:
+            sys.path.append(carpeta)
+    return importlib.import_module(nombre)
+
+
+class PredictorFalso:
+    """Sustituye a inferencia.Predictor sin cargar BERT: la probabilidad de IA crece con
+    la longitud del texto. lotes guarda los textos de cada llamada a predecir_lote."""
+
+    model_dir = 'modelo_falso'
+
+    def __init__(self):
+        self.model = object()
+        self.version = 'falso'
+        self.lotes = []
+
+    def cargar(self):
+        pass
+
+    def predecir_lote(self, textos):
+        self.lotes.append(list(textos))
+        return [formatear_resultado([1 - min(len(t), 100) / 100, min(len(t), 100) / 100]) for t in textos]
+
+    def predecir_documento(self, texto, solapamiento=64, ventanas_por_lote=16, max_ventanas=None):
+        resultado = self.predecir_lote([texto])[0]
+        return dict(resultado, tokens=len(texto.split()), windows=[dict(resultado, start=0, end=len(texto))])
+
+
+def registro_falso(predictor=None):
+    """RegistroModelos con un PredictorFalso ya creado (no lee modelo_binario)"""
+    registro = RegistroModelos()
+    registro._predictor = predictor or PredictorFalso()
+    return registro
+
+
+class MicroBatcherTests(SimpleTestCase):
+
+    def test_cada_futuro_recibe_su_resultado(self):
+        lotes = []
+
+        def procesar(items):
+            lotes.append(list(items))
+            return [item * 10 for item in items]
+
+        batcher = MicroBatcher(procesar, max_batch_size=4, max_wait_ms=50)
+        with ThreadPoolExecutor(8) as executor:
+            resultados = list(executor.map(lambda i: batcher.enviar(i).result(timeout=5), range(20)))
+        self.assertEqual(resultados, [i * 10 for i in range(20)])
+        self.assertTrue(all(len(lote) <= 4 for lote in lotes))
+        self.assertEqual(sorted(i for lote in lotes for i in lote), list(range(20)))
+
+    def test_lote_incompleto_sale_al_pasar_max_wait_ms(self):
+        batcher = MicroBatcher(lambda items: items, max_batch_size=64, max_wait_ms=20)
+        inicio = time.monotonic()
+        self.assertEqual(batcher.enviar('solo').result(timeout=5), 'solo')
+        self.assertLess(time.monotonic() - inicio, 2)
+
+    def test_error_del_lote_llega_a_todos_sus_futuros(self):
+        def procesar(items):
+            raise RuntimeError('fallo del modelo')
+
+        batcher = MicroBatcher(procesar, max_batch_size=2, max_wait_ms=50)
+        futuros = [batcher.enviar(i) for i in range(2)]
+        for futuro in futuros:
+            with self.assertRaisesMessage(RuntimeError, 'fallo del modelo'):
+                futuro.result(timeout=5)
+
+    def test_max_batch_size_invalido(self):
+        with self.assertRaises(ValueError):
+            MicroBatcher(lambda items: items, max_batch_size=0)
+
+
+@override_settings(TEXTO_CACHE_PREDICCIONES=False, TEXTO_CASCADA=False)
+class PredictTextTests(TestCase):
+    url = '/api/v1/predict-text'
+
+    def setUp(self):
+        self.registro = registro_falso()
+        patcher = mock.patch.object(views, 'registro', self.registro)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, cuerpo):
+        return self.client.post(self.url, data=cuerpo, content_type='application/json')
+
+    def test_devuelve_la_prediccion(self):
+        respuesta = self.post(json.dumps({'text': 'Un texto cualquiera para clasificar.'}))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(set(respuesta.json()), {'label', 'confidence', 'human_score'})
+
+    def test_peticiones_concurrentes_comparten_lote(self):
+        textos = [f'texto numero {"x" * i}' for i in range(8)]
+        barrera = threading.Barrier(len(textos))
+
+        def pedir(texto):
+            barrera.wait()
+            return self.post(json.dumps({'text': texto})).json()
+
+        with override_settings(TEXTO_MAX_WAIT_MS=200, TEXTO_MAX_BATCH_SIZE=16):
+            with ThreadPoolExecutor(len(textos)) as executor:
+                resultados = list(executor.map(pedir, textos))
+        esperados = PredictorFalso().predecir_lote(textos)
+        self.assertEqual(resultados, esperados)
+        self.assertLess(len(self.registro.predictor.lotes), len(textos))
+
+    def test_modelo_no_disponible(self):
+        with mock.patch.object(self.registro.predictor, 'predecir_lote', side_effect=OSError('sin modelo_binario')):
+            self.assertEqual(self.post(json.dumps({'text': 'hola'})).status_code, 503)
+
+    def test_json_invalido(self):
+        respuesta = self.post('{no es json')
+        self.assertEqual(respuesta.status_code, 400)
+
+    def test_texto_vacio_o_ausente(self):
+        for cuerpo in ({}, {'text': '   '}, {'text': 3}, ['text']):
+            with self.subTest(cuerpo=cuerpo):
+                self.assertEqual(self.post(json.dumps(cuerpo)).status_code, 400)
+
+    def test_solo_post(self):
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+
+
+class PrecargaTests(SimpleTestCase):
+
+    def test_solo_con_texto_precargar_modelo(self):
+        with mock.patch.object(modulo_registro.registro, 'precargar') as precargar:
+            with override_settings(TEXTO_PRECARGAR_MODELO=False):
+                modulo_registro.precargar_servidor()
+            precargar.assert_not_called()
+            with override_settings(TEXTO_PRECARGAR_MODELO=True):
+                modulo_registro.precargar_servidor()
+            precargar.assert_called_once_with()
+
+    def test_arrancar_django_no_importa_el_registro(self):
+        # apps.ready no debe cargar nada: los comandos de manage.py no pagan el modelo
+        codigo = ('import sys, django; django.setup(); '
+                  'print(any(m in sys.modules for m in ("texto.registro", "torch", "pandas")))')
+        salida = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, check=True,
+                                env=dict(os.environ, DJANGO_SETTINGS_MODULE='Backend.settings'))
+        self.assertEqual(salida.stdout.strip(), 'False')
+
+    def test_cargar_las_urls_no_importa_dependencias_pesadas(self):
+        # manage.py check carga el URLconf: views y registro, pero no el camino de inferencia
+        codigo = ('import sys, django; django.setup(); '
+                  'from django.urls import get_resolver; get_resolver().url_patterns; '
+                  'print(sorted(m for m in ("torch", "transformers", "pandas", "pyarrow", "joblib", "sklearn") '
+                  'if m in sys.modules))')
+        salida = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True, check=True,
+                                env=dict(os.environ, DJANGO_SETTINGS_MODULE='Backend.settings'))
+        self.assertEqual(salida.stdout.strip(), '[]')
+
+
+class CombinarDatosTests(SimpleTestCase):
+
+    def setUp(self):
+        self.combinar_datos = importar_script('combinar_datos')
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.carpeta = carpeta.name
+        self.human = self.escribir_carpeta('human', [f'Texto humano numero {c}' for c in 'abcdefg'])
+        self.ia = self.escribir_carpeta('ia', [f'Texto generado numero {c}' for c in 'hijkl'])
+
+    def escribir_carpeta(self, nombre, textos):
+        carpeta = os.path.join(self.carpeta, nombre)
+        os.makedirs(carpeta)
+        for i, texto in enumerate(textos):
+            with open(os.path.join(carpeta, f'{i}.txt'), 'w', encoding='utf-8') as f:
+                f.write(texto)
+        # Ni los archivos vacíos ni las extensiones desconocidas dan registros
+        open(os.path.join(carpeta, 'vacio.txt'), 'w').close()
+        with open(os.path.join(carpeta, 'notas.md'), 'w', encoding='utf-8') as f:
+            f.write('no es un texto del dataset')
+        return carpeta
+
+    def test_en_paralelo_los_mismos_registros(self):
+        secuencial = self.combinar_datos.load_and_label(self.human, 'human')
+        paralelo = list(self.combinar_datos.iter_load_and_label(self.human, 'human', workers=2, max_pendientes=2))
+        self.assertEqual(len(secuencial), 7)
+        self.assertEqual(sorted(r['text'] for r in paralelo), sorted(r['text'] for r in secuencial))
+        self.assertEqual({r['label'] for r in paralelo}, {'human'})
+
+    def test_guardar_por_bloques(self):
+        ruta = os.path.join(self.carpeta, 'd.csv')
+        registros = ({'text': f'texto {i}', 'label': 'ia'} for i in range(25))
+        self.assertEqual(self.combinar_datos.guardar_por_bloques(registros, ruta, chunk_rows=10), 25)
+        self.assertEqual(leer_dataset(ruta)['text'].tolist(), [f'texto {i}' for i in range(25)])
+        # Sin registros queda un CSV con la cabecera
+        self.assertEqual(self.combinar_datos.guardar_por_bloques(iter(()), ruta), 0)
+        self.assertEqual(list(leer_dataset(ruta).columns), ['text', 'label'])
+
+    def test_modo_streaming(self):
+        # Un texto de la carpeta ia copiado en human: se conserva la primera aparición (human)
+        with open(os.path.join(self.human, 'copia.txt'), 'w', encoding='utf-8') as f:
+            f.write('Texto generado numero h')
+        salida = os.path.join(self.carpeta, 'dataset.csv')
+        informe = os.path.join(self.carpeta, 'duplicados.csv')
+        argv = ['combinar_datos.py', '--workers', '2', '--chunk-rows', '3', '--sin-cache',
+                '--informe-duplicados', informe]
+        with mock.patch.multiple(self.combinar_datos, human_folder=self.human, ia_folder=self.ia,
+                                 output_path=salida), \
+                mock.patch.object(sys, 'argv', argv), mock.patch('sys.stdout', new=StringIO()):
+            self.combinar_datos.main()
+        df = leer_dataset(salida)
+        self.assertEqual(len(df), 12)
+        self.assertEqual(df['label'].value_counts().to_dict(), {'human': 8, 'ia': 4})
+        informe = pd.read_csv(informe)
+        self.assertEqual(informe[['label_conservado', 'label_eliminado', 'texto_eliminado']].values.tolist(),
+                         [['human', 'ia', 'texto generado numero h']])
+        self.assertFalse(os.path.exists(os.path.join(self.carpeta, 'dataset.sin_dedup.csv')))
+
+
+class CacheExtraccionTests(SimpleTestCase):
+
+    def setUp(self):
+        self.CacheExtraccion = importar_script('cache_extraccion').CacheExtraccion
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.carpeta = carpeta.name
+        self.archivo = self.escribir('a.txt', 'Hola Mundo')
+
+    def escribir(self, nombre, texto):
+        ruta = os.path.join(self.carpeta, nombre)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(texto)
+        return ruta
+
+    def test_clave_por_contenido_y_version(self):
+        cache = self.CacheExtraccion(os.path.join(self.carpeta, 'cache'), 1)
+        self.assertIsNone(cache.obtener(cache.clave(self.archivo)))
+        cache.guardar(cache.clave(self.archivo), 'Hola Mundo', 'hola mundo')
+        # Otro nombre con el mismo contenido acierta; otra versión del extractor no
+        copia = self.escribir('renombrado.txt', 'Hola Mundo')
+        self.assertEqual(cache.obtener(cache.clave(copia)), {'texto': 'Hola Mundo', 'texto_limpio': 'hola mundo'})
+        otra_version = self.CacheExtraccion(cache.directorio, 2)
+        self.assertIsNone(otra_version.obtener(otra_version.clave(self.archivo)))
+        self.assertNotEqual(cache.clave(self.escribir('b.txt', 'Adiós')), cache.clave(self.archivo))
+
+    def test_desaloja_las_menos_usadas(self):
+        cache = self.CacheExtraccion(os.path.join(self.carpeta, 'cache'), 1)
+        claves = [f'{c * 64}-v1' for c in 'abc']
+        for i, clave in enumerate(claves):
+            cache.guardar(clave, 'x' * 1000, 'x')
+            os.utime(cache._ruta(clave), (1000 + i, 1000 + i))
+        cache.obtener(claves[0])  # se usa la más antigua: pasa a ser la más reciente
+        cache.max_bytes = os.path.getsize(cache._ruta(claves[0])) * 2
+        self.assertEqual(cache.desalojar(), 1)
+        self.assertIsNone(cache.obtener(claves[1]))
+        self.assertIsNotNone(cache.obtener(claves[0]))
+        self.assertIsNotNone(cache.obtener(claves[2]))
+
+    def test_combinar_datos_no_vuelve_a_extraer(self):
+        combinar_datos = importar_script('combinar_datos')
+        cache = self.CacheExtraccion(os.path.join(self.carpeta, 'cache'), combinar_datos.EXTRACTOR_VERSION)
+        primero = combinar_datos.procesar_archivo(self.archivo, 'human', cache)
+        with mock.patch.object(combinar_datos, 'extraer_texto') as extraer:
+            self.assertEqual(combinar_datos.procesar_archivo(self.archivo, 'human', cache), primero)
+        extraer.assert_not_called()
+        self.assertEqual(primero, {'text': 'hola mundo', 'label': 'human'})
+
+
+class CleanTextsTests(SimpleTestCase):
+    textos = [
+        'Hola, Mundo! 123',
+        '  ESPACIOS\t\tvarios\n\nsaltos  ',
+        'Acentos: ÁÉÍÓÚ Ü Ñ ¿qué? ¡sí!',
+        'no\u00a0separable\u2003em\u3000ideográfico\x1c\x85fin',
+        'İstanbul ß ﬁ',
+        '',
+        '!!! ???',
+        'ya limpio',
+    ]
+
+    def test_lista_igual_que_clean_text(self):
+        self.assertEqual(clean_texts(self.textos), [clean_text(t) for t in self.textos])
+
+    def test_series_conserva_indice_y_nulos(self):
+        serie = pd.Series(self.textos + [None], index=range(10, 10 + len(self.textos) + 1))
+        limpia = clean_texts(serie)
+        self.assertEqual(list(limpia.index), list(serie.index))
+        self.assertTrue(pd.isna(limpia.iloc[-1]))
+        self.assertEqual(limpia.iloc[:-1].tolist(), [clean_text(t) for t in self.textos])
+
+    def test_en_procesos_por_bloques(self):
+        textos = self.textos * 5
+        self.assertEqual(clean_texts(textos, workers=2, chunk_size=7), [clean_text(t) for t in textos])
+
+    def test_posiciones_apuntan_al_texto_original(self):
+        for texto in self.textos:
+            with self.subTest(texto=texto):
+                limpio, posiciones = clean_text_con_posiciones(texto)
+                self.assertEqual(limpio, clean_text(texto))
+                self.assertEqual(len(posiciones), len(limpio))
+                for c, i in zip(limpio, posiciones):
+                    self.assertIn(c, ' ' + texto[i].lower())
+
+
+class TokenizadorFalso:
+    """Un token por palabra (su longitud como id); cuenta las llamadas"""
+    name_or_path = 'falso'
+
+    def __init__(self):
+        self.llamadas = 0
+
+    def __len__(self):
+        return 1000
+
+    def __call__(self, textos, truncation, max_length, padding, return_tensors):
+        self.llamadas += 1
+        input_ids = np.zeros((len(textos), max_length), dtype=np.int64)
+        attention_mask = np.zeros((len(textos), max_length), dtype=np.int64)
+        for i, texto in enumerate(textos):
+            palabras = texto.split()[:max_length]
+            input_ids[i, :len(palabras)] = [len(p) for p in palabras]
+            attention_mask[i, :len(palabras)] = 1
+        return {'input_ids': input_ids, 'attention_mask': attention_mask}
+
+
+class CacheTokenizacionTests(SimpleTestCase):
+
+    def setUp(self):
+        self.cache_tokenizacion = importar_script('cache_tokenizacion')
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.carpeta = carpeta.name
+        self.textos = ['uno', 'dos palabras', 'ahora son tres', 'cuatro cinco seis siete ocho', '']
+
+    def tokenizar(self, tokenizer, max_length=4):
+        with mock.patch('sys.stdout', new=StringIO()):
+            return self.cache_tokenizacion.tokenizar_con_cache(self.textos, tokenizer, self.carpeta,
+                                                               max_length=max_length, batch_size=2)
+
+    def test_arrays_por_lotes(self):
+        tokenizer = TokenizadorFalso()
+        corpus = self.tokenizar(tokenizer)
+        self.assertEqual(tokenizer.llamadas, 3)
+        self.assertEqual(len(corpus), 5)
+        self.assertEqual(corpus.input_ids.dtype, np.uint16)
+        self.assertEqual(corpus.lengths.tolist(), [1, 2, 3, 4, 0])
+        self.assertEqual(corpus.input_ids[2].tolist(), [5, 3, 4, 0])
+        self.assertEqual(corpus.attention_mask[1].tolist(), [1, 1, 0, 0])
+        self.assertEqual([n for n in os.listdir(self.carpeta) if n.endswith('.tmp')], [])
+
+    def test_reutiliza_la_cache(self):
+        tokenizer = TokenizadorFalso()
+        primero = self.tokenizar(tokenizer)
+        segundo = self.tokenizar(tokenizer)
+        self.assertEqual(tokenizer.llamadas, 3)
+        self.assertEqual(segundo.ruta, primero.ruta)
+        # Otro max_length es otra entrada
+        self.assertNotEqual(self.tokenizar(tokenizer, max_length=8).ruta, primero.ruta)
+        self.assertEqual(tokenizer.llamadas, 6)
+
+
+class MuestreoLongitudTests(SimpleTestCase):
+
+    def setUp(self):
+        self.muestreo_longitud = importar_script('muestreo_longitud')
+        self.lengths = np.random.default_rng(0).integers(1, 256, size=103)
+
+    def test_lotes_de_una_cubeta(self):
+        sampler = self.muestreo_longitud.LengthBucketBatchSampler(self.lengths, 8, limites=(64, 128, 192))
+        lotes = list(sampler)
+        self.assertEqual(len(lotes), len(sampler))
+        self.assertEqual(sorted(i for lote in lotes for i in lote), list(range(103)))
+        for lote in lotes:
+            self.assertLessEqual(len(lote), 8)
+            self.assertEqual(len(set(np.digitize(self.lengths[lote], (64, 128, 192)))), 1)
+        # Cada época baraja de otra forma
+        self.assertNotEqual(list(sampler), lotes)
+
+    def test_drop_last_y_evaluacion(self):
+        sampler = self.muestreo_longitud.LengthBucketBatchSampler(self.lengths, 8, drop_last=True)
+        self.assertTrue(all(len(lote) == 8 for lote in sampler))
+        self.assertEqual(len(list(sampler)), len(sampler))
+        evaluacion = self.muestreo_longitud.LengthBucketBatchSampler(self.lengths, 10, shuffle=False)
+        orden = [i for lote in evaluacion for i in lote]
+        self.assertEqual(orden, np.argsort(self.lengths, kind='stable').tolist())
+        self.assertEqual(len(evaluacion), 11)
+
+    def test_padding_hasta_el_mas_largo_del_lote(self):
+        import torch
+
+        padding = self.muestreo_longitud.PaddingDinamico(pad_token_id=0)
+        items = [{'input_ids': torch.tensor(ids), 'attention_mask': torch.ones(len(ids), dtype=torch.long),
+                  'labels': torch.tensor(etiqueta)} for ids, etiqueta in (([5, 6, 7], 1), ([8], 0))]
+        lote = padding(items)
+        self.assertEqual(lote['input_ids'].tolist(), [[5, 6, 7], [8, 0, 0]])
+        self.assertEqual(lote['attention_mask'].tolist(), [[1, 1, 1], [1, 0, 0]])
+        self.assertEqual(lote['labels'].tolist(), [1, 0])
+        reales, totales = padding.reiniciar()
+        self.assertEqual((reales, totales), (4, 6))
+        self.assertAlmostEqual(self.muestreo_longitud.ratio_padding(reales, totales), 1 / 3)
+        self.assertEqual(padding.reiniciar(), (0, 0))
+        self.assertEqual(self.muestreo_longitud.ratio_padding(0, 0), 0.0)
+
+
+class EstadoTraduccionTests(SimpleTestCase):
+
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.carpeta = carpeta.name
+        self.EstadoTraduccion = importar_script('estado_traduccion').EstadoTraduccion
+        self.estado = self.EstadoTraduccion(os.path.join(self.carpeta, 'estado.sqlite'))
+        self.addCleanup(self.estado.cerrar)
+        self.df = pd.DataFrame({'text': [f'text {i}' for i in range(1200)], 'label': 'human'})
+
+    def test_pendientes_segun_el_diario(self):
+        self.estado.registrar_lote([(i, f'text {i}', f'texto {i}', False) for i in range(0, 1200, 2)])
+        self.estado.registrar(1, 'text 1', 'ERROR: tiempo agotado', es_error=True)
+        pendientes = self.estado.pendientes(self.df['text'])
+        self.assertEqual(pendientes, [i for i in range(3, 1200, 2)])
+        self.assertEqual(self.estado.pendientes(self.df['text'], reintentar_errores=True),
+                         [i for i in range(1, 1200, 2)])
+
+    def test_texto_original_cambiado_vuelve_a_pendiente(self):
+        self.estado.registrar_lote([(i, f'text {i}', f'texto {i}', False) for i in range(1200)])
+        textos = self.df['text'].copy()
+        textos[700] = 'otro texto'
+        self.assertEqual(self.estado.pendientes(textos), [700])
+        self.assertEqual(self.estado.pendientes(textos.iloc[10:20]), [])
+
+    def test_se_reanuda_desde_el_archivo(self):
+        self.estado.registrar(5, 'text 5', 'texto 5')
+        self.estado.cerrar()
+        estado = self.EstadoTraduccion(self.estado.ruta_db)
+        self.addCleanup(estado.cerrar)
+        self.assertNotIn(5, estado.pendientes(self.df['text']))
+        self.assertEqual(estado.contar(), {'ok': 1})
+
+    def test_exportar_sin_errores(self):
+        self.estado.registrar_lote([(0, 'text 0', 'texto 0', False), (1, 'text 1', 'ERROR: fallo', True)])
+        salida = os.path.join(self.carpeta, 'salida.csv')
+        self.estado.exportar(self.df.iloc[:3].copy(), salida, incluir_errores=False)
+        exportado = pd.read_csv(salida, keep_default_na=False)
+        self.assertEqual(exportado['text_es'].tolist(), ['texto 0', '', ''])
+
+
+class ClienteTraduccionTests(SimpleTestCase):
+
+    def setUp(self):
+        self.traductores = importar_script('traductores')
+
+    def cliente(self, traductor=None, **kwargs):
+        kwargs.setdefault('espera_base', 0)
+        return self.traductores.ClienteTraduccion(traductor or self.traductores.TraductorFalso(), **kwargs)
+
+    def test_resultados_en_orden_y_empaquetados(self):
+        traductor = self.traductores.TraductorFalso(max_textos_por_peticion=10)
+        textos = [f'Text number {i}.' for i in range(35)]
+        self.assertEqual(self.cliente(traductor).traducir_sync(textos), [f'[es] {t}' for t in textos])
+        self.assertEqual(traductor.peticiones, 4)
+
+    def test_textos_largos_y_vacios(self):
+        traductor = self.traductores.TraductorFalso(max_caracteres=20)
+        texto = 'First sentence here. Second one.\nAnother paragraph.'
+        traducido, vacio = self.cliente(traductor).traducir_sync([texto, '  '])
+        self.assertEqual(traducido, '[es] First sentence here. [es] Second one.\n[es] Another paragraph.')
+        self.assertEqual(vacio, '')
+
+    def test_reintenta_los_fallos(self):
+        cliente = self.cliente(self.traductores.TraductorFalso(tasa_fallos=0.5, max_textos_por_peticion=1))
+        textos = [f'text {i}' for i in range(20)]
+        self.assertEqual(cliente.traducir_sync(textos), [f'[es] {t}' for t in textos])
+        self.assertGreater(cliente.estadisticas['reintentos'], 0)
+        self.assertEqual(cliente.estadisticas['fallos'], 0)
+
+    def test_sin_reintentos_el_fallo_queda_en_su_posicion(self):
+        cliente = self.cliente(self.traductores.TraductorFalso(tasa_fallos=0.5, max_textos_por_peticion=1),
+                               max_reintentos=0)
+        textos = [f'text {i}' for i in range(20)]
+        resultados = cliente.traducir_sync(textos)
+        fallidos = [i for i, r in enumerate(resultados) if isinstance(r, Exception)]
+        self.assertTrue(fallidos)
+        for i, resultado in enumerate(resultados):
+            if i not in fallidos:
+                self.assertEqual(resultado, f'[es] {textos[i]}')
+
+    def test_limite_de_tasa(self):
+        cliente = self.cliente(self.traductores.TraductorFalso(max_textos_por_peticion=1),
+                               peticiones_por_segundo=50, rafaga=1)
+        inicio = time.monotonic()
+        cliente.traducir_sync([f'text {i}' for i in range(6)])
+        # La primera petición sale al momento y las otras cinco esperan 1/50 s cada una
+        self.assertGreaterEqual(time.monotonic() - inicio, 0.09)
+
+    def test_traductor_desconocido(self):
+        with self.assertRaises(ValueError):
+            self.traductores.crear_traductor('no-existe')
+
+
+class MemoriaTraduccionTests(SimpleTestCase):
+
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.ruta = os.path.join(carpeta.name, 'memoria.sqlite')
+        self.memoria_traduccion = importar_script('memoria_traduccion')
+        self.traductores = importar_script('traductores')
+
+    def traducir(self, textos):
+        memoria = self.memoria_traduccion.MemoriaTraduccion(self.ruta)
+        try:
+            traductor = self.traductores.TraductorFalso()
+            cliente = self.traductores.ClienteTraduccion(traductor, espera_base=0, memoria=memoria)
+            return cliente.traducir_sync(textos), cliente.estadisticas, traductor.peticiones
+        finally:
+            memoria.cerrar()
+
+    def test_oraciones_repetidas_se_piden_una_vez(self):
+        textos = ['Hello there. How are you?', 'Hello there. Fine.', 'Hello   there.']
+        resultados, estadisticas, _ = self.traducir(textos)
+        self.assertEqual(resultados, ['[es] Hello there. [es] How are you?', '[es] Hello there. [es] Fine.',
+                                      '[es] Hello there.'])
+        self.assertEqual(estadisticas['segmentos'], 5)
+        self.assertEqual(estadisticas['segmentos_en_memoria'], 0)
+
+    def test_persiste_entre_ejecuciones(self):
+        textos = ['First sentence. Second sentence.', 'Third one.']
+        primera, _, peticiones = self.traducir(textos)
+        self.assertGreater(peticiones, 0)
+        segunda, estadisticas, peticiones = self.traducir(textos)
+        self.assertEqual(segunda, primera)
+        self.assertEqual(peticiones, 0)
+        self.assertEqual(estadisticas['segmentos_en_memoria'], 3)
+
+    def test_segmentar(self):
+        segmentar = self.memoria_traduccion.segmentar
+        self.assertEqual(segmentar('Uno. Dos!\n\n  Tres?  '), [['Uno.', 'Dos!'], ['Tres?']])
+        self.assertEqual(segmentar('Uno. Dos!\nTres', 'parrafo'), [['Uno. Dos!'], ['Tres']])
+
+
+class VerificarTraduccionesTests(SimpleTestCase):
+    ingles = 'The results of this study show that the model works well with most of the texts and data'
+    espanol = 'Los resultados de este estudio muestran que el modelo funciona bien con la mayoría de los textos'
+
+    def setUp(self):
+        # El script añade texto/ al principio de sys.path al importarse
+        with mock.patch.object(sys, 'path', list(sys.path)):
+            self.verificar = importar_script('verificar_traducciones')
+        self.df = pd.DataFrame({
+            'text': ['original uno', 'original dos', self.ingles, 'mismo texto sin traducir', 'original cinco'],
+            'text_es': [None, 'ERROR: tiempo agotado', self.ingles, 'Mismo texto sin traducir ', self.espanol],
+        })
+
+    def analizar(self, **kwargs):
+        with mock.patch('sys.stdout', new=StringIO()), mock.patch('sys.stderr', new=StringIO()):
+            return self.verificar.analizar(self.df, **kwargs)
+
+    def test_marca_vacios_errores_y_sospechosos(self):
+        self.assertEqual(self.analizar(workers=1, detector='interno'), 5)
+        self.assertEqual(self.df['es_vacio'].tolist(), [True, False, False, False, False])
+        self.assertEqual(self.df['tiene_error'].tolist(), [False, True, False, False, False])
+        self.assertEqual(self.df['es_sospechoso'].tolist(), [False, False, True, True, False])
+        self.assertEqual(self.df['idioma_detectado'].tolist()[0], 'no_analizado')
+        self.assertEqual(self.df['idioma_detectado'].tolist()[2::2], ['en', 'es'])
+
+    def test_muestra_y_detectores(self):
+        self.assertEqual(self.analizar(workers=1, muestra=2), 3)
+        self.assertEqual(self.df['idioma_detectado'].tolist()[1:], ['no_analizado', 'en', 'no_analizado', 'es'])
+        with mock.patch('sys.stderr', new=StringIO()):
+            textos = [self.ingles, self.espanol] * 3
+            self.assertEqual(self.verificar.detectar_idiomas(textos, workers=2, chunksize=2),
+                             self.verificar.detectar_idiomas(textos, workers=1))
+
+
+class IdiomaTests(SimpleTestCase):
+    textos = {
+        'es': 'El gobierno anunció ayer nuevas medidas para mejorar la educación en las escuelas públicas.',
+        'en': 'The government announced new measures yesterday to improve education in public schools.',
+        'fr': "Le gouvernement a annoncé hier de nouvelles mesures pour améliorer l'éducation dans les écoles.",
+        'de': 'Die Regierung hat gestern neue Maßnahmen angekündigt, um die Bildung an Schulen zu verbessern.',
+    }
+
+    def setUp(self):
+        self.idioma = importar_script('idioma')
+
+    def test_detecta_el_idioma(self):
+        for codigo, texto in self.textos.items():
+            with self.subTest(idioma=codigo):
+                self.assertEqual(self.idioma.detectar_idioma(texto), codigo)
+
+    def test_lote_igual_que_uno_a_uno(self):
+        textos = list(self.textos.values()) + ['', '123 !!!', None]
+        lote = self.idioma.detectar_idiomas(textos, candidatos=('es', 'en'))
+        self.assertEqual(lote, [self.idioma.detectar_idioma(t, candidatos=('es', 'en')) for t in textos])
+        self.assertEqual(lote[:2], ['es', 'en'])
+        self.assertEqual(lote[-3:], ['desconocido'] * 3)
+        self.assertIn(lote[2], ('es', 'en'))
+
+    def test_ngramas_y_probabilidades(self):
+        # ' ab ': 2 letras, 3 bigramas y 2 trigramas
+        hashes, ids = self.idioma.extraer_ngramas(['ab', '', 'Ab!'])
+        self.assertEqual(np.bincount(ids, minlength=3).tolist(), [7, 0, 7])
+        self.assertEqual(sorted(hashes[ids == 0]), sorted(hashes[ids == 2]))
+        probs = self.idioma.identificador().probabilidades([self.textos['es'], ''])
+        self.assertAlmostEqual(float(probs[0].sum()), 1.0, places=5)
+        self.assertEqual(probs[1].tolist(), [0.0] * len(probs[1]))
+
+
+class DividirDatasetTests(SimpleTestCase):
+
+    def setUp(self):
+        with mock.patch.object(sys, 'path', list(sys.path)):
+            self.dividir = importar_script('Dividir_dataset')
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.carpeta = carpeta.name
+        self.entrada = os.path.join(self.carpeta, 'entrada.csv')
+        # Filas 1, 4 y 7 sin traducir (vacía o solo espacios); los ceros a la izquierda se conservan
+        pd.DataFrame({
+            'text': [f'texto {i}' for i in range(10)],
+            'label': ['human', 'ia'] * 5,
+            'text_es': ['  ' if i == 4 else ('' if i % 3 == 1 else f'00{i}') for i in range(10)],
+        }).to_csv(self.entrada, index=False)
+
+    def dividir_en(self, opcion, extension='.csv', punto_corte=6):
+        salidas = [os.path.join(self.carpeta, f'{nombre}{extension}') for nombre in ('traducida', 'pendiente')]
+        with mock.patch('sys.stdout', new=StringIO()):
+            conteos = self.dividir.dividir_por_bloques(self.entrada, *salidas, opcion, punto_corte, chunk_rows=3)
+        return conteos, [leer_dataset(ruta) for ruta in salidas]
+
+    def test_por_contenido(self):
+        conteos, (traducida, pendiente) = self.dividir_en('2')
+        self.assertEqual(conteos, {'total': 10, 'traducidas': 7, 'pendientes': 3})
+        self.assertEqual(traducida['text'].tolist(), [f'texto {i}' for i in (0, 2, 3, 5, 6, 8, 9)])
+        self.assertEqual(pendiente['text'].tolist(), ['texto 1', 'texto 4', 'texto 7'])
+        with open(os.path.join(self.carpeta, 'traducida.csv'), encoding='utf-8') as f:
+            self.assertIn('texto 0,human,000', f.read())
+
+    def test_por_linea_y_en_parquet(self):
+        conteos, (traducida, pendiente) = self.dividir_en('1', punto_corte=6)
+        self.assertEqual(conteos['total'], 10)
+        self.assertEqual(traducida['text'].tolist(), [f'texto {i}' for i in range(6)])
+        self.assertEqual(pendiente['text'].tolist(), [f'texto {i}' for i in range(6, 10)])
+        _, (traducida, pendiente) = self.dividir_en('2', extension='.parquet')
+        self.assertEqual((len(traducida), len(pendiente)), (7, 3))
+        self.assertEqual(set(traducida['label']), {'human', 'ia'})
+
+
+class AlmacenDatosTests(SimpleTestCase):
+
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.carpeta = carpeta.name
+        self.df = pd.DataFrame({
+            'text': [f'text {i}' for i in range(50)],
+            'label': ['human', 'ia'] * 25,
+            'text_es': [f'texto {i}' if i % 3 else ('' if i % 2 else 'ERROR: fallo') for i in range(50)],
+            'puntuacion': [i / 10 for i in range(50)],
+        })
+
+    def ruta(self, nombre):
+        return os.path.join(self.carpeta, nombre)
+
+    def test_ida_y_vuelta(self):
+        for nombre, particiones in (('d.csv', None), ('d.parquet', None), ('p.parquet', ['label', COLUMNA_ESTADO])):
+            with self.subTest(nombre=nombre):
+                guardar_dataset(self.df, self.ruta(nombre), particiones)
+                leido = leer_dataset(self.ruta(nombre))
+                if nombre.endswith('.csv'):
+                    leido['text_es'] = leido['text_es'].fillna('')
+                pd.testing.assert_frame_equal(leido, self.df, check_dtype=False)
+
+    def test_columnas_y_filtros(self):
+        for nombre in ('d.csv', 'p.parquet'):
+            with self.subTest(nombre=nombre):
+                guardar_dataset(self.df, self.ruta(nombre), ['label', COLUMNA_ESTADO])
+                leido = leer_dataset(self.ruta(nombre), columnas=['text', COLUMNA_ESTADO],
+                                     filtros=[(COLUMNA_ESTADO, '=', 'error'), ('label', '=', 'human')])
+                self.assertEqual(list(leido.columns), ['text', COLUMNA_ESTADO])
+                self.assertEqual(leido['text'].tolist(), [f'text {i}' for i in range(0, 50, 6)])
+                self.assertEqual(set(leido[COLUMNA_ESTADO]), {'error'})
+
+    def test_escritura_por_bloques(self):
+        guardar_dataset(self.df, self.ruta('d.csv'))
+        with EscritorDataset(self.ruta('copia.parquet'), ['label']) as escritor:
+            for bloque in iterar_dataset(self.ruta('d.csv'), chunk_rows=7, dtype={'text_es': str}):
+                self.assertLessEqual(len(bloque), 7)
+                escritor.escribir(bloque)
+        self.assertEqual(escritor.filas, 50)
+        self.assertEqual(leer_dataset(self.ruta('copia.parquet'), columnas=['text'])['text'].tolist(),
+                         self.df['text'].tolist())
+
+    def test_abortar_conserva_el_dataset_anterior(self):
+        guardar_dataset(self.df, self.ruta('d.parquet'))
+        with self.assertRaises(RuntimeError):
+            with EscritorDataset(self.ruta('d.parquet')) as escritor:
+                escritor.escribir(self.df.head(3))
+                raise RuntimeError('interrumpido')
+        self.assertEqual(len(leer_dataset(self.ruta('d.parquet'))), 50)
+
+
+class CachePrediccionesTests(TestCase):
+    resultado = {'label': 'IA', 'confidence': 0.9, 'human_score': 0.1}
+
+    def test_acierto_y_fallo(self):
+        cache = CachePredicciones('v1', persistente=False)
+        clave = cache.clave('un texto')
+        self.assertEqual(cache.obtener([clave]), {})
+        cache.guardar({clave: self.resultado})
+        self.assertEqual(cache.obtener([clave]), {clave: self.resultado})
+        estadisticas = cache.estadisticas()
+        self.assertEqual((estadisticas['aciertos_memoria'], estadisticas['fallos']), (1, 1))
+        self.assertEqual(estadisticas['tasa_aciertos'], 0.5)
+
+    def test_expulsa_la_menos_usada(self):
+        cache = CachePredicciones('v1', max_entradas=2, persistente=False)
+        a, b, c = (cache.clave(t) for t in 'abc')
+        cache.guardar({a: self.resultado})
+        cache.guardar({b: self.resultado})
+        cache.obtener([a])
+        cache.guardar({c: self.resultado})
+        self.assertEqual(set(cache.obtener([a, b, c])), {a, c})
+        self.assertEqual(cache.estadisticas()['entradas_memoria'], 2)
+
+    def test_la_tabla_es_el_segundo_nivel(self):
+        CachePredicciones('v1').guardar({CachePredicciones('v1').clave('texto'): self.resultado})
+        cache = CachePredicciones('v1')
+        clave = cache.clave('texto')
+        self.assertEqual(cache.obtener([clave]), {clave: self.resultado})
+        self.assertEqual(cache.estadisticas()['aciertos_bd'], 1)
+        # La misma consulta ya sale de memoria
+        cache.obtener([clave])
+        self.assertEqual(cache.estadisticas()['aciertos_memoria'], 1)
+
+    def test_la_version_del_modelo_forma_parte_de_la_clave(self):
+        CachePredicciones('v1').guardar({CachePredicciones('v1').clave('texto'): self.resultado})
+        nueva = CachePredicciones('v2')
+        self.assertEqual(nueva.obtener([nueva.clave('texto')]), {})
+        self.assertEqual(nueva.purgar_otras_versiones(), 1)
+        self.assertFalse(PrediccionCache.objects.exists())
+
+    @override_settings(TEXTO_CACHE_PREDICCIONES=True, TEXTO_CACHE_PERSISTENTE=True, TEXTO_CASCADA=False)
+    def test_el_registro_no_repite_textos_equivalentes(self):
+        registro = registro_falso()
+        primera = registro.predecir('Hola,   MUNDO!')
+        self.assertEqual(registro.predecir('hola mundo'), primera)
+        self.assertEqual(len(registro.predictor.lotes), 1)
+        self.assertEqual(PrediccionCache.objects.count(), 1)
+
+
+@override_settings(TEXTO_CACHE_PREDICCIONES=True)
+class PredictionCacheStatsTests(TestCase):
+    url = '/api/v1/prediction-cache'
+
+    def test_no_carga_el_modelo(self):
+        registro = RegistroModelos()
+        with mock.patch.object(views, 'registro', registro), \
+                mock.patch.object(modulo_registro, 'Predictor') as predictor:
+            respuesta = self.client.get(self.url)
+        predictor.assert_not_called()
+        self.assertEqual(respuesta.status_code, 200)
+        datos = respuesta.json()
+        self.assertTrue(datos['activa'])
+        self.assertEqual((datos['aciertos_memoria'], datos['aciertos_bd'], datos['fallos']), (0, 0, 0))
+
+    def test_estadisticas_de_la_cache_cargada(self):
+        registro = registro_falso()
+        with override_settings(TEXTO_CACHE_PERSISTENTE=False):
+            registro.predecir('un texto')
+            registro.predecir('un texto')
+        with mock.patch.object(views, 'registro', registro):
+            datos = self.client.get(self.url).json()
+        self.assertEqual((datos['aciertos_memoria'], datos['fallos'], datos['version_modelo']), (1, 1, 'falso'))
+
+    @override_settings(TEXTO_CACHE_PREDICCIONES=False)
+    def test_cache_desactivada(self):
+        self.assertEqual(self.client.get(self.url).json(), {'activa': False})
+
+
+def modelo_diminuto(carpeta):
+    """Guarda en carpeta un BERT de clasificación minúsculo (pesos aleatorios) con su
+    tokenizador, con los mismos archivos que modelo_binario"""
+    import torch
+    from transformers import BertConfig, BertForSequenceClassification, BertTokenizerFast
+    from transformers.utils import logging
+
+    logging.disable_progress_bar()
+    palabras = ['hola', 'mundo', 'texto', 'de', 'prueba', 'escrito', 'por', 'una', 'persona']
+    os.makedirs(carpeta, exist_ok=True)
+    with open(os.path.join(carpeta, 'vocab.txt'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]'] + palabras))
+    BertTokenizerFast(os.path.join(carpeta, 'vocab.txt')).save_pretrained(carpeta)
+    torch.manual_seed(0)
+    config = BertConfig(vocab_size=5 + len(palabras), hidden_size=64, num_hidden_layers=2, num_attention_heads=2,
+                        intermediate_size=128, max_position_embeddings=64, num_labels=2)
+    BertForSequenceClassification(config).save_pretrained(carpeta)
+    return carpeta
+
+
+class PredictDocumentTests(TestCase):
+    url = '/api/v1/predict-document'
+    # 18 palabras del vocabulario de modelo_diminuto, un token cada una, entre símbolos que clean_text quita
+    texto = ('Hola, MUNDO 1! texto de prueba escrito por una persona... Hola mundo (texto) de prueba; '
+             'escrito por una persona.')
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.carpeta = tempfile.TemporaryDirectory()
+        cls.modelo = modelo_diminuto(cls.carpeta.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.carpeta.cleanup()
+        super().tearDownClass()
+
+    def registro(self):
+        registro = RegistroModelos()
+        # Ventanas de 6 tokens más [CLS] y [SEP]
+        registro._predictor = Predictor(self.modelo, max_length=8)
+        return registro
+
+    def post(self, registro, texto):
+        with mock.patch.object(views, 'registro', registro):
+            return self.client.post(self.url, data=json.dumps({'text': texto}), content_type='application/json')
+
+    def test_ventanas_solapadas(self):
+        predictor = Predictor(self.modelo, max_length=8)
+        resultado = predictor.predecir_documento(self.texto, solapamiento=2, ventanas_por_lote=3)
+        palabras = clean_text(self.texto).split()
+        self.assertEqual(resultado['tokens'], 18)
+        # Ventanas de 6 tokens que empiezan cada 4 (6 - solapamiento); la última acaba en el token 18
+        inicios = [0, 4, 8, 12]
+        self.assertEqual(len(resultado['windows']), len(inicios))
+        for inicio, ventana in zip(inicios, resultado['windows']):
+            with self.subTest(inicio=inicio):
+                fragmento = self.texto[ventana['start']:ventana['end']]
+                self.assertEqual(clean_text(fragmento), ' '.join(palabras[inicio:inicio + 6]))
+                self.assertEqual(fragmento, fragmento.strip(' .,;()!'))
+                # Cada ventana se clasifica igual que ese fragmento solo
+                self.assertAlmostEqual(ventana['human_score'], predictor.predecir_lote([fragmento])[0]['human_score'],
+                                       places=3)
+        # Todas las ventanas tienen 6 tokens: la media es la simple
+        media = sum(v['human_score'] for v in resultado['windows']) / len(inicios)
+        self.assertAlmostEqual(resultado['human_score'], media, places=3)
+        with self.assertRaises(DemasiadasVentanas):
+            predictor.predecir_documento(self.texto, solapamiento=2, max_ventanas=3)
+
+    def test_vista_con_limite_de_ventanas(self):
+        with override_settings(TEXTO_VENTANA_SOLAPAMIENTO=2, TEXTO_MAX_VENTANAS=4):
+            respuesta = self.post(self.registro(), self.texto)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.json()['windows']), 4)
+        with override_settings(TEXTO_VENTANA_SOLAPAMIENTO=2, TEXTO_MAX_VENTANAS=3):
+            respuesta = self.post(self.registro(), self.texto)
+        self.assertEqual(respuesta.status_code, 413)
+        self.assertIn('4 ventanas', respuesta.json()['error'])
+
+    def test_solapamiento_invalido_no_es_un_413(self):
+        # Un error de configuración no se disfraza de documento demasiado largo
+        with override_settings(TEXTO_VENTANA_SOLAPAMIENTO=6), self.assertRaises(ValueError):
+            self.post(self.registro(), self.texto)
+
+    def test_documento_vacio_tras_limpiar(self):
+        predictor = Predictor('modelo_inexistente')
+        with mock.patch.object(predictor, 'cargar') as cargar:
+            with self.assertRaises(DocumentoVacio):
+                predictor.predecir_documento('123 -- 456 !!!')
+        cargar.assert_not_called()
+
+    def test_vista_responde_400(self):
+        registro = RegistroModelos()
+        registro._predictor = Predictor('modelo_inexistente')
+        with mock.patch.object(views, 'registro', registro):
+            for texto in ('   ', '2024-01-01 12:00 ???'):
+                with self.subTest(texto=texto):
+                    respuesta = self.client.post(self.url, data=json.dumps({'text': texto}),
+                                                 content_type='application/json')
+                    self.assertEqual(respuesta.status_code, 400)
+        self.assertIsNone(registro._predictor.model)
+
+
+class CuantizacionTests(SimpleTestCase):
+
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.fp32 = modelo_diminuto(os.path.join(carpeta.name, 'modelo_binario'))
+        self.int8 = os.path.join(carpeta.name, 'modelo_binario_int8')
+
+    def test_exportar_y_cargar(self):
+        import torch
+
+        cuantizado = cuantizacion.exportar(self.fp32, self.int8)
+        self.assertTrue(cuantizacion.es_cuantizado(self.int8))
+        self.assertFalse(cuantizacion.es_cuantizado(self.fp32))
+        cargado = cuantizacion.cargar_cuantizado(self.int8)
+        capa = cargado.bert.encoder.layer[0].attention.self.query
+        self.assertIsInstance(capa, torch.ao.nn.quantized.dynamic.Linear)
+        entrada = {'input_ids': torch.tensor([[2, 5, 6, 3]]), 'attention_mask': torch.ones(1, 4, dtype=torch.long)}
+        with torch.inference_mode():
+            torch.testing.assert_close(cargado(**entrada).logits, cuantizado(**entrada).logits)
+        self.assertLess(cuantizacion.tamano_pesos(self.int8), cuantizacion.tamano_pesos(self.fp32))
+
+    def test_el_predictor_sirve_la_exportacion(self):
+        cuantizacion.exportar(self.fp32, self.int8)
+        textos = ['hola mundo', 'texto de prueba escrito por una persona']
+        fp32 = Predictor(self.fp32).predecir_lote(textos)
+        int8 = Predictor(self.int8).predecir_lote(textos)
+        for a, b in zip(fp32, int8):
+            self.assertAlmostEqual(a['human_score'], b['human_score'], delta=0.05)
+
+
+@override_settings(TEXTO_CACHE_PREDICCIONES=False, TEXTO_CASCADA=False)
+class AdmisionTests(TestCase):
+
+    def ocupar(self, admision):
+        """Ocupa una plaza de admision hasta que se llame a la función devuelta"""
+        liberar, dentro = threading.Event(), threading.Event()
+
+        def esperar():
+            dentro.set()
+            liberar.wait(5)
+
+        hilo = threading.Thread(target=asyncio.run, args=(admision.ejecutar(esperar),))
+        hilo.start()
+        dentro.wait(5)
+
+        def terminar():
+            liberar.set()
+            hilo.join(5)
+        self.addCleanup(terminar)
+        return terminar
+
+    def test_rechaza_al_llegar_al_limite(self):
+        admision = ControlAdmision(max_en_curso=1, max_workers=2, retry_after=3)
+        terminar = self.ocupar(admision)
+        with self.assertRaises(ServidorSaturado) as contexto:
+            asyncio.run(admision.ejecutar(lambda: None))
+        self.assertEqual(contexto.exception.retry_after, 3)
+        terminar()
+        self.assertEqual(asyncio.run(admision.ejecutar(lambda: 'ok')), 'ok')
+        self.assertEqual(admision.estadisticas(), {'en_curso': 0, 'max_en_curso': 1, 'rechazadas': 1})
+
+    def test_predict_text_responde_429_con_retry_after(self):
+        registro = registro_falso()
+        registro._admision = ControlAdmision(max_en_curso=1, max_workers=2, retry_after=2)
+        terminar = self.ocupar(registro._admision)
+        with mock.patch.object(views, 'registro', registro):
+            cuerpo = json.dumps({'text': 'un texto'})
+            respuesta = self.client.post('/api/v1/predict-text', data=cuerpo, content_type='application/json')
+            self.assertEqual(respuesta.status_code, 429)
+            self.assertEqual(respuesta['Retry-After'], '2')
+            terminar()
+            respuesta = self.client.post('/api/v1/predict-text', data=cuerpo, content_type='application/json')
+            self.assertEqual(respuesta.status_code, 200)
+
+
+class PaginaFalsa:
+
+    def __init__(self, texto):
+        self.texto = texto
+
+    def extract_text(self):
+        if isinstance(self.texto, Exception):
+            raise self.texto
+        return self.texto
+
+    def close(self):
+        pass
+
+
+class PdfFalso:
+
+    def __init__(self, textos):
+        self.pages = [PaginaFalsa(t) for t in textos]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+@override_settings(TEXTO_MAX_SUBIDA_BYTES=1000)
+class AnalyzeDocumentTests(TestCase):
+    url = '/api/v1/analyze-document'
+
+    def setUp(self):
+        patcher = mock.patch.object(views, 'registro', registro_falso())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def subir(self, nombre, contenido):
+        return self.client.post(self.url, {'file': SimpleUploadedFile(nombre, contenido)})
+
+    def pdf(self, *textos):
+        import pdfplumber
+
+        return mock.patch.object(pdfplumber, 'open', return_value=PdfFalso(textos))
+
+    def test_txt(self):
+        respuesta = self.subir('ensayo.txt', 'Primer párrafo del ensayo.\n\nSegundo párrafo.'.encode('utf-8'))
+        self.assertEqual(respuesta.status_code, 200)
+        datos = respuesta.json()
+        self.assertEqual(datos['file'], 'ensayo.txt')
+        self.assertEqual([f['paragraphs'] for f in datos['fragments']], [[0, 1]])
+        self.assertEqual(datos['skipped'], [])
+
+    def test_pagina_de_pdf_que_falla_se_salta(self):
+        with self.pdf('Primera página.', ValueError('flujo dañado'), 'Tercera página.'):
+            respuesta = self.subir('informe.pdf', b'%PDF-1.4')
+        self.assertEqual(respuesta.status_code, 200)
+        datos = respuesta.json()
+        self.assertEqual([f['page'] for f in datos['fragments']], [1, 3])
+        self.assertEqual([p['page'] for p in datos['skipped']], [2])
+        self.assertIn('flujo dañado', datos['skipped'][0]['error'])
+
+    def test_pdf_sin_ninguna_pagina_legible(self):
+        with self.pdf(ValueError('dañada'), ValueError('dañada')):
+            respuesta = self.subir('informe.pdf', b'%PDF-1.4')
+        self.assertEqual(respuesta.status_code, 400)
+
+    def test_formato_no_soportado_y_sin_archivo(self):
+        self.assertEqual(self.subir('imagen.png', b'png').status_code, 400)
+        self.assertEqual(self.client.post(self.url, {}).status_code, 400)
+
+    def test_demasiado_grande(self):
+        respuesta = self.subir('ensayo.txt', b'palabra ' * 500)
+        self.assertEqual(respuesta.status_code, 413)
+
+    def test_manejador_por_content_length(self):
+        request = RequestFactory().post('/', {'file': SimpleUploadedFile('a.txt', b'x' * 4000)})
+        limite = LimiteTamanoSubida(request, 1000)
+        request.upload_handlers = [limite] + request.upload_handlers
+        self.assertNotIn('file', request.FILES)
+        self.assertTrue(limite.excedido)
+
+    def test_manejador_por_trozos(self):
+        limite = LimiteTamanoSubida(RequestFactory().post('/'), 1000)
+        limite.new_file('file', 'a.txt', 'text/plain', None)
+        self.assertEqual(limite.receive_data_chunk(b'x' * 600, 0), b'x' * 600)
+        with self.assertRaises(StopUpload):
+            limite.receive_data_chunk(b'x' * 600, 600)
+        self.assertTrue(limite.excedido)
+
+    def test_iterar_fragmentos_informa_la_pagina(self):
+        with self.pdf('uno', RuntimeError('x'), '   '):
+            fragmentos = list(iterar_fragmentos(object(), 'a.pdf'))
+        self.assertEqual(fragmentos[0], ({'page': 1}, 'uno'))
+        self.assertEqual(fragmentos[1][1], None)
+        self.assertEqual(len(fragmentos), 2)
+
+
+class CaracteristicasTests(SimpleTestCase):
+    texto = 'Hola mundo. Esto es una prueba de texto!'
+
+    def test_estadisticas_conocidas(self):
+        fila = caracteristicas.estadisticas_texto([self.texto]).iloc[0]
+        # Oraciones de 2 y 6 palabras; funcionales: es, una, de
+        esperado = {'n_palabras': 8, 'n_oraciones': 2, 'longitud_media_palabra': 31 / 8,
+                    'longitud_media_oracion': 4, 'desviacion_longitud_oracion': 2, 'burstiness': -1 / 3,
+                    'ttr': 1, 'frecuencia_funcionales': 3 / 8}
+        for columna, valor in esperado.items():
+            with self.subTest(columna=columna):
+                self.assertAlmostEqual(fila[columna], valor)
+
+    def test_lote_igual_que_uno_a_uno(self):
+        textos = [self.texto, '', 'sin punto final y sin punto final', None, '123 ... !!', 'Una. Dos. Tres.']
+        lote = caracteristicas.estadisticas_texto(textos)
+        uno_a_uno = pd.concat([caracteristicas.estadisticas_texto([t]) for t in textos], ignore_index=True)
+        pd.testing.assert_frame_equal(lote, uno_a_uno)
+        self.assertEqual(lote['n_palabras'].tolist()[1:5:2], [0, 0])
+        self.assertTrue(np.isnan(lote['ttr'][1]))
+        self.assertAlmostEqual(lote['ttr'][2], 4 / 7)
+
+    def test_cache_sqlite(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        ruta = os.path.join(carpeta.name, 'caracteristicas.sqlite')
+        motor = caracteristicas.MotorCaracteristicas(ruta_cache=ruta)
+        primero = motor.calcular([self.texto, '', self.texto])
+        motor.cerrar()
+        motor = caracteristicas.MotorCaracteristicas(ruta_cache=ruta)
+        self.addCleanup(motor.cerrar)
+        with mock.patch.object(caracteristicas, 'estadisticas_texto') as estadisticas:
+            segundo = motor.calcular(['', self.texto])
+        estadisticas.assert_not_called()
+        pd.testing.assert_frame_equal(segundo, primero.iloc[[1, 0]].reset_index(drop=True))
+
+    def test_perplejidad_por_lotes(self):
+        from transformers import GPT2Config, GPT2LMHeadModel
+
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        # El tokenizador de modelo_diminuto con un modelo causal en su lugar
+        ruta = modelo_diminuto(carpeta.name)
+        config = GPT2Config(vocab_size=14, n_embd=32, n_layer=1, n_head=2, n_positions=64, bos_token_id=2, eos_token_id=3)
+        GPT2LMHeadModel(config).save_pretrained(ruta)
+        textos = ['hola mundo', 'texto de prueba escrito por una persona', 'hola', 'una prueba de texto']
+        motor = caracteristicas.MotorCaracteristicas(ruta, batch_size=3)
+        calculado = motor.calcular(textos)
+        self.assertEqual(list(calculado.columns), caracteristicas.COLUMNAS_ESTADISTICAS + ['perplejidad'])
+        self.assertTrue((calculado['perplejidad'] > 1).all())
+        uno_a_uno = [motor.perplejidad.calcular([t])[0] for t in textos]
+        np.testing.assert_allclose(calculado['perplejidad'], uno_a_uno, rtol=1e-4)
+
+
+@override_settings(TEXTO_CASCADA=False)
+class TextFeaturesTests(TestCase):
+
+    def test_devuelve_las_caracteristicas(self):
+        registro = registro_falso()
+        registro._caracteristicas = caracteristicas.MotorCaracteristicas()
+        with mock.patch.object(views, 'registro', registro):
+            respuesta = self.client.post('/api/v1/text-features', data={'text': CaracteristicasTests.texto},
+                                         content_type='application/json')
+            sin_palabras = self.client.post('/api/v1/text-features', data={'text': '123 !!'},
+                                            content_type='application/json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(set(respuesta.json()), set(caracteristicas.COLUMNAS_ESTADISTICAS))
+        self.assertEqual(respuesta.json()['n_oraciones'], 2)
+        self.assertIsNone(sin_palabras.json()['ttr'])
+
+
+class CascadaTests(TestCase):
+
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.ruta = os.path.join(carpeta.name, 'filtro_tfidf.joblib')
+        rng = np.random.default_rng(0)
+        humano = 'ayer fuimos al parque con mis primos y comimos helado'.split()
+        ia = 'en conclusion es fundamental considerar diversos aspectos relevantes del tema'.split()
+        self.textos = [' '.join(rng.choice(palabras, 12)) for palabras in (humano, ia) for _ in range(30)]
+        self.etiquetas = [0] * 30 + [1] * 30
+        self.filtro = cascada.FiltroTfidf.entrenar(self.textos, self.etiquetas)
+        self.filtro.guardar(self.ruta)
+
+    def test_filtro_y_banda(self):
+        probabilidad, escalar = self.filtro.decidir(['ayer fuimos al parque con mis primos y comimos helado',
+                                                     'en conclusion es fundamental considerar diversos aspectos',
+                                                     'palabras nunca vistas'])
+        self.assertLess(probabilidad[0], 0.2)
+        self.assertGreater(probabilidad[1], 0.9)
+        self.assertEqual(escalar.tolist(), [False, False, True])
+        cargado = cascada.FiltroTfidf.cargar(self.ruta, banda=(0, 1))
+        np.testing.assert_allclose(cargado.probabilidad_ia(self.textos), self.filtro.probabilidad_ia(self.textos))
+        self.assertTrue(cargado.decidir(self.textos)[1].all())
+        with self.assertRaises(ValueError):
+            cascada.FiltroTfidf(self.filtro.pipeline, banda=(0.9, 0.2))
+
+    def test_otra_version_del_filtro(self):
+        with mock.patch.object(cascada, 'VERSION_FILTRO', cascada.VERSION_FILTRO + 1):
+            with self.assertRaises(ValueError):
+                cascada.FiltroTfidf.cargar(self.ruta)
+
+    def test_metricas(self):
+        m = cascada.metricas([0, 0, 0, 1, 1], [0, 1, 0, 1, 0])
+        self.assertAlmostEqual(m['f1'], 0.5)
+        self.assertAlmostEqual(m['fpr'], 1 / 3)
+
+    def test_el_registro_solo_escala_los_dudosos(self):
+        registro = registro_falso()
+        with override_settings(TEXTO_CASCADA=True, TEXTO_CACHE_PREDICCIONES=False, TEXTO_FILTRO_TFIDF=self.ruta,
+                               TEXTO_CASCADA_BANDA=(0.2, 0.9)):
+            seguro = registro.predecir('Ayer fuimos al parque con mis primos y comimos helado.')
+            dudoso = registro.predecir('Palabras nunca vistas')
+        self.assertEqual((seguro['stage'], seguro['label']), ('tfidf', 'Humano'))
+        self.assertEqual(dudoso['stage'], 'bert')
+        self.assertEqual(registro.predictor.lotes, [['Palabras nunca vistas']])
+        self.assertEqual(registro.estadisticas_cascada(), {'tfidf': 1, 'bert': 1})
+
+    def test_sin_filtro_se_usa_bert(self):
+        registro = registro_falso()
+        with override_settings(TEXTO_CASCADA=True, TEXTO_CACHE_PREDICCIONES=False,
+                               TEXTO_FILTRO_TFIDF=self.ruta + '.no_existe'), self.assertLogs('texto', 'WARNING'):
+            self.assertNotIn('stage', registro.predecir('Fuimos al parque con mis primos.'))
+
+
+class BenchmarkTextoTests(SimpleTestCase):
+
+    def ejecutar(self, *args, **opciones):
+        salida = StringIO()
+        call_command('benchmark_texto', *args, stdout=salida, stderr=StringIO(), **opciones)
+        return json.loads(salida.getvalue())
+
+    def test_limpieza_sin_tocar_sys_path(self):
+        antes = list(sys.path)
+        informe = self.ejecutar(solo='limpieza', n=30, workers=1)
+        self.assertEqual(sys.path, antes)
+        self.assertEqual(informe['resultados']['limpieza']['textos'], 30)
+        self.assertEqual(informe['omitidas'], {})
+
+    def test_traduccion_y_comparacion(self):
+        informe = self.ejecutar(solo='traduccion', n_traduccion=10, latencia_traductor=0, workers=1)
+        self.assertEqual(informe['resultados']['traduccion']['errores'], 0)
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            # Una referencia el doble de rápida: la ejecución actual es una regresión
+            anterior = json.loads(json.dumps(informe))
+            anterior['resultados']['traduccion']['textos_por_segundo'] *= 2
+            json.dump(anterior, f)
+        self.addCleanup(os.remove, f.name)
+        with self.assertRaises(CommandError):
+            self.ejecutar(solo='traduccion', n_traduccion=10, latencia_traductor=0, workers=1, comparar=f.name)
+
+    def test_parte_desconocida(self):
+        with self.assertRaises(CommandError):
+            self.ejecutar(solo='limpieza,otra')
+
+
+class MetricasTests(TestCase):
+
+    def test_histograma_acumulado(self):
+        registro = RegistroMetricas()
+        histograma = registro.histograma('prueba_segundos', 'Ayuda', buckets=(0.1, 1), etiquetas=('etapa',))
+        for valor in (0.05, 0.1, 0.5, 3):
+            histograma.observar(valor, 'mo"delo')
+        registro.registrar_colector(lambda: [('prueba_total', 'counter', 'Contador', [({'tipo': 'a'}, 2.0)])])
+        self.assertEqual(registro.exponer().splitlines(), [
+            '# HELP prueba_segundos Ayuda',
+            '# TYPE prueba_segundos histogram',
+            'prueba_segundos_bucket{etapa="mo\\"delo",le="0.1"} 2',
+            'prueba_segundos_bucket{etapa="mo\\"delo",le="1"} 3',
+            'prueba_segundos_bucket{etapa="mo\\"delo",le="+Inf"} 4',
+            'prueba_segundos_sum{etapa="mo\\"delo"} 3.65',
+            'prueba_segundos_count{etapa="mo\\"delo"} 4',
+            '# HELP prueba_total Contador',
+            '# TYPE prueba_total counter',
+            'prueba_total{tipo="a"} 2',
+        ])
+        with self.assertRaises(ValueError):
+            registro.histograma('prueba_segundos', 'Otra vez')
+
+    @override_settings(TEXTO_CACHE_PREDICCIONES=False, TEXTO_CASCADA=False)
+    def test_endpoint_metrics(self):
+        with mock.patch.object(views, 'registro', registro_falso()):
+            self.client.post('/api/v1/predict-text', data={'text': 'Un texto'}, content_type='application/json')
+        cargado = modulo_registro.registro._predictor
+        respuesta = self.client.get('/metrics')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta['Content-Type'], CONTENT_TYPE)
+        cuerpo = respuesta.content.decode('utf-8')
+        self.assertIn('texto_peticion_segundos_count{endpoint="predict-text",estado="200"}', cuerpo)
+        self.assertIn('texto_etapa_segundos_count{etapa="espera_cola"}', cuerpo)
+        self.assertIn('texto_modelo_cargado ', cuerpo)
+        # Leer /metrics no carga el modelo
+        self.assertIs(modulo_registro.registro._predictor, cargado)
+
+
+class DeduplicacionTests(SimpleTestCase):
+
+    def setUp(self):
+        self.deduplicacion = importar_script('deduplicacion')
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.carpeta = carpeta.name
+        rng = np.random.default_rng(0)
+        vocabulario = [''.join(rng.choice(list('abcdefghijklmnopqrstuvwxyz'), 6)) for _ in range(2000)]
+        base = [' '.join(rng.choice(vocabulario, 200)) for _ in range(6)]
+        # 1 y 4 son casi copias de 0 y 3 (una palabra cambiada); 5 es 2 con otras mayúsculas
+        casi = [t.split() for t in (base[0], base[3])]
+        for palabras in casi:
+            palabras[100] = 'distinta'
+        textos = [base[0], ' '.join(casi[0]), base[2], base[3], ' '.join(casi[1]), base[2].upper(), base[4]]
+        self.df = pd.DataFrame({'text': textos, 'label': ['human', 'ia', 'human', 'ia', 'ia', 'human', 'ia']})
+
+    def test_quita_los_casi_duplicados(self):
+        dedup, informe = self.deduplicacion.deduplicar_df(self.df)
+        self.assertEqual(dedup['text'].tolist(), self.df['text'][[0, 2, 3, 6]].tolist())
+        self.assertEqual(informe[['cluster', 'eliminado']].values.tolist(), [[0, 1], [2, 5], [3, 4]])
+        self.assertTrue((informe['similitud'] >= 0.8).all())
+        self.assertEqual(informe['label_eliminado'].tolist(), ['ia', 'human', 'ia'])
+        self.assertIn('1 tenían una etiqueta distinta', self.deduplicacion.resumen(informe, len(self.df)))
+
+    def test_se_verifican_todos_los_pares_del_cubo(self):
+        # Los tres coinciden en la primera banda; 1 y 2 solo se parecen entre sí
+        firmas = np.array([[1, 2, 3, 4, 5, 10, 11, 12, 13, 14],
+                           [1, 2, 3, 4, 5, 20, 21, 22, 23, 24],
+                           [1, 2, 3, 4, 5, 20, 21, 22, 23, 99]], dtype=np.uint64)
+        representante, similitud = self.deduplicacion.agrupar(firmas, umbral=0.8, bandas=2)
+        self.assertEqual(representante.tolist(), [0, 1, 1])
+        self.assertAlmostEqual(similitud[2], 0.9)
+
+    def test_cubos_grandes_limitados(self):
+        firmas = np.tile(np.arange(16, dtype=np.uint64), (250, 1))
+        representante, _ = self.deduplicacion.agrupar(firmas, umbral=0.8, bandas=4, max_cubo=10)
+        self.assertEqual(set(representante.tolist()), {0})
+
+    def test_por_bloques_igual_que_en_memoria(self):
+        esperado, informe_esperado = self.deduplicacion.deduplicar_df(self.df)
+        for nombre, particiones in (('d.csv', None), ('p.parquet', ['label'])):
+            with self.subTest(nombre=nombre):
+                entrada = os.path.join(self.carpeta, 'entrada_' + nombre)
+                salida = os.path.join(self.carpeta, nombre)
+                guardar_dataset(self.df, entrada, particiones)
+                filas, informe = self.deduplicacion.deduplicar_dataset(
+                    entrada, salida, particiones=particiones, chunk_rows=2)
+                dedup = leer_dataset(salida)
+                self.assertEqual(filas, len(esperado))
+                self.assertEqual(sorted(dedup['text']), sorted(esperado['text']))
+                self.assertEqual(sorted(informe['texto_eliminado']), sorted(informe_esperado['texto_eliminado']))
+                if particiones is None:
+                    pd.testing.assert_frame_equal(dedup, esperado)
+                    pd.testing.assert_frame_equal(informe.reset_index(drop=True),
+                                                  informe_esperado.reset_index(drop=True))
+
+
+class EntrenamientoTests(SimpleTestCase):
+
+    def setUp(self):
+        self.entrenamiento = importar_script('entrenamiento_modelo')
+
+    def test_reparto_batch(self):
+        for efectivo, procesos, maximo, esperado in ((8, 1, 8, (8, 1)), (64, 4, 8, (8, 2)), (12, 1, 8, (6, 2)),
+                                                     (6, 2, 2, (1, 3)), (4, 4, 8, (1, 1))):
+            with self.subTest(efectivo=efectivo, procesos=procesos, maximo=maximo):
+                lote, pasos = self.entrenamiento.reparto_batch(efectivo, procesos, maximo)
+                self.assertEqual((lote, pasos), esperado)
+                self.assertEqual(lote * pasos * procesos, efectivo)
+                self.assertLessEqual(lote, maximo)
+        with self.assertRaises(ValueError):
+            self.entrenamiento.reparto_batch(10, 4, 8)
+
+    def test_text_dataset_sin_padding(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        with mock.patch('sys.stdout', new=StringIO()):
+            corpus = importar_script('cache_tokenizacion').tokenizar_con_cache(
+                ['uno dos tres', 'cuatro', 'cinco seis'], TokenizadorFalso(), carpeta.name, max_length=4)
+        dataset = self.entrenamiento.TextDataset(corpus, [2, 0], [1, 0])
+        self.assertEqual(len(dataset), 2)
+        self.assertEqual(dataset.lengths.tolist(), [2, 3])
+        item = dataset[1]
+        self.assertEqual(item['input_ids'].tolist(), [3, 3, 4])
+        self.assertEqual(item['attention_mask'].tolist(), [1, 1, 1])
+        self.assertEqual(int(item['labels']), 0)
+
+    def test_entrenamiento_con_dos_procesos(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        base = modelo_diminuto(os.path.join(carpeta.name, 'base'))
+        dataset = os.path.join(carpeta.name, 'dataset.csv')
+        pd.DataFrame({'text': ['hola mundo', 'texto de prueba escrito por una persona'] * 10,
+                      'label': ['human', 'ia'] * 10}).to_csv(dataset, index=False)
+        metricas_json = os.path.join(carpeta.name, 'metricas.json')
+        salida = subprocess.run(
+            [sys.executable, os.path.join(CARPETA_TEXTO, 'entrenamiento_modelo.py'), '--dataset', dataset,
+             '--model-name', base, '--output-dir', 'modelo', '--cache-dir', 'cache', '--filtro-tfidf', 'filtro.joblib',
+             '--procesos', '2', '--batch-efectivo', '4', '--batch-size', '1', '--max-steps', '2',
+             '--hilos-por-proceso', '1', '--metricas-json', metricas_json],
+            cwd=carpeta.name, capture_output=True, text=True, timeout=600)
+        self.assertEqual(salida.returncode, 0, salida.stderr[-3000:])
+        with open(metricas_json, encoding='utf-8') as f:
+            metricas = json.load(f)
+        self.assertEqual((metricas['procesos'], metricas['batch_por_proceso'], metricas['pasos_acumulacion']),
+                         (2, 1, 2))
+        self.assertGreater(metricas['tokens_por_segundo'], 0)
+        for archivo in ('modelo/config.json', 'modelo/tokenizer_config.json', 'filtro.joblib'):
+            self.assertTrue(os.path.exists(os.path.join(carpeta.name, archivo)), archivo)
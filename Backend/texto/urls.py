@@ -0,0 +1,11 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path('predict-text', views.predict_text, name='predict_text'),
+    path('predict-document', views.predict_document, name='predict_document'),
+    path('analyze-document', views.analyze_document, name='analyze_document'),
+    path('text-features', views.text_features, name='text_features'),
+    path('prediction-cache', views.prediction_cache_stats, name='prediction_cache_stats'),
+]
@@ -1,3 +1,200 @@
-from django.shortcuts import render
+import functools
+import json
+import time
 
-# Create your views here.
+from django.db import close_old_connections
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.http.multipartparser import MultiPartParserError
+from django.template.defaultfilters import filesizeformat
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from .admision import ServidorSaturado
+from .extraccion import ArchivoNoLegible, LimiteExcedido
+from .inferencia import DemasiadasVentanas, DocumentoVacio
+from .metricas import CONTENT_TYPE, PETICIONES, metricas
+from .registro import registro
+from .subidas import LimiteTamanoSubida
+
+
+def _leer_texto(request):
+    """Devuelve (texto, None) o (None, respuesta de error) para un cuerpo {"text": "..."}"""
+    try:
+        datos = json.loads(request.body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None, JsonResponse({'error': 'El cuerpo debe ser JSON válido'}, status=400)
+
+    texto = datos.get('text') if isinstance(datos, dict) else None
+    if not isinstance(texto, str) or not texto.strip():
+        return None, JsonResponse({'error': "El campo 'text' es obligatorio"}, status=400)
+    return texto, None
+
+
+def _en_hilo(funcion, *args):
+    # Se ejecuta en un hilo del pool: la caché usa la base de datos, así que sus
+    # conexiones se tratan como en una petición síncrona (CONN_MAX_AGE)
+    close_old_connections()
+    try:
+        return funcion(*args)
+    finally:
+        close_old_connections()
+
+
+def _medir(endpoint):
+    """Observa la duración y el código de estado de una vista asíncrona en texto_peticion_segundos"""
+    def decorador(vista):
+        @functools.wraps(vista)
+        async def envoltura(request, *args, **kwargs):
+            inicio = time.perf_counter()
+            respuesta = await vista(request, *args, **kwargs)
+            PETICIONES.observar(time.perf_counter() - inicio, endpoint, respuesta.status_code)
+            return respuesta
+        return envoltura
+    return decorador
+
+
+def _respuesta_saturado(e):
+    respuesta = JsonResponse({'error': str(e)}, status=429)
+    respuesta['Retry-After'] = str(e.retry_after)
+    return respuesta
+
+
+@csrf_exempt
+@require_POST
+@_medir('predict-text')
+async def predict_text(request):
+    """POST /api/v1/predict-text con cuerpo {"text": "..."}
+
+    La predicción (caché, micro-lote y modelo) corre en el pool de registro.admision:
+    con ASGI el bucle de eventos sigue atendiendo otras peticiones mientras tanto.
+    """
+    texto, error = _leer_texto(request)
+    if error is not None:
+        return error
+
+    try:
+        resultado = await registro.admision.ejecutar(_en_hilo, registro.predecir, texto)
+    except ServidorSaturado as e:
+        return _respuesta_saturado(e)
+    except OSError:
+        # modelo_binario no existe todavía (no se ha ejecutado entrenamiento_modelo.py)
+        return JsonResponse({'error': 'El modelo no está disponible'}, status=503)
+    return JsonResponse(resultado)
+
+
+@csrf_exempt
+@require_POST
+@_medir('predict-document')
+async def predict_document(request):
+    """POST /api/v1/predict-document con cuerpo {"text": "..."}: documentos de cualquier
+    longitud, con la puntuación de cada ventana en 'windows'"""
+    texto, error = _leer_texto(request)
+    if error is not None:
+        return error
+
+    try:
+        resultado = await registro.admision.ejecutar(_en_hilo, registro.predecir_documento, texto)
+    except ServidorSaturado as e:
+        return _respuesta_saturado(e)
+    except OSError:
+        return JsonResponse({'error': 'El modelo no está disponible'}, status=503)
+    except DocumentoVacio as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except DemasiadasVentanas as e:
+        # Más ventanas que TEXTO_MAX_VENTANAS
+        return JsonResponse({'error': str(e)}, status=413)
+    return JsonResponse(resultado)
+
+
+def _caracteristicas(texto):
+    fila = registro.caracteristicas.calcular([texto]).iloc[0]
+    # NaN (p. ej. un texto sin palabras) no es JSON válido
+    return {columna: (None if valor != valor else valor) for columna, valor in fila.items()}
+
+
+@csrf_exempt
+@require_POST
+@_medir('text-features')
+async def text_features(request):
+    """POST /api/v1/text-features con cuerpo {"text": "..."}: perplejidad, burstiness,
+    diversidad léxica y longitudes de palabra y oración"""
+    texto, error = _leer_texto(request)
+    if error is not None:
+        return error
+
+    try:
+        resultado = await registro.admision.ejecutar(_en_hilo, _caracteristicas, texto)
+    except ServidorSaturado as e:
+        return _respuesta_saturado(e)
+    except OSError:
+        return JsonResponse({'error': 'El modelo de perplejidad no está disponible'}, status=503)
+    return JsonResponse(resultado)
+
+
+def _error_tamano():
+    limite = filesizeformat(settings.TEXTO_MAX_SUBIDA_BYTES)
+    return JsonResponse({'error': f'El archivo supera el tamaño máximo ({limite})'}, status=413)
+
+
+def _analizar_subida(request):
+    # Se ejecuta en el pool: leer el multipart y extraer el texto también bloquean
+    limite = LimiteTamanoSubida(request, settings.TEXTO_MAX_SUBIDA_BYTES)
+    request.upload_handlers.insert(0, limite)
+    try:
+        archivo = request.FILES.get('file')
+    except MultiPartParserError as e:
+        return JsonResponse({'error': f'Cuerpo multipart no válido: {e}'}, status=400)
+    if limite.excedido:
+        return _error_tamano()
+    if archivo is None:
+        return JsonResponse({'error': "Falta el archivo en el campo 'file'"}, status=400)
+    try:
+        resultado = registro.analizar_archivo(archivo, archivo.name)
+    except LimiteExcedido as e:
+        return JsonResponse({'error': str(e)}, status=413)
+    except ArchivoNoLegible as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    finally:
+        archivo.close()
+    return JsonResponse(dict(resultado, file=archivo.name))
+
+
+@csrf_exempt
+@require_POST
+@_medir('analyze-document')
+async def analyze_document(request):
+    """POST /api/v1/analyze-document con un PDF, DOCX o TXT (multipart, campo 'file').
+
+    El archivo se extrae y se clasifica página a página (PDF) o por bloques de
+    párrafos (DOCX, TXT); 'fragments' trae la puntuación de cada parte.
+    """
+    try:
+        longitud = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        longitud = 0
+    if longitud > settings.TEXTO_MAX_SUBIDA_BYTES:
+        return _error_tamano()
+
+    try:
+        return await registro.admision.ejecutar(_en_hilo, _analizar_subida, request)
+    except ServidorSaturado as e:
+        return _respuesta_saturado(e)
+    except OSError:
+        return JsonResponse({'error': 'El modelo no está disponible'}, status=503)
+
+
+@require_GET
+def prediction_cache_stats(request):
+    """GET /api/v1/prediction-cache: aciertos y fallos de la caché de predicciones
+    (no carga el modelo: todo a cero hasta la primera predicción)"""
+    estadisticas = registro.estadisticas_cache()
+    if estadisticas is None:
+        return JsonResponse({'activa': False})
+    return JsonResponse(dict(estadisticas, activa=True))
+
+
+@require_GET
+def metrics(request):
+    """GET /metrics: métricas del proceso en el formato de texto de Prometheus"""
+    return HttpResponse(metricas.exponer(), content_type=CONTENT_TYPE)